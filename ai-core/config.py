@@ -3,6 +3,7 @@
 # YOLOv8 Model Settings
 YOLO_MODEL_SIZE = "s"  # s(mall) - melhor que nano para produção
 YOLO_INPUT_SIZE = 640
+YOLO_ADAPTIVE_INPUT_SIZES = (320, 480, 640, 960)  # Escolhidos por orçamento de latência
 YOLO_CONFIDENCE_THRESHOLD = 0.3  # Reduzido para detectar mais objetos
 YOLO_IOU_THRESHOLD = 0.45
 
@@ -27,6 +28,14 @@ LEGACY_INPUT_SIZE = 224
 LEGACY_EPOCHS = 50
 LEGACY_BATCH_SIZE = 32
 
+# Video Settings
+VIDEO_SAMPLE_FPS = 5  # Frames analisados por segundo de vídeo
+VIDEO_JOBS_DB = "runs/jobs/video_jobs.db"
+VIDEO_JOB_SEGMENT_FRAMES = 300  # Frames por segmento (unidade de retomada)
+CAMERA_ROI_PATH = "config/camera_rois.json"  # Export de cameras.roi_config {camera_id: config}
+VIDEO_TRIAGE_INTERVAL_S = 1.0  # Triagem sem PyAV: um frame por intervalo
+VIDEO_TRIAGE_MAX_SIDE = 640  # Lado maior dos frames decodificados na triagem
+
 # Output Settings
 SAVE_VISUALIZATIONS = True
 SAVE_REPORTS = True
@@ -0,0 +1,292 @@
+"""
+🎨 Legacy Report Rendering
+Renders the charts and image grids of test_model.py reports from their data/ exports (Agg backend, process pool)
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # files only: no windows, safe in worker processes and on headless machines
+import matplotlib.pyplot as plt
+from PIL import Image
+
+REPORTS_DIR = "test_reports"
+THUMBNAIL_DIR = ".thumbnails"  # inside the reports directory, shared by every report
+THUMBNAIL_SIZE = 512           # long side; a grid cell is ~750 px wide at 150 dpi
+GRID_IMAGES = 6
+
+
+def slugify(text):
+    return text.lower().replace(" ", "_").replace("-", "_")
+
+
+def load_report_data(report_folder):
+    """One dict per data/*_results.json export of a report folder (test_type, image_dir, results)"""
+    exports = []
+    for json_file in sorted(glob.glob(os.path.join(report_folder, "data", "*_results.json"))):
+        with open(json_file, encoding='utf-8') as f:
+            exports.append(json.load(f))
+    return exports
+
+
+def categorize(results):
+    """{prediction_type: [(filename, confidence), ...]} sorted by confidence, highest first"""
+    categories = {name: [] for name in ("True Positive", "True Negative", "False Positive", "False Negative")}
+    for item in results:
+        categories[item['prediction_type']].append((item['filename'], item['confidence']))
+    for items in categories.values():
+        items.sort(key=lambda x: x[1], reverse=True)
+    return categories
+
+
+def thumbnail_path(image_path, cache_dir, size=THUMBNAIL_SIZE):
+    """Cache file for an image: keyed by path, mtime and size, so a changed image gets a new thumbnail"""
+    stat = os.stat(image_path)
+    key = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{size}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".jpg")
+
+
+def load_thumbnail(image_path, cache_dir, size=THUMBNAIL_SIZE):
+    """(RGB thumbnail, cached) - decodes the full image only the first time it is rendered"""
+    cached = thumbnail_path(image_path, cache_dir, size)
+    if os.path.exists(cached):
+        with Image.open(cached) as img:
+            return img.convert("RGB"), True
+
+    with Image.open(image_path) as img:
+        img.draft("RGB", (size, size))  # JPEG: decode at reduced DCT scale
+        thumb = img.convert("RGB")
+    thumb.thumbnail((size, size))
+    os.makedirs(cache_dir, exist_ok=True)
+    # Unique temp name + rename: workers rendering the same image never see a partial file
+    tmp = f"{cached}.{os.getpid()}.tmp"
+    thumb.save(tmp, "JPEG", quality=90)
+    os.replace(tmp, cached)
+    return thumb, False
+
+
+def render_prediction_plots(task):
+    """Dashboard: confidence histograms, false positives, results pie and metrics text"""
+    categories = task['categories']
+    test_type = task['test_type']
+    fire_confs = [conf for _, conf in categories["True Positive"]]
+    nofire_confs = [conf for _, conf in categories["True Negative"]]
+    fp_confs = [conf for _, conf in categories["False Positive"]]
+    tp_count, tn_count = len(fire_confs), len(nofire_confs)
+    fp_count, fn_count = len(fp_confs), len(categories["False Negative"])
+
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+    fig.suptitle(f'Model Predictions Analysis - {test_type}', fontsize=16, fontweight='bold')
+
+    # Plot 1: Confidence distribution for correct predictions
+    if fire_confs or nofire_confs:
+        ax1.hist(fire_confs, bins=20, alpha=0.7, label=f'Fire Detected ({tp_count})', color='red')
+        ax1.hist(nofire_confs, bins=20, alpha=0.7, label=f'No Fire Detected ({tn_count})', color='blue')
+        ax1.set_title('Confidence Distribution - Correct Predictions')
+        ax1.set_xlabel('Confidence Score')
+        ax1.set_ylabel('Count')
+        ax1.legend()
+        ax1.grid(True, alpha=0.3)
+
+    # Plot 2: False positives analysis
+    if fp_confs:
+        ax2.hist(fp_confs, bins=10, alpha=0.7, color='orange', edgecolor='red')
+        ax2.set_title(f'False Positives Confidence ({fp_count} images)')
+        ax2.set_xlabel('Confidence Score')
+        ax2.set_ylabel('Count')
+        ax2.axvline(x=0.5, color='red', linestyle='--', label='Decision Threshold')
+        ax2.legend()
+        ax2.grid(True, alpha=0.3)
+    else:
+        ax2.text(0.5, 0.5, 'No False Positives!', transform=ax2.transAxes,
+                 ha='center', va='center', fontsize=14, color='green', weight='bold')
+        ax2.set_title('False Positives Analysis')
+
+    # Plot 3: Performance metrics pie chart
+    correct_count = tp_count + tn_count
+    slices = [(f'Correct\n({correct_count})', correct_count, 'lightgreen'),
+              (f'False Pos\n({fp_count})', fp_count, 'lightcoral'),
+              (f'False Neg\n({fn_count})', fn_count, 'orange')]
+    slices = [s for s in slices if s[1] > 0]
+    if slices:
+        labels, sizes, colors = zip(*slices)
+        ax3.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+        ax3.set_title('Prediction Results Distribution')
+
+    # Plot 4: Summary statistics
+    ax4.axis('off')
+    total = correct_count + fp_count + fn_count
+    accuracy = correct_count / total * 100 if total > 0 else 0
+    precision = tp_count / (tp_count + fp_count) * 100 if (tp_count + fp_count) > 0 else 0
+    recall = tp_count / (tp_count + fn_count) * 100 if (tp_count + fn_count) > 0 else 0
+    f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+    fp_rate = fp_count / total * 100 if total > 0 else 0
+    fn_rate = fn_count / total * 100 if total > 0 else 0
+
+    stats_text = f"""MODEL PERFORMANCE METRICS
+
+Overall Accuracy: {accuracy:.1f}%
+Fire Detection (Precision): {precision:.1f}%
+Fire Recall: {recall:.1f}%
+F1-Score: {f1:.1f}%
+
+Detailed Breakdown:
+  True Positives (Fire): {tp_count}
+  True Negatives (No Fire): {tn_count}
+  False Positives: {fp_count}
+  False Negatives: {fn_count}
+
+False Positive Rate: {fp_rate:.1f}%
+False Negative Rate: {fn_rate:.1f}%
+    """
+
+    ax4.text(0.1, 0.9, stats_text, transform=ax4.transAxes, fontsize=10,
+             verticalalignment='top', fontfamily='monospace',
+             bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.8))
+
+    plt.tight_layout()
+    fig.savefig(task['path'], dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return {'path': task['path']}
+
+
+def render_image_grid(task):
+    """Grid of up to GRID_IMAGES test images with filename and confidence, from cached thumbnails"""
+    images = task['images'][:GRID_IMAGES]
+    color = task['color']
+    cols = 3
+    rows = (len(images) + cols - 1) // cols
+
+    fig, axes = plt.subplots(rows, cols, figsize=(15, 5 * rows), squeeze=False)
+    fig.suptitle(task['title'], fontsize=16, color=color, fontweight='bold')
+    axes = axes.flatten()
+
+    cached = 0
+    for ax, (filename, confidence) in zip(axes, images):
+        try:
+            thumb, hit = load_thumbnail(os.path.join(task['image_dir'], filename), task['cache_dir'])
+            cached += hit
+            ax.imshow(thumb)
+            ax.set_title(f"{filename}\nConfidence: {confidence:.3f}", fontsize=10, color=color)
+        except Exception:
+            ax.text(0.5, 0.5, f"Error loading\n{filename}", ha='center', va='center', transform=ax.transAxes)
+    for ax in axes:
+        ax.axis('off')
+
+    plt.tight_layout()
+    fig.savefig(task['path'], dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return {'path': task['path'], 'thumbnails': len(images), 'thumbnails_cached': cached}
+
+
+RENDERERS = {
+    'dashboard': render_prediction_plots,
+    'grid': render_image_grid,
+}
+
+
+def _render(task):
+    start = time.perf_counter()
+    try:
+        result = RENDERERS[task['kind']](task)
+    except Exception as e:
+        result = {'path': task['path'], 'error': str(e)}
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def report_tasks(report_folder):
+    """Independent render tasks (one dashboard + image grids per test export) of a report folder"""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(report_folder)), THUMBNAIL_DIR)
+    tasks = []
+    for export in load_report_data(report_folder):
+        test_type = export['test_type']
+        categories = categorize(export['results'])
+        tasks.append({
+            'kind': 'dashboard',
+            'test_type': test_type,
+            'categories': categories,
+            'path': os.path.join(report_folder, "charts", f"prediction_analysis_{slugify(test_type)}.png"),
+        })
+
+        image_dir = export.get('image_dir')
+        if not image_dir or not os.path.isdir(image_dir):
+            print(f"⚠️  {test_type}: test images not found ({image_dir}), skipping image grids")
+            continue
+        grids = [
+            ("False Positive", "FALSE POSITIVES - Most Confident Mistakes", "red",
+             "false_positives_most_confident_mistakes.png"),
+            ("True Negative", "TRUE NEGATIVES - High Confidence Correct", "green",
+             "true_negatives_high_confidence_correct.png"),
+        ]
+        for prediction_type, title, color, filename in grids:
+            if categories[prediction_type]:
+                tasks.append({
+                    'kind': 'grid',
+                    'title': title,
+                    'color': color,
+                    'images': categories[prediction_type][:GRID_IMAGES],
+                    'image_dir': image_dir,
+                    'cache_dir': cache_dir,
+                    'path': os.path.join(report_folder, "images", filename),
+                })
+    return tasks
+
+
+def render_reports(report_folders, workers=None):
+    """Render every chart and grid of the given report folders, in parallel; returns one result per task"""
+    tasks = [task for folder in report_folders for task in report_tasks(folder)]
+    if not tasks:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        return [_render(task) for task in tasks]
+    # spawn: workers start clean even when the caller has TensorFlow threads running
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(_render, tasks))
+
+
+def latest_report(reports_dir=REPORTS_DIR):
+    """Most recent report folder (names start with the timestamp), None if there is none"""
+    folders = sorted(os.path.dirname(d) for d in glob.glob(os.path.join(reports_dir, "*", "data")))
+    return folders[-1] if folders else None
+
+
+def main():
+    """Render reports: python report_rendering.py [report_folder ...] [--workers N]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Render charts and image grids of legacy test reports')
+    parser.add_argument('folders', nargs='*', help=f'report folders (default: latest in {REPORTS_DIR}/)')
+    parser.add_argument('--workers', type=int, default=None, help='render processes (default: CPU count)')
+    args = parser.parse_args()
+
+    folders = args.folders or [latest_report()]
+    if not folders[0]:
+        print(f"❌ No reports found in {REPORTS_DIR}/")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = render_reports(folders, args.workers)
+    failed = [r for r in results if 'error' in r]
+    for result in results:
+        if 'error' in result:
+            print(f"❌ {result['path']}: {result['error']}")
+        else:
+            cached = f" ({result['thumbnails_cached']}/{result['thumbnails']} thumbnails cached)" \
+                if 'thumbnails' in result else ""
+            print(f"🖼️  {result['path']} - {result['seconds']:.2f}s{cached}")
+    print(f"\n🎨 Rendered {len(results) - len(failed)}/{len(results)} figures in {time.perf_counter() - start:.2f}s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
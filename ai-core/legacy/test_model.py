@@ -1,22 +1,33 @@
-import tensorflow as tf
-import numpy as np
-import matplotlib.pyplot as plt
-from tensorflow.keras.preprocessing import image
-import requests
-from io import BytesIO
-from PIL import Image
-import kagglehub
+"""
+🔥 Legacy MobileNetV2 Evaluator
+Importable: the Keras model and the Forest Fire dataset load on first use (get_model / get_dataset)
+"""
+
 import os
-import random
+import json
+from collections import namedtuple
 from datetime import datetime
+from io import BytesIO
+import numpy as np
 from PIL import Image
-import kagglehub
-import os
-import random
 
-# Load the locally trained model
-print("🔥 Fire Detection with Trained MobileNetV2")
-print("=" * 50)
+LOCAL_MODEL_PATH = "models/trained/trained_fire_detection_model.h5"
+DATASET_HANDLE = "alik05/forest-fire-dataset"
+# Resolved dataset folders and file lists, so later runs skip the download check and directory listings
+DATASET_MANIFEST = os.path.join("test_reports", ".dataset_manifest.json")
+MANIFEST_VERSION = 1
+INPUT_SIZE = (224, 224)  # MobileNetV2 input size
+CLASSES = ["Fire", "No Fire"]
+
+ForestFireDataset = namedtuple('ForestFireDataset', 'dataset_path train_fire_path train_nofire_path test_path '
+                                                    'train_fire_files train_nofire_files test_files')
+
+# Filled on first use
+_models = {}
+_dataset = None
+
+# Report folders filled by this run, rendered once evaluation is over
+collected_reports = []
 
 def create_report_folder(test_type):
     """Create a timestamped folder for test reports"""
@@ -115,8 +126,8 @@ def save_test_summary(test_folder, results, test_type, stats):
     print(f"📄 Test summary saved: {summary_file}")
     return summary_file
 
-def save_data_exports(report_folder, results, test_type):
-    """Save test results in CSV and JSON formats for further analysis"""
+def save_data_exports(report_folder, results, test_type, image_dir=None):
+    """Save test results in CSV and JSON formats (the JSON also feeds report_rendering.py)"""
     import json
     
     # Prepare data for export
@@ -144,6 +155,7 @@ def save_data_exports(report_folder, results, test_type):
         json.dump({
             'test_type': test_type,
             'timestamp': datetime.now().isoformat(),
+            'image_dir': os.path.abspath(image_dir) if image_dir else None,
             'total_images': len(export_data),
             'results': export_data
         }, f, indent=2, ensure_ascii=False)
@@ -163,6 +175,18 @@ def save_data_exports(report_folder, results, test_type):
     
     return json_file, csv_file
 
+def render_reports(report_folders, workers=None):
+    """Render charts and image grids of the collected reports as a separate step (report_rendering.py)"""
+    import subprocess
+    import sys
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_rendering.py")
+    command = [sys.executable, script, *report_folders]
+    if workers:
+        command += ["--workers", str(workers)]
+    print(f"\n🎨 Rendering charts for {len(report_folders)} report(s)...")
+    return subprocess.run(command, check=False).returncode == 0
+
 def get_prediction_type(is_actually_fire, predicted_fire):
     """Determine the type of prediction (TP, TN, FP, FN)"""
     if is_actually_fire and predicted_fire:
@@ -174,54 +198,121 @@ def get_prediction_type(is_actually_fire, predicted_fire):
     else:  # is_actually_fire and not predicted_fire
         return "False Negative"
 
-# Check for local trained model first
-local_model_path = "models/trained/trained_fire_detection_model.h5"
+def get_model(model_path=LOCAL_MODEL_PATH):
+    """Keras model, loaded on the first call for each path (FileNotFoundError if it was never trained)"""
+    if model_path not in _models:
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Trained model not found: {model_path}")
+        import tensorflow as tf
+        print(f"Loading trained fire detection model: {model_path}")
+        _models[model_path] = tf.keras.models.load_model(model_path)
+    return _models[model_path]
 
-if os.path.exists(local_model_path):
-    print(f"✅ Found local trained model: {local_model_path}")
-    print("Loading trained fire detection model...")
-    model = tf.keras.models.load_model(local_model_path)
-    print("✅ Trained model loaded successfully!")
-    print(f"Model input shape: {model.input_shape}")
-    print(f"Model output shape: {model.output_shape}")
-else:
-    print("❌ Trained model not found!")
-    print(f"Please run 'poetry run python quick_train.py' first to train a model.")
-    print(f"Looking for: {local_model_path}")
-    exit(1)
+def list_images(folder):
+    """Sorted .jpg files of a folder, empty if it does not exist"""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(f for f in os.listdir(folder) if f.endswith('.jpg'))
 
-# Download dataset for testing  
-print("\nDownloading test dataset...")
-dataset_path = kagglehub.dataset_download("alik05/forest-fire-dataset")
-base_path = os.path.join(dataset_path, "Forest Fire Dataset")
-train_fire_path = os.path.join(base_path, "Training", "fire")
-train_nofire_path = os.path.join(base_path, "Training", "nofire")
-test_path = os.path.join(base_path, "Testing")
+def scan_dataset(dataset_path):
+    """ForestFireDataset for a local copy of the Kaggle dataset (folder containing 'Forest Fire Dataset')"""
+    base_path = os.path.join(dataset_path, "Forest Fire Dataset")
+    train_fire_path = os.path.join(base_path, "Training", "fire")
+    train_nofire_path = os.path.join(base_path, "Training", "nofire")
+    test_path = os.path.join(base_path, "Testing")
+    return ForestFireDataset(dataset_path, train_fire_path, train_nofire_path, test_path,
+                             list_images(train_fire_path), list_images(train_nofire_path), list_images(test_path))
 
-print(f"Dataset available at: {dataset_path}")
-print(f"Training - Fire images: {len(os.listdir(train_fire_path)) if os.path.exists(train_fire_path) else 0}")
-print(f"Training - No Fire images: {len(os.listdir(train_nofire_path)) if os.path.exists(train_nofire_path) else 0}")
-print(f"Testing images: {len(os.listdir(test_path)) if os.path.exists(test_path) else 0}")
+def _folder_stamps(dataset):
+    """mtime of each image folder: adding or removing files changes it and invalidates the manifest"""
+    folders = (dataset.train_fire_path, dataset.train_nofire_path, dataset.test_path)
+    return [os.stat(f).st_mtime_ns if os.path.isdir(f) else None for f in folders]
 
-# Check test images structure
-if os.path.exists(test_path):
-    test_files = [f for f in os.listdir(test_path) if f.endswith('.jpg')]
-    print(f"Total test images available: {len(test_files)}")
-    
-    # Check naming pattern to understand labels
-    fire_test_files = [f for f in test_files if 'fire' in f.lower()]
-    print(f"Test images with 'fire' in name: {len(fire_test_files)}")
-    print(f"Sample test files: {test_files[:5]}")
-else:
-    print("❌ Test path not found!")
+def load_manifest(manifest_path=DATASET_MANIFEST):
+    """Cached ForestFireDataset, None if the manifest is missing, outdated or its folders changed"""
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('handle') != DATASET_HANDLE:
+            return None
+        dataset = ForestFireDataset(**manifest['dataset'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return dataset if _folder_stamps(dataset) == manifest.get('stamps') else None
+
+def save_manifest(dataset, manifest_path=DATASET_MANIFEST):
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': MANIFEST_VERSION,
+            'handle': DATASET_HANDLE,
+            'created': datetime.now().isoformat(),
+            'stamps': _folder_stamps(dataset),
+            'dataset': dataset._asdict(),
+        }, f, indent=2)
+
+def get_dataset(manifest_path=DATASET_MANIFEST, refresh=False):
+    """Forest Fire dataset, from the manifest when still valid, otherwise downloaded (kagglehub) and scanned"""
+    global _dataset
+    if _dataset is not None and not refresh:
+        return _dataset
+    dataset = None if refresh else load_manifest(manifest_path)
+    if dataset is None:
+        import kagglehub
+        print("\nDownloading test dataset...")
+        dataset = scan_dataset(kagglehub.dataset_download(DATASET_HANDLE))
+        save_manifest(dataset, manifest_path)
+    _dataset = dataset
+    return dataset
+
+def describe_dataset(dataset):
+    print(f"Dataset available at: {dataset.dataset_path}")
+    print(f"Training - Fire images: {len(dataset.train_fire_files)}")
+    print(f"Training - No Fire images: {len(dataset.train_nofire_files)}")
+    print(f"Testing images: {len(dataset.test_files)}")
+    if dataset.test_files:
+        # Check naming pattern to understand labels
+        fire_test_files = [f for f in dataset.test_files if 'fire' in f.lower()]
+        print(f"Test images with 'fire' in name: {len(fire_test_files)}")
+        print(f"Sample test files: {dataset.test_files[:5]}")
+    else:
+        print("❌ Test path not found!")
+
+def _test_images(test_path):
+    """(folder, files) of the test set: cached by the manifest by default, listed for an injected folder"""
+    if test_path is None:
+        dataset = get_dataset()
+        return dataset.test_path, dataset.test_files
+    return test_path, list_images(test_path)
+
+def load_image_batch(img):
+    """Image file or PIL image -> (1, 224, 224, 3) float32 batch in [0, 1], as the model was trained"""
+    if not isinstance(img, Image.Image):
+        img = Image.open(img)
+    img_resized = img.convert("RGB").resize(INPUT_SIZE)
+    return np.expand_dims(np.asarray(img_resized, dtype=np.float32) / 255.0, axis=0)
+
+def show_prediction(img_resized, label, confidence):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.imshow(img_resized)
+    plt.axis("off")
+    plt.title(f"Prediction: {label} (Confidence: {confidence:.3f})")
+    plt.show()
 
 # Function to preprocess image and make prediction (based on Kaggle example)
-def predict_fire_from_url(img_url):
+def predict_fire_from_url(img_url, model=None, show=True):
     """
     Predict fire from image URL using the pre-trained model
     Based on: https://www.kaggle.com/code/datascientist97/example-code-to-use
     """
+    import requests
+
     try:
+        if model is None:
+            model = get_model()
+
         # Download image with headers (to avoid blocking)
         headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
         response = requests.get(img_url, headers=headers, stream=True)
@@ -232,25 +323,16 @@ def predict_fire_from_url(img_url):
 
         # Open and resize image
         img = Image.open(BytesIO(response.content)).convert("RGB")
-        img_resized = img.resize((224, 224))  # MobileNetV2 input size
+        img_resized = img.resize(INPUT_SIZE)
 
-        # Convert to array and normalize (same as original code)
-        img_array = image.img_to_array(img_resized) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)  # Add batch dimension
-        
-        # Make prediction
-        preds = model.predict(img_array, verbose=0)[0]
+        # Normalize and make prediction
+        preds = model.predict(load_image_batch(img_resized), verbose=0)[0]
         class_idx = np.argmax(preds)
-        classes = ["Fire", "No Fire"]  # Adjust based on your model's classes
-        label = classes[class_idx]
+        label = CLASSES[class_idx]
         confidence = preds[class_idx]
         
-        # Display result
-        plt.figure(figsize=(10, 6))
-        plt.imshow(img_resized)
-        plt.axis("off")
-        plt.title(f"Prediction: {label} (Confidence: {confidence:.3f})")
-        plt.show()
+        if show:
+            show_prediction(img_resized, label, confidence)
         
         print(f"🌐 URL: {img_url}")
         print(f"🔥 Prediction: {label}")
@@ -264,32 +346,25 @@ def predict_fire_from_url(img_url):
         print(f"❌ Error processing {img_url}: {e}")
         return None, None
 
-def predict_fire_from_file(img_path):
+def predict_fire_from_file(img_path, model=None, show=True):
     """
-    Predict fire from local image file
+    Predict fire from local image file, returns (label, confidence) or (None, None) on error
     """
     try:
+        if model is None:
+            model = get_model()
+
         # Load and preprocess image
-        img = Image.open(img_path).convert("RGB")
-        img_resized = img.resize((224, 224))
-        
-        # Convert to array and normalize
-        img_array = image.img_to_array(img_resized) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
+        img_resized = Image.open(img_path).convert("RGB").resize(INPUT_SIZE)
         
         # Make prediction
-        preds = model.predict(img_array, verbose=0)[0]
+        preds = model.predict(load_image_batch(img_resized), verbose=0)[0]
         class_idx = np.argmax(preds)
-        classes = ["Fire", "No Fire"]
-        label = classes[class_idx]
+        label = CLASSES[class_idx]
         confidence = preds[class_idx]
         
-        # Display result
-        plt.figure(figsize=(10, 6))
-        plt.imshow(img_resized)
-        plt.axis("off")
-        plt.title(f"Prediction: {label} (Confidence: {confidence:.3f})")
-        plt.show()
+        if show:
+            show_prediction(img_resized, label, confidence)
         
         print(f"📸 File: {os.path.basename(img_path)}")
         print(f"🔥 Prediction: {label}")
@@ -303,8 +378,8 @@ def predict_fire_from_file(img_path):
         print(f"❌ Error processing {img_path}: {e}")
         return None, None
 
-def visualize_predictions(results, test_type="Test", report_folder=None):
-    """Create a visual summary of model predictions"""
+def visualize_predictions(results, test_type="Test", report_folder=None, image_dir=None):
+    """Summarize predictions and export them; charts are drawn later by render_reports()"""
     if not results:
         print("❌ No results to visualize!")
         return
@@ -366,8 +441,8 @@ def visualize_predictions(results, test_type="Test", report_folder=None):
     # Save text summary
     save_test_summary(report_folder, results, test_type, stats)
     
-    # Save data exports
-    save_data_exports(report_folder, results, test_type)
+    # Save data exports (input of the rendering step)
+    save_data_exports(report_folder, results, test_type, image_dir)
     
     # Show samples from each category
     categories = [
@@ -396,271 +471,22 @@ def visualize_predictions(results, test_type="Test", report_folder=None):
         if len(category_results) > 5:
             print(f"  ... and {len(category_results) - 5} more images")
     
-    # Create matplotlib visualization
-    if len(results) > 0:
-        create_prediction_plots(fire_predictions, nofire_predictions, false_positives, false_negatives, test_type, report_folder)
-        
-        # Ask if user wants to see sample images
-        try:
-            if false_positives or false_negatives:
-                show_images = input("\n🖼️  Do you want to see sample images of predictions? (y/n): ").strip().lower()
-                if show_images in ['y', 'yes', '1', 'true']:
-                    print("📸 Creating image galleries...")
-                    show_sample_images(results, test_type, show_false_positives=len(false_positives) > 0, report_folder=report_folder)
-        except KeyboardInterrupt:
-            print("\n👋 Skipping image display...")
-        except Exception:
-            print("📋 Continuing without image display...")
-    
+    collected_reports.append(report_folder)
     print(f"\n📁 All reports saved in: {report_folder}")
     return report_folder
 
-def show_sample_images(results, test_type="Test", show_false_positives=True, report_folder=None):
-    """Show sample images from the test results"""
-    
-    if not results:
-        return
-    
-    # Get false positives and true negatives
-    false_positives = []
-    true_negatives = []
-    
-    for result in results:
-        if len(result) >= 6:
-            filename, predicted_fire, confidence, is_correct, fire_prob, nofire_prob = result
-            is_actually_fire = filename.startswith('fire_')
-            
-            if predicted_fire and not is_actually_fire:  # False positive
-                false_positives.append((filename, confidence))
-            elif not predicted_fire and not is_actually_fire:  # True negative
-                true_negatives.append((filename, confidence))
-    
-    if show_false_positives and false_positives:
-        # Show top 6 false positives
-        false_positives.sort(key=lambda x: x[1], reverse=True)
-        show_images_grid(false_positives[:6], "🚨 FALSE POSITIVES - Most Confident Mistakes", "red", report_folder)
-    
-    # Show some high-confidence true negatives for comparison
-    true_negatives.sort(key=lambda x: x[1], reverse=True)
-    show_images_grid(true_negatives[:6], "✅ TRUE NEGATIVES - High Confidence Correct", "green", report_folder)
-
-def show_images_grid(image_list, title, color, report_folder=None):
-    """Display a grid of images with their info"""
-    
-    if not image_list:
-        return
-    
-    try:
-        # Create subplot grid
-        n_images = min(len(image_list), 6)
-        cols = 3
-        rows = (n_images + cols - 1) // cols
-        
-        fig, axes = plt.subplots(rows, cols, figsize=(15, 5*rows))
-        fig.suptitle(title, fontsize=16, color=color, fontweight='bold')
-        
-        # Ensure axes is always a list
-        if rows == 1:
-            axes = [axes] if cols == 1 else axes
-        else:
-            axes = axes.flatten()
-        
-        for i, (filename, confidence) in enumerate(image_list[:n_images]):
-            img_path = os.path.join(test_path, filename)
-            
-            try:
-                # Load and display image
-                img = Image.open(img_path)
-                axes[i].imshow(img)
-                axes[i].set_title(f"{filename}\nConfidence: {confidence:.3f}", 
-                                fontsize=10, color=color)
-                axes[i].axis('off')
-            except Exception as e:
-                axes[i].text(0.5, 0.5, f"Error loading\n{filename}", 
-                           ha='center', va='center', transform=axes[i].transAxes)
-                axes[i].axis('off')
-        
-        # Hide empty subplots
-        for i in range(n_images, len(axes)):
-            axes[i].axis('off')
-        
-        plt.tight_layout()
-        
-        # Save the grid to the appropriate folder
-        if report_folder:
-            grid_filename = f"{title.lower().replace(' ', '_').replace('🚨', '').replace('✅', '').strip()}.png"
-            grid_path = os.path.join(report_folder, "images", grid_filename)
-        else:
-            grid_filename = f"{title.lower().replace(' ', '_').replace('🚨', '').replace('✅', '').strip()}.png"
-            grid_path = grid_filename
-            
-        plt.savefig(grid_path, dpi=150, bbox_inches='tight')
-        print(f"📸 Image grid saved as: {grid_path}")
-        
-        # Try to show
-        try:
-            plt.show(block=False)
-        except:
-            pass
-        
-        # Try to open with default viewer
-        try:
-            import subprocess
-            subprocess.run(["start", grid_path], shell=True, check=False)
-        except:
-            pass
-            
-        plt.close()
-        
-    except Exception as e:
-        print(f"❌ Error creating image grid: {e}")
-
-def create_prediction_plots(fire_preds, nofire_preds, false_pos, false_neg, test_type, report_folder=None):
-    """Create matplotlib plots showing prediction distribution"""
-    
-    # Confidence distribution plot
-    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
-    fig.suptitle(f'Model Predictions Analysis - {test_type}', fontsize=16, fontweight='bold')
-    
-    # Plot 1: Confidence distribution for correct predictions
-    if fire_preds or nofire_preds:
-        fire_confs = [conf for _, conf, _ in fire_preds]
-        nofire_confs = [conf for _, conf, _ in nofire_preds]
-        
-        ax1.hist(fire_confs, bins=20, alpha=0.7, label=f'Fire Detected ({len(fire_confs)})', color='red')
-        ax1.hist(nofire_confs, bins=20, alpha=0.7, label=f'No Fire Detected ({len(nofire_confs)})', color='blue')
-        ax1.set_title('Confidence Distribution - Correct Predictions')
-        ax1.set_xlabel('Confidence Score')
-        ax1.set_ylabel('Count')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-    
-    # Plot 2: False positives analysis
-    if false_pos:
-        fp_confs = [conf for _, conf, _ in false_pos]
-        ax2.hist(fp_confs, bins=10, alpha=0.7, color='orange', edgecolor='red')
-        ax2.set_title(f'False Positives Confidence ({len(false_pos)} images)')
-        ax2.set_xlabel('Confidence Score')
-        ax2.set_ylabel('Count')
-        ax2.axvline(x=0.5, color='red', linestyle='--', label='Decision Threshold')
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-    else:
-        ax2.text(0.5, 0.5, 'No False Positives!', transform=ax2.transAxes, 
-                ha='center', va='center', fontsize=14, color='green', weight='bold')
-        ax2.set_title('False Positives Analysis')
-    
-    # Plot 3: Performance metrics pie chart
-    correct_count = len(fire_preds) + len(nofire_preds)
-    fp_count = len(false_pos)
-    fn_count = len(false_neg)
-    
-    labels = []
-    sizes = []
-    colors = []
-    
-    if correct_count > 0:
-        labels.append(f'Correct\n({correct_count})')
-        sizes.append(correct_count)
-        colors.append('lightgreen')
-    
-    if fp_count > 0:
-        labels.append(f'False Pos\n({fp_count})')
-        sizes.append(fp_count)
-        colors.append('lightcoral')
-    
-    if fn_count > 0:
-        labels.append(f'False Neg\n({fn_count})')
-        sizes.append(fn_count)
-        colors.append('orange')
-    
-    if labels:
-        ax3.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-        ax3.set_title('Prediction Results Distribution')
-    
-    # Plot 4: Summary statistics
-    ax4.axis('off')
-    total = correct_count + fp_count + fn_count
-    accuracy = correct_count / total * 100 if total > 0 else 0
-    precision = len(fire_preds) / (len(fire_preds) + fp_count) * 100 if (len(fire_preds) + fp_count) > 0 else 0
-    recall = len(fire_preds) / (len(fire_preds) + fn_count) * 100 if (len(fire_preds) + fn_count) > 0 else 0
-    f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-    
-    # Calculate rates with zero-division protection
-    fp_rate = fp_count / total * 100 if total > 0 else 0
-    fn_rate = fn_count / total * 100 if total > 0 else 0
-    
-    stats_text = f"""MODEL PERFORMANCE METRICS
-
-Overall Accuracy: {accuracy:.1f}%
-Fire Detection (Precision): {precision:.1f}%
-Fire Recall: {recall:.1f}%
-F1-Score: {f1:.1f}%
-
-Detailed Breakdown:
-  True Positives (Fire): {len(fire_preds)}
-  True Negatives (No Fire): {len(nofire_preds)}
-  False Positives: {fp_count}
-  False Negatives: {fn_count}
-
-False Positive Rate: {fp_rate:.1f}%
-False Negative Rate: {fn_rate:.1f}%
-    """
-    
-    ax4.text(0.1, 0.9, stats_text, transform=ax4.transAxes, fontsize=10,
-            verticalalignment='top', fontfamily='monospace',
-            bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.8))
-    
-    plt.tight_layout()
-    
-    # Save the plot to the appropriate folder
-    if report_folder:
-        plot_filename = f'prediction_analysis_{test_type.lower().replace(" ", "_")}.png'
-        plot_path = os.path.join(report_folder, "charts", plot_filename)
-    else:
-        plot_filename = f'prediction_analysis_{test_type.lower().replace(" ", "_")}.png'
-        plot_path = plot_filename
-        
-    plt.savefig(plot_path, dpi=150, bbox_inches='tight')
-    print(f"\n📊 Visualization saved as: {plot_path}")
-    
-    # Try to show the plot
-    try:
-        plt.show(block=False)
-        print(f"🎨 Visual analysis displayed! Check the plot window.")
-    except Exception as e:
-        print(f"⚠️  Could not display plot automatically: {e}")
-        print(f"📁 Please open the file manually: {plot_path}")
-    
-    # Also try to open the file with the default image viewer
-    try:
-        import subprocess
-        import platform
-        
-        if platform.system() == "Windows":
-            subprocess.run(["start", plot_path], shell=True, check=False)
-            print(f"🖼️  Attempting to open with default image viewer...")
-        elif platform.system() == "Darwin":  # macOS
-            subprocess.run(["open", plot_path], check=False)
-        elif platform.system() == "Linux":
-            subprocess.run(["xdg-open", plot_path], check=False)
-    except Exception as e:
-        print(f"📁 Please open the file manually: {plot_path}")
-    
-    plt.close()  # Close the figure to free memory
-    
-    return plot_path
-
-def test_only_nofire_images():
+def test_only_nofire_images(model=None, test_path=None, report=True):
     """Test specifically with NO FIRE images to analyze false positive rate"""
     print("\n🧪 NO-FIRE SPECIFIC TEST - Analyzing false positive rate...")
     
+    test_path, test_files = _test_images(test_path)
     if not os.path.exists(test_path):
         print("❌ Test dataset not found!")
         return []
+    if model is None:
+        model = get_model()
     
     # Get only nofire files
-    test_files = [f for f in os.listdir(test_path) if f.endswith('.jpg')]
     nofire_files = [f for f in test_files if f.startswith('nofire_')]
     
     if len(nofire_files) == 0:
@@ -683,15 +509,8 @@ def test_only_nofire_images():
         img_path = os.path.join(test_path, filename)
         
         try:
-            # Load and preprocess image
-            img = Image.open(img_path).convert("RGB")
-            img_resized = img.resize((224, 224))
-            
-            img_array = image.img_to_array(img_resized) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
-            
             # Make prediction
-            preds = model.predict(img_array, verbose=0)[0]
+            preds = model.predict(load_image_batch(img_path), verbose=0)[0]
             fire_prob = preds[0]
             nofire_prob = preds[1]
             
@@ -770,24 +589,27 @@ def test_only_nofire_images():
     else:
         print("   ❌ NEEDS IMPROVEMENT - High false positive rate")
     
-    # Create visual summary
-    print(f"\n🎨 Generating visual analysis...")
-    report_folder = visualize_predictions(results, "NO-FIRE Specific Test")
+    # Export results for the report
+    if report:
+        print(f"\n🎨 Generating visual analysis...")
+        visualize_predictions(results, "NO-FIRE Specific Test", image_dir=test_path)
     
     return results
 
-def test_with_full_test_dataset():
+def test_with_full_test_dataset(model=None, test_path=None, report=True):
     """Test the model with all 380 test images from the dataset"""
     
     print(f"\n🧪 COMPREHENSIVE TEST - Using all test images...")
     
     try:
+        test_path, test_files = _test_images(test_path)
         if not os.path.exists(test_path):
             print("❌ Test path not found!")
             return []
+        if model is None:
+            model = get_model()
             
         # Get all test images
-        test_files = [f for f in os.listdir(test_path) if f.endswith('.jpg')]
         print(f"Found {len(test_files)} test images")
         
         # Analyze filename patterns to determine ground truth
@@ -819,14 +641,8 @@ def test_with_full_test_dataset():
         for i, filename in enumerate(fire_test_files):
             img_path = os.path.join(test_path, filename)
             
-            # Load and preprocess image
-            img = Image.open(img_path).convert("RGB")
-            img_resized = img.resize((224, 224))
-            img_array = image.img_to_array(img_resized) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
-            
             # Make prediction
-            preds = model.predict(img_array, verbose=0)[0]
+            preds = model.predict(load_image_batch(img_path), verbose=0)[0]
             fire_prob = preds[0]
             nofire_prob = preds[1]
             predicted_fire = fire_prob > 0.5  # True if fire predicted
@@ -849,14 +665,8 @@ def test_with_full_test_dataset():
         for i, filename in enumerate(nofire_test_files):
             img_path = os.path.join(test_path, filename)
             
-            # Load and preprocess image
-            img = Image.open(img_path).convert("RGB")
-            img_resized = img.resize((224, 224))
-            img_array = image.img_to_array(img_resized) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
-            
             # Make prediction
-            preds = model.predict(img_array, verbose=0)[0]
+            preds = model.predict(load_image_batch(img_path), verbose=0)[0]
             fire_prob = preds[0]
             nofire_prob = preds[1]
             predicted_fire = fire_prob > 0.5  # True if fire predicted
@@ -937,9 +747,10 @@ def test_with_full_test_dataset():
         else:
             print("   ❌ POOR - Needs significant improvement")
         
-        # Create visual summary
-        print(f"\n🎨 Generating comprehensive visual analysis...")
-        report_folder = visualize_predictions(results, "Comprehensive Test")
+        # Export results for the report
+        if report:
+            print(f"\n🎨 Generating comprehensive visual analysis...")
+            visualize_predictions(results, "Comprehensive Test", image_dir=test_path)
             
         return results
         
@@ -947,15 +758,22 @@ def test_with_full_test_dataset():
         print(f"❌ Error in comprehensive testing: {e}")
         return []
 
-def test_with_dataset_images(num_samples=3):
+def test_with_dataset_images(num_samples=3, model=None, train_fire_path=None, train_nofire_path=None, show=True):
     """Test the model with random images from the training dataset (quick test)"""
     
     print(f"\n🧪 QUICK TEST - Using {num_samples} random images from training set...")
     
     try:
+        if model is None:
+            model = get_model()
+        if train_fire_path is None or train_nofire_path is None:
+            dataset = get_dataset()
+            train_fire_path = train_fire_path or dataset.train_fire_path
+            train_nofire_path = train_nofire_path or dataset.train_nofire_path
+
         # Get random images
-        fire_files = [f for f in os.listdir(train_fire_path) if f.endswith('.jpg')][:num_samples]
-        nofire_files = [f for f in os.listdir(train_nofire_path) if f.endswith('.jpg')][:num_samples]
+        fire_files = list_images(train_fire_path)[:num_samples]
+        nofire_files = list_images(train_nofire_path)[:num_samples]
         
         results = []
         
@@ -963,7 +781,7 @@ def test_with_dataset_images(num_samples=3):
         print("\n🔥 Testing FIRE images:")
         for filename in fire_files:
             img_path = os.path.join(train_fire_path, filename)
-            label, confidence = predict_fire_from_file(img_path)
+            label, confidence = predict_fire_from_file(img_path, model, show)
             if label:
                 results.append(("Fire", label, confidence))
         
@@ -971,7 +789,7 @@ def test_with_dataset_images(num_samples=3):
         print("\n🌲 Testing NO FIRE images:")
         for filename in nofire_files:
             img_path = os.path.join(train_nofire_path, filename)
-            label, confidence = predict_fire_from_file(img_path)
+            label, confidence = predict_fire_from_file(img_path, model, show)
             if label:
                 results.append(("No Fire", label, confidence))
         
@@ -990,8 +808,23 @@ def test_with_dataset_images(num_samples=3):
         print(f"❌ Error testing with dataset: {e}")
         return []
 
-# Main execution
-if __name__ == "__main__":
+def main():
+    """Interactive test menu"""
+    print("🔥 Fire Detection with Trained MobileNetV2")
+    print("=" * 50)
+
+    try:
+        model = get_model()
+    except FileNotFoundError:
+        print("❌ Trained model not found!")
+        print(f"Please run 'poetry run python quick_train.py' first to train a model.")
+        print(f"Looking for: {LOCAL_MODEL_PATH}")
+        exit(1)
+    print("✅ Trained model loaded successfully!")
+    print(f"Model input shape: {model.input_shape}")
+    print(f"Model output shape: {model.output_shape}")
+    describe_dataset(get_dataset())
+
     print("\n" + "="*60)
     print("🔥 FIRE DETECTION MODEL TEST")
     print(f"Using locally trained MobileNetV2 model")
@@ -1070,19 +903,10 @@ if __name__ == "__main__":
     print("\n✅ Fire detection testing complete!")
     print("Your trained model performance has been thoroughly evaluated!")
     
-    # Ask if user wants to see detailed analysis
-    if test_results and choice in ["2", "3", "4"]:
-        try:
-            show_details = input("\n🎨 Do you want to see detailed visual analysis? (y/n): ").strip().lower()
-            if show_details in ['y', 'yes', '1', 'true']:
-                print("\n📊 Opening detailed analysis...")
-                # Visualization is already called within the test functions
-            else:
-                print("📋 Skipping detailed visualization.")
-        except KeyboardInterrupt:
-            print("\n👋 Exiting...")
-        except Exception:
-            print("📋 Skipping detailed visualization.")
+    # Render the dashboards and image grids of every report collected above
+    if collected_reports:
+        render_reports(collected_reports)
+        print(f"📁 Reports: {', '.join(collected_reports)}")
     
     # Final summary for comprehensive test
     if choice in ["2", "4"] and test_results:
@@ -1100,4 +924,7 @@ if __name__ == "__main__":
             if correct/total_tested >= 0.8:
                 print("🌟 Your model is performing excellently!")
             else:
-                print("⚠️  Consider additional training to improve accuracy.")
\ No newline at end of file
+                print("⚠️  Consider additional training to improve accuracy.")
+
+if __name__ == "__main__":
+    main()
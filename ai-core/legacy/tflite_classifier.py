@@ -0,0 +1,208 @@
+"""
+📱 TFLite Fire Classifier
+Exports the legacy MobileNetV2 to TFLite (float16 / dynamic-range int8) and runs it with XNNPACK
+"""
+
+import os
+import time
+import numpy as np
+
+import test_model
+from test_model import LOCAL_MODEL_PATH
+
+TFLITE_DIR = "models/tflite"
+VARIANTS = ("float16", "int8")
+
+
+def tflite_path(variant, output_dir=TFLITE_DIR, model_path=LOCAL_MODEL_PATH):
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(output_dir, f"{name}_{variant}.tflite")
+
+
+def export_tflite(model_path=LOCAL_MODEL_PATH, output_dir=TFLITE_DIR, variants=VARIANTS):
+    """
+    Convert the Keras model, returns {variant: path}
+    float16: weights stored as float16, computed in float32 (half the size, ~same accuracy)
+    int8: dynamic-range quantization, int8 weights with activations quantized on the fly (1/4 the size)
+    """
+    import tensorflow as tf
+
+    model = test_model.get_model(model_path)
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for variant in variants:
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if variant == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+        elif variant != "int8":
+            raise ValueError(f"Unknown TFLite variant: {variant} (expected one of {VARIANTS})")
+        path = tflite_path(variant, output_dir, model_path)
+        with open(path, 'wb') as f:
+            f.write(converter.convert())
+        paths[variant] = path
+        print(f"📦 {variant}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return paths
+
+
+def _interpreter_module():
+    """tflite_runtime when installed (no full TensorFlow needed), tf.lite otherwise"""
+    try:
+        from tflite_runtime import interpreter
+        return interpreter.Interpreter, interpreter.OpResolverType
+    except ImportError:
+        import tensorflow as tf
+        return tf.lite.Interpreter, tf.lite.experimental.OpResolverType
+
+
+class TFLiteFireClassifier:
+    """
+    TFLite interpreter behind the Keras predict() interface used by test_model.py
+
+    XNNPACK is TFLite's default CPU delegate: it is applied when the interpreter is
+    built with the builtin op resolver and uses num_threads; xnnpack=False builds the
+    interpreter without default delegates (reference kernels) for comparison.
+    Being a drop-in for the Keras model, it can be injected into every test_model
+    evaluation function (model=...).
+    """
+
+    def __init__(self, model_path, threads=None, xnnpack=True):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"TFLite model not found: {model_path} (run: python tflite_classifier.py export)")
+        Interpreter, OpResolverType = _interpreter_module()
+        resolver = OpResolverType.AUTO if xnnpack else OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        self.model_path = model_path
+        self.threads = threads or os.cpu_count()
+        self.interpreter = Interpreter(model_path=model_path, num_threads=self.threads,
+                                       experimental_op_resolver_type=resolver)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self.input['shape'])
+        self.output_shape = tuple(self.output['shape'])
+
+    def predict(self, batch, verbose=0):
+        """(N, 224, 224, 3) float batch in [0, 1] -> (N, 2) [fire, no fire] probabilities"""
+        outputs = []
+        for x in np.asarray(batch, dtype=np.float32):
+            scale, zero_point = self.input['quantization']
+            if self.input['dtype'] != np.float32:  # fully quantized input (not produced by export_tflite)
+                x = np.round(x / scale + zero_point)
+            self.interpreter.set_tensor(self.input['index'], x[None].astype(self.input['dtype']))
+            self.interpreter.invoke()
+            y = self.interpreter.get_tensor(self.output['index'])[0]
+            scale, zero_point = self.output['quantization']
+            if self.output['dtype'] != np.float32:
+                y = (y.astype(np.float32) - zero_point) * scale
+            outputs.append(y)
+        return np.stack(outputs)
+
+    def predict_fire_from_file(self, img_path, show=True):
+        """Same as test_model.predict_fire_from_file: (label, confidence), (None, None) on error"""
+        return test_model.predict_fire_from_file(img_path, self, show)
+
+
+def _test_set(limit=None, test_path=None):
+    """(paths, is_fire) of the Forest Fire test set, fire and no-fire interleaved so a limit keeps both"""
+    if test_path is None:
+        dataset = test_model.get_dataset()
+        test_path, files = dataset.test_path, dataset.test_files
+    else:
+        files = test_model.list_images(test_path)
+    fire = [f for f in files if f.startswith('fire_')]
+    nofire = [f for f in files if f.startswith('nofire_')]
+    ordered = [f for pair in zip(fire, nofire) for f in pair] + fire[len(nofire):] + nofire[len(fire):]
+    ordered = ordered[:limit] if limit else ordered
+    return [os.path.join(test_path, f) for f in ordered], np.array([f.startswith('fire_') for f in ordered])
+
+
+def parity_check(reference, candidates, batches, is_fire):
+    """Fire probability drift and label agreement of each candidate against the reference (Keras) model"""
+    reference_probs = np.concatenate([reference.predict(x, verbose=0)[:, 0] for x in batches])
+    report = {'reference': {'accuracy': float(np.mean((reference_probs > 0.5) == is_fire))}}
+    for name, candidate in candidates.items():
+        probs = np.concatenate([candidate.predict(x, verbose=0)[:, 0] for x in batches])
+        diff = np.abs(probs - reference_probs)
+        report[name] = {
+            'max_abs_diff': float(diff.max()),
+            'mean_abs_diff': float(diff.mean()),
+            'label_agreement': float(np.mean((probs > 0.5) == (reference_probs > 0.5))),
+            'accuracy': float(np.mean((probs > 0.5) == is_fire)),
+        }
+    return report
+
+
+def latency_comparison(models, batches, warmup=5):
+    """Single-image predict() latency in ms (preprocessing excluded) for each model"""
+    report = {}
+    for name, model in models.items():
+        for x in batches[:warmup]:
+            model.predict(x, verbose=0)
+        times = []
+        for x in batches:
+            start = time.perf_counter()
+            model.predict(x, verbose=0)
+            times.append((time.perf_counter() - start) * 1000)
+        report[name] = {
+            'mean_ms': round(float(np.mean(times)), 2),
+            'p50_ms': round(float(np.percentile(times, 50)), 2),
+            'p95_ms': round(float(np.percentile(times, 95)), 2),
+        }
+    keras_mean = report.get('keras', {}).get('mean_ms')
+    if keras_mean:
+        for stats in report.values():
+            stats['speedup_vs_keras'] = round(keras_mean / max(stats['mean_ms'], 0.01), 2)
+    return report
+
+
+def compare(variants=VARIANTS, threads=None, limit=None, test_path=None, output_dir=TFLITE_DIR):
+    """Parity and latency of the exported TFLite variants against Keras on the Forest Fire test set"""
+    paths, is_fire = _test_set(limit, test_path)
+    if not paths:
+        raise FileNotFoundError("No Forest Fire test images found")
+    print(f"🧪 Comparing on {len(paths)} test images ({threads or os.cpu_count()} threads)")
+    batches = [test_model.load_image_batch(path) for path in paths]
+
+    keras_model = test_model.get_model()
+    candidates = {}
+    for variant in variants:
+        candidates[f"tflite_{variant}"] = TFLiteFireClassifier(tflite_path(variant, output_dir), threads)
+    # Same graph without the XNNPACK delegate, to show what the delegate adds
+    candidates[f"tflite_{variants[0]}_no_xnnpack"] = TFLiteFireClassifier(
+        tflite_path(variants[0], output_dir), threads, xnnpack=False)
+
+    return {
+        'images': len(paths),
+        'threads': threads or os.cpu_count(),
+        'parity': parity_check(keras_model, candidates, batches, is_fire),
+        'latency': latency_comparison(dict(keras=keras_model, **candidates), batches),
+    }
+
+
+def main():
+    """python tflite_classifier.py export | compare [--threads N] [--limit N] | predict <image> --variant int8"""
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description='TFLite export and runtime for the legacy fire classifier')
+    parser.add_argument('command', choices=('export', 'compare', 'predict'))
+    parser.add_argument('image', nargs='?', help='image for predict')
+    parser.add_argument('--variant', choices=VARIANTS, default='float16', help='model used by predict')
+    parser.add_argument('--threads', type=int, default=None, help='interpreter threads (default: CPU count)')
+    parser.add_argument('--limit', type=int, default=None, help='compare on the first N test images')
+    parser.add_argument('--test-path', default=None, help='test images folder (default: Forest Fire dataset)')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_tflite()
+    elif args.command == 'compare':
+        print(json.dumps(compare(threads=args.threads, limit=args.limit, test_path=args.test_path), indent=2))
+    else:
+        if not args.image:
+            parser.error("predict needs an image")
+        classifier = TFLiteFireClassifier(tflite_path(args.variant), args.threads)
+        classifier.predict_fire_from_file(args.image, show=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,8 @@ def check_dataset_status():
     
     if dataset_zip.exists() and not dataset_extracted.exists():
         print("\n💡 Dataset ZIP encontrado mas não extraído!")
-        print("Execute:")
+        print("   Avaliação e inferência em lote já leem direto do ZIP (src/zip_dataset.py)")
+        print("   Para treinar, extraia o dataset:")
         if os.name == 'nt':  # Windows
             print("   cd datasets")
             print("   Expand-Archive -Path 'wildfire.v10-origin.yolov8.zip' -DestinationPath '.'")
@@ -76,8 +77,27 @@ def run_command_safely(command, description):
         input("Press Enter to continue...")
         return False
 
+def run_cli(argv):
+    """Non-interactive subcommands, returns the exit code"""
+    import argparse
+    sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
+    from detect_cli import add_arguments, run_detect
+    
+    parser = argparse.ArgumentParser(description="Fire Detection AI - YOLOv8")
+    sub = parser.add_subparsers(dest="command", required=True)
+    detect = sub.add_parser("detect", help="Detect fire in images/videos (files, folders, globs), NDJSON output")
+    add_arguments(detect)
+    args = parser.parse_args(argv)
+    
+    if args.command == "detect":
+        return run_detect(args)
+    return 2
+
 def main():
-    """Main entry point with menu"""
+    """Main entry point: subcommands when arguments are given (see --help), menu otherwise"""
+    
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     
     print("🔥 Fire Detection AI - YOLOv8")
     print("=" * 40)
@@ -0,0 +1,67 @@
+"""
+⏱️ Latency-Budgeted Input Resolution
+Online per-resolution latency model used to pick the largest input size that fits a budget
+"""
+
+import threading
+
+DEFAULT_INPUT_SIZES = (320, 480, 640, 960)
+
+
+class LatencyModel:
+    """
+    Exponentially weighted latency estimate per input size
+
+    Each size keeps an EWMA of its latency and of the absolute deviation, and is
+    budgeted at mean + safety * deviation. Sizes without measurements of their own
+    are extrapolated from the nearest measured size (latency ~ pixel count).
+    """
+
+    def __init__(self, sizes=DEFAULT_INPUT_SIZES, default_size=640, alpha=0.2, safety=2.0):
+        self.sizes = tuple(sorted(sizes))
+        self.default_size = default_size
+        self.alpha = alpha
+        self.safety = safety
+        self.stats = {}  # size -> {'mean': ms, 'dev': ms, 'count': n}
+        self._lock = threading.Lock()
+
+    def record(self, size, latency_ms):
+        """Fold a measured latency for one call at `size` into the model"""
+        with self._lock:
+            stat = self.stats.get(size)
+            if stat is None:
+                self.stats[size] = {'mean': latency_ms, 'dev': latency_ms * 0.1, 'count': 1}
+                return
+            error = latency_ms - stat['mean']
+            stat['mean'] += self.alpha * error
+            stat['dev'] += self.alpha * (abs(error) - stat['dev'])
+            stat['count'] += 1
+
+    def estimate(self, size):
+        """Budgeted latency (ms) for `size`, None before any measurement"""
+        with self._lock:
+            if not self.stats:
+                return None
+            stat = self.stats.get(size)
+            if stat is not None:
+                return stat['mean'] + self.safety * stat['dev']
+            nearest = min(self.stats, key=lambda s: abs(s - size))
+            stat = self.stats[nearest]
+            scale = (size / nearest) ** 2
+            return (stat['mean'] + self.safety * stat['dev']) * scale
+
+    def choose(self, budget_ms):
+        """
+        Largest input size whose estimate fits the budget
+        No budget -> default size; nothing fits -> smallest size
+        """
+        if budget_ms is None or not self.stats:
+            return self.default_size
+        fitting = [s for s in self.sizes if self.estimate(s) <= budget_ms]
+        return fitting[-1] if fitting else self.sizes[0]
+
+    def snapshot(self):
+        """Current per-size estimates, for logging/reports"""
+        return {size: {'estimate_ms': round(self.estimate(size), 2) if self.stats else None,
+                       'measured': self.stats.get(size, {}).get('count', 0)}
+                for size in self.sizes}
@@ -0,0 +1,196 @@
+"""
+⚙️ Batch Size Auto-Tuning
+Short timed training trials to pick the fastest batch size that fits in memory
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from copy import deepcopy
+from datetime import datetime
+import torch
+from ultralytics import YOLO
+from ultralytics.cfg import get_cfg
+from ultralytics.data import build_dataloader, build_yolo_dataset
+from ultralytics.data.utils import check_det_dataset
+from ultralytics.utils import DEFAULT_CFG
+
+DEFAULT_BATCH_SIZES = (4, 8, 16, 32)
+AUTOTUNE_FILENAME = 'autotune.json'
+# Ultralytics forces workers=0 when training on CPU/MPS, so batches are loaded in the
+# main process: the trials do the same, any other worker count would not be used
+CPU_TRAINING_WORKERS = 0
+
+
+class PeakMemorySampler:
+    """Background sampler of the RSS of this process plus its dataloader workers"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        # Imported here: psutil is only needed while auto-tuning, not to run detection
+        import psutil
+        self._process = psutil.Process()
+        self._psutil_error = psutil.Error
+
+    def _sample(self):
+        total = self._process.memory_info().rss
+        for child in self._process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except self._psutil_error:
+                pass
+        self.peak_bytes = max(self.peak_bytes, total)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _run_trial(model, dataset, batch_size, workers, warmup_batches, trial_batches):
+    """Time forward + loss + backward + step on real training batches, returns images/sec"""
+    loader = build_dataloader(dataset, batch_size, workers, shuffle=True, rank=-1)
+    optimizer = torch.optim.SGD(model.parameters(), lr=1e-4, momentum=0.9)
+    model.train()
+
+    images = 0
+    start = None
+    batches = iter(loader)
+    try:
+        for i in range(warmup_batches + trial_batches):
+            if i == warmup_batches:
+                start = time.perf_counter()
+                images = 0
+            try:
+                batch = next(batches)
+            except StopIteration:
+                batches = iter(loader)
+                batch = next(batches)
+            batch['img'] = batch['img'].float() / 255
+            loss, _ = model.loss(batch)
+            loss.sum().backward()
+            optimizer.step()
+            optimizer.zero_grad(set_to_none=True)
+            images += batch['img'].shape[0]
+        elapsed = time.perf_counter() - start
+    finally:
+        # Shut down the worker processes before the next trial
+        workers_iterator = getattr(loader, 'iterator', None)
+        if hasattr(workers_iterator, '_shutdown_workers'):
+            workers_iterator._shutdown_workers()
+
+    return images / elapsed if elapsed > 0 else 0.0
+
+
+def autotune_training(data_yaml, weights='yolov8n.pt', img_size=640, batch_sizes=DEFAULT_BATCH_SIZES,
+                      warmup_batches=2, trial_batches=6, memory_limit_gb=None):
+    """
+    Search over batch sizes on CPU, loading batches in the main process like CPU training does
+
+    Trials above the memory ceiling (default: 80% of the RAM available now)
+    are rejected, and larger batch sizes are skipped once one goes over it.
+    Returns a dict with the chosen configuration (workers is always 0) and every trial measurement.
+    """
+    workers = CPU_TRAINING_WORKERS
+    if memory_limit_gb is None:
+        import psutil
+        memory_limit_bytes = int(psutil.virtual_memory().available * 0.8)
+    else:
+        memory_limit_bytes = int(memory_limit_gb * 1024 ** 3)
+
+    print(f"\n⚙️  Auto-tuning batch size")
+    print(f"   Batch sizes: {list(batch_sizes)} | Workers: {workers} (CPU training loads batches in the main process)")
+    print(f"   Memory ceiling: {memory_limit_bytes / 1024 ** 3:.1f} GB | CPUs: {os.cpu_count()}")
+
+    cfg = get_cfg(DEFAULT_CFG, {'data': data_yaml, 'imgsz': img_size, 'cache': False})
+    data = check_det_dataset(data_yaml)
+    base_model = YOLO(weights).model
+    stride = max(int(base_model.stride.max()), 32)
+    dataset = build_yolo_dataset(cfg, data['train'], max(batch_sizes), data, mode='train', stride=stride)
+
+    trials = []
+    for batch_size in sorted(batch_sizes):
+        model = deepcopy(base_model).float()
+        model.args = cfg
+        for p in model.parameters():
+            p.requires_grad = True
+
+        trial = {'batch_size': batch_size, 'workers': workers}
+        try:
+            with PeakMemorySampler() as sampler:
+                trial['images_per_sec'] = round(_run_trial(model, dataset, batch_size, workers,
+                                                           warmup_batches, trial_batches), 2)
+            trial['peak_memory_gb'] = round(sampler.peak_bytes / 1024 ** 3, 2)
+            trial['status'] = 'ok' if sampler.peak_bytes <= memory_limit_bytes else 'over_memory'
+        except (RuntimeError, MemoryError) as e:
+            trial['status'] = 'failed'
+            trial['error'] = str(e).splitlines()[0]
+        finally:
+            del model
+
+        trials.append(trial)
+        print(f"   batch={batch_size:<3} -> "
+              f"{trial.get('images_per_sec', 0):7.2f} img/s | "
+              f"{trial.get('peak_memory_gb', 0):5.2f} GB | {trial['status']}")
+
+        # Larger batches will not fit either
+        if trial['status'] != 'ok':
+            print(f"   ⏹️  Stopping at batch {batch_size}: memory ceiling reached")
+            break
+
+    valid = [t for t in trials if t['status'] == 'ok']
+    if not valid:
+        raise RuntimeError("Auto-tune found no configuration within the memory ceiling")
+
+    best = max(valid, key=lambda t: t['images_per_sec'])
+    print(f"✅ Auto-tune choice: batch={best['batch_size']} "
+          f"({best['images_per_sec']:.2f} img/s)")
+
+    return {
+        'chosen': best,
+        'trials': trials,
+        'memory_limit_gb': round(memory_limit_bytes / 1024 ** 3, 2),
+        'cpu_count': os.cpu_count(),
+        'img_size': img_size,
+        'weights': str(weights),
+        'timestamp': datetime.now().isoformat(),
+    }
+
+
+def save_autotune_result(result, run_dir):
+    """Write the auto-tune choice and measurements to <run_dir>/autotune.json"""
+    os.makedirs(run_dir, exist_ok=True)
+    path = os.path.join(run_dir, AUTOTUNE_FILENAME)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"📄 Auto-tune result saved to: {path}")
+    return path
+
+
+def main():
+    """Run the auto-tune alone and print the chosen configuration"""
+    data_yaml = sys.argv[1] if len(sys.argv) > 1 else "datasets/wildfire/data.yaml"
+    if not os.path.exists(data_yaml):
+        print(f"❌ Dataset config not found: {data_yaml}")
+        sys.exit(1)
+
+    result = autotune_training(data_yaml)
+    save_autotune_result(result, os.path.join("runs", "autotune"))
+
+
+if __name__ == "__main__":
+    main()
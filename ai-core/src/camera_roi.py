@@ -0,0 +1,154 @@
+"""
+🎯 Per-Camera Region of Interest
+Crops frames to the camera's ROI before inference and drops boxes in excluded zones
+"""
+
+import os
+import sys
+import json
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+MIN_ROI_OVERLAP = 0.5        # keep boxes at least this much inside the ROI polygon
+MAX_EXCLUSION_OVERLAP = 0.5  # drop boxes at least this much inside exclusion zones
+CROP_PADDING = 0.02          # fraction of the frame added around the ROI bounding rect
+
+
+class CameraROI:
+    """
+    ROI polygon + exclusion polygons of a fixed camera (cameras.roi_config)
+
+    Polygons are lists of [x, y] points, normalized to 0-1 by default so one
+    config works for every stream resolution. Masks, integral images and the
+    crop rectangle are built once per resolution; per frame the crop is a
+    numpy view and each box check is four integral-image lookups.
+    """
+
+    def __init__(self, roi=None, exclusions=(), normalized=True):
+        self.roi = roi
+        self.exclusions = list(exclusions or ())
+        self.normalized = normalized
+        self._prepared = {}  # (width, height) -> (crop rect, roi integral, exclusion integral)
+
+    @classmethod
+    def from_config(cls, roi_config):
+        """Build from the cameras.roi_config JSON ({"roi": [...], "exclusions": [[...]], "normalized": true})"""
+        if not roi_config:
+            return None
+        if isinstance(roi_config, str):
+            roi_config = json.loads(roi_config)
+        return cls(roi_config.get('roi'), roi_config.get('exclusions', ()), roi_config.get('normalized', True))
+
+    def _pixels(self, polygon, width, height):
+        points = np.asarray(polygon, dtype=np.float64)
+        if self.normalized:
+            points = points * [width, height]
+        return np.round(points).astype(np.int32)
+
+    def _prepare(self, width, height):
+        key = (width, height)
+        prepared = self._prepared.get(key)
+        if prepared is not None:
+            return prepared
+
+        roi_integral = None
+        crop = (0, 0, width, height)
+        if self.roi:
+            points = self._pixels(self.roi, width, height)
+            mask = np.zeros((height, width), dtype=np.uint8)
+            cv2.fillPoly(mask, [points], 1)
+            roi_integral = cv2.integral(mask)
+            x, y, w, h = cv2.boundingRect(points)
+            pad_x, pad_y = int(width * CROP_PADDING), int(height * CROP_PADDING)
+            crop = (max(0, x - pad_x), max(0, y - pad_y), min(width, x + w + pad_x), min(height, y + h + pad_y))
+
+        exclusion_integral = None
+        if self.exclusions:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            cv2.fillPoly(mask, [self._pixels(p, width, height) for p in self.exclusions], 1)
+            exclusion_integral = cv2.integral(mask)
+
+        prepared = (crop, roi_integral, exclusion_integral)
+        self._prepared[key] = prepared
+        return prepared
+
+    def crop(self, frame):
+        """(view of the frame cropped to the ROI bounding rect, (x, y) offset of the crop)"""
+        height, width = frame.shape[:2]
+        (x1, y1, x2, y2), _, _ = self._prepare(width, height)
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    @staticmethod
+    def _coverage(integral, box):
+        x1, y1, x2, y2 = box
+        area = (x2 - x1) * (y2 - y1)
+        if area <= 0:
+            return 0.0
+        inside = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+        return inside / area
+
+    def map_back(self, detections, offset):
+        """Shift detections found on the crop back to full-frame coordinates"""
+        dx, dy = offset
+        if not dx and not dy:
+            return detections
+        for det in detections:
+            x1, y1, x2, y2 = det['bbox']
+            det['bbox'] = [x1 + dx, y1 + dy, x2 + dx, y2 + dy]
+            det['center'] = [det['center'][0] + dx, det['center'][1] + dy]
+        return detections
+
+    def filter(self, detections, frame_shape):
+        """Drop full-frame detections outside the ROI polygon or inside exclusion zones"""
+        height, width = frame_shape[:2]
+        _, roi_integral, exclusion_integral = self._prepare(width, height)
+        kept = []
+        for det in detections:
+            x1, y1, x2, y2 = det['bbox']
+            box = (min(max(x1, 0), width), min(max(y1, 0), height), min(max(x2, 0), width), min(max(y2, 0), height))
+            if roi_integral is not None and self._coverage(roi_integral, box) < MIN_ROI_OVERLAP:
+                continue
+            if exclusion_integral is not None and self._coverage(exclusion_integral, box) >= MAX_EXCLUSION_OVERLAP:
+                continue
+            kept.append(det)
+        return kept
+
+
+class ROIRegistry:
+    """camera_id -> CameraROI, from an export of cameras.roi_config (JSON file or database rows)"""
+
+    def __init__(self, configs=None):
+        self.rois = {}
+        for camera_id, roi_config in (configs or {}).items():
+            roi = CameraROI.from_config(roi_config)
+            if roi is not None:
+                self.rois[str(camera_id)] = roi
+
+    @classmethod
+    def from_file(cls, path=config.CAMERA_ROI_PATH):
+        """{camera_id: roi_config} JSON file; empty registry if the file does not exist"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_database(cls, dsn):
+        """Read roi_config straight from the cameras table (needs psycopg2)"""
+        try:
+            import psycopg2
+        except ImportError:
+            print("⚠️  psycopg2 not installed, use ROIRegistry.from_file() with an exported JSON")
+            return cls()
+        with psycopg2.connect(dsn) as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT id, roi_config FROM cameras WHERE roi_config IS NOT NULL")
+            return cls({camera_id: roi_config for camera_id, roi_config in cursor.fetchall()})
+
+    def get(self, camera_id):
+        """CameraROI of a camera, None when it has no ROI configured"""
+        if camera_id is None:
+            return None
+        return self.rois.get(str(camera_id))
@@ -0,0 +1,470 @@
+"""
+🗂️ Indexed Label Manifest for the YOLOv8 Wildfire Dataset
+Parses every YOLO label file once into a compact columnar index
+"""
+
+import os
+import sys
+import numpy as np
+import yaml
+
+SPLITS = ('train', 'valid', 'test')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+MANIFEST_FILENAME = '.label_manifest.npz'
+MANIFEST_VERSION = 1
+
+
+def parse_label_lines(lines):
+    """
+    Parse YOLO label rows into (classes, boxes, invalid_lines)
+    Polygon (segmentation) rows are converted to their bounding box
+    """
+    classes = []
+    boxes = []
+    invalid = 0
+
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        try:
+            values = [float(p) for p in parts]
+        except ValueError:
+            invalid += 1
+            continue
+
+        coords = values[1:]
+        if len(coords) == 4:
+            x, y, w, h = coords
+        elif len(coords) >= 6 and len(coords) % 2 == 0:
+            xs, ys = coords[0::2], coords[1::2]
+            x1, x2, y1, y2 = min(xs), max(xs), min(ys), max(ys)
+            x, y, w, h = (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1
+        else:
+            invalid += 1
+            continue
+
+        classes.append(int(values[0]))
+        boxes.append((x, y, w, h))
+
+    return (np.array(classes, dtype=np.int16),
+            np.array(boxes, dtype=np.float32).reshape(-1, 4),
+            invalid)
+
+
+def parse_label_file(label_path):
+    """Parse a YOLO label file from disk"""
+    with open(label_path, 'r') as f:
+        return parse_label_lines(f)
+
+
+class DatasetManifest:
+    """
+    Columnar index of a YOLO dataset (one row per file, one row per box)
+
+    File columns: split, stem, image extension, label mtime/size, box offsets
+    Box columns: file index, class id, normalized (x, y, w, h)
+
+    With a ZipDataset source the label CRC-32 takes the place of the mtime
+    and image paths are archive-relative ('test/images/x.jpg').
+    """
+
+    def __init__(self, dataset_path="datasets/wildfire", manifest_path=None, zip_dataset=None):
+        self.zip_dataset = zip_dataset
+        if zip_dataset is not None:
+            self.dataset_path = zip_dataset.zip_path
+            default_manifest = os.path.splitext(zip_dataset.zip_path)[0] + MANIFEST_FILENAME
+        else:
+            self.dataset_path = str(dataset_path)
+            default_manifest = os.path.join(self.dataset_path, MANIFEST_FILENAME)
+        self.manifest_path = manifest_path or default_manifest
+        self.class_names = self._read_class_names()
+        self._reset()
+
+    def _reset(self):
+        self.file_split = np.zeros(0, dtype=np.int8)
+        self.file_stem = np.zeros(0, dtype='<U1')
+        self.file_image_ext = np.zeros(0, dtype='<U1')
+        self.file_label_mtime = np.zeros(0, dtype=np.int64)
+        self.file_label_size = np.zeros(0, dtype=np.int64)
+        self.file_has_label = np.zeros(0, dtype=bool)
+        self.file_invalid_lines = np.zeros(0, dtype=np.int32)
+        self.file_box_start = np.zeros(0, dtype=np.int64)
+        self.file_box_count = np.zeros(0, dtype=np.int32)
+        self.box_file = np.zeros(0, dtype=np.int32)
+        self.box_class = np.zeros(0, dtype=np.int16)
+        self.box_xywh = np.zeros((0, 4), dtype=np.float32)
+
+    def _read_class_names(self):
+        if self.zip_dataset is not None:
+            names = self.zip_dataset.data_config().get('names', [])
+            return {int(k): v for k, v in names.items()} if isinstance(names, dict) else dict(enumerate(names))
+        yaml_path = os.path.join(self.dataset_path, 'data.yaml')
+        try:
+            with open(yaml_path, 'r') as f:
+                names = yaml.safe_load(f).get('names', [])
+        except (OSError, AttributeError, yaml.YAMLError):
+            return {}
+        if isinstance(names, dict):
+            return {int(k): v for k, v in names.items()}
+        return dict(enumerate(names))
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Load a previously saved manifest, returns False if missing or stale"""
+        if not os.path.exists(self.manifest_path):
+            return False
+        try:
+            with np.load(self.manifest_path, allow_pickle=False) as data:
+                if int(data['version']) != MANIFEST_VERSION:
+                    return False
+                self.file_split = data['file_split']
+                self.file_stem = data['file_stem']
+                self.file_image_ext = data['file_image_ext']
+                self.file_label_mtime = data['file_label_mtime']
+                self.file_label_size = data['file_label_size']
+                self.file_has_label = data['file_has_label']
+                self.file_invalid_lines = data['file_invalid_lines']
+                self.file_box_start = data['file_box_start']
+                self.file_box_count = data['file_box_count']
+                self.box_file = data['box_file']
+                self.box_class = data['box_class']
+                self.box_xywh = data['box_xywh']
+            return True
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️  Could not read manifest {self.manifest_path}: {e}")
+            self._reset()
+            return False
+
+    def save(self):
+        """Write the manifest atomically next to the dataset"""
+        tmp_path = self.manifest_path + '.tmp.npz'
+        np.savez(
+            tmp_path,
+            version=np.int32(MANIFEST_VERSION),
+            file_split=self.file_split,
+            file_stem=self.file_stem,
+            file_image_ext=self.file_image_ext,
+            file_label_mtime=self.file_label_mtime,
+            file_label_size=self.file_label_size,
+            file_has_label=self.file_has_label,
+            file_invalid_lines=self.file_invalid_lines,
+            file_box_start=self.file_box_start,
+            file_box_count=self.file_box_count,
+            box_file=self.box_file,
+            box_class=self.box_class,
+            box_xywh=self.box_xywh,
+        )
+        os.replace(tmp_path, self.manifest_path)
+
+    # ------------------------------------------------------------------
+    # Build / incremental refresh
+    # ------------------------------------------------------------------
+
+    def _scan_split(self, split):
+        """Return {stem: image_ext} and {stem: (mtime_ns, size)} for one split"""
+        images = {}
+        labels = {}
+
+        if self.zip_dataset is not None:
+            for name in self.zip_dataset.list_images(split):
+                stem, ext = os.path.splitext(name)
+                images[stem] = ext
+            for name in self.zip_dataset.list_labels(split):
+                entry = self.zip_dataset.entry(f"{split}/labels/{name}")
+                labels[name[:-4]] = (entry.crc, entry.size)
+            return images, labels
+
+        images_dir = os.path.join(self.dataset_path, split, 'images')
+        if os.path.isdir(images_dir):
+            with os.scandir(images_dir) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext.lower() in IMAGE_EXTENSIONS:
+                        images[stem] = ext
+
+        labels_dir = os.path.join(self.dataset_path, split, 'labels')
+        if os.path.isdir(labels_dir):
+            with os.scandir(labels_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.txt'):
+                        st = entry.stat()
+                        labels[entry.name[:-4]] = (st.st_mtime_ns, st.st_size)
+
+        return images, labels
+
+    def refresh(self, save=True):
+        """
+        Bring the manifest up to date with the dataset on disk
+        Only label files whose mtime or size changed are parsed again
+        """
+        self.load()
+
+        previous = {}
+        for i in range(len(self.file_stem)):
+            key = (int(self.file_split[i]), str(self.file_stem[i]))
+            previous[key] = i
+
+        rows = []
+        parsed = reused = 0
+
+        for split_id, split in enumerate(SPLITS):
+            images, labels = self._scan_split(split)
+            for stem in sorted(images.keys() | labels.keys()):
+                image_ext = images.get(stem, '')
+                label_stat = labels.get(stem)
+                old = previous.pop((split_id, stem), None)
+
+                if label_stat is None:
+                    rows.append((split_id, stem, image_ext, 0, 0, False, 0, None))
+                    continue
+
+                if (old is not None and self.file_has_label[old]
+                        and self.file_label_mtime[old] == label_stat[0]
+                        and self.file_label_size[old] == label_stat[1]):
+                    start = int(self.file_box_start[old])
+                    count = int(self.file_box_count[old])
+                    boxes = (self.box_class[start:start + count], self.box_xywh[start:start + count])
+                    invalid = int(self.file_invalid_lines[old])
+                    reused += 1
+                else:
+                    if self.zip_dataset is not None:
+                        classes, xywh, invalid = parse_label_lines(self.zip_dataset.read_label(split, stem).splitlines())
+                    else:
+                        label_path = os.path.join(self.dataset_path, split, 'labels', stem + '.txt')
+                        classes, xywh, invalid = parse_label_file(label_path)
+                    boxes = (classes, xywh)
+                    parsed += 1
+
+                rows.append((split_id, stem, image_ext, label_stat[0], label_stat[1], True, invalid, boxes))
+
+        removed = len(previous)
+        self._build_columns(rows)
+        if save:
+            self.save()
+
+        return {'parsed': parsed, 'reused': reused, 'removed': removed, 'files': len(rows)}
+
+    def _build_columns(self, rows):
+        n = len(rows)
+        self.file_split = np.array([r[0] for r in rows], dtype=np.int8)
+        self.file_stem = np.array([r[1] for r in rows], dtype=str) if n else np.zeros(0, dtype='<U1')
+        self.file_image_ext = np.array([r[2] for r in rows], dtype=str) if n else np.zeros(0, dtype='<U1')
+        self.file_label_mtime = np.array([r[3] for r in rows], dtype=np.int64)
+        self.file_label_size = np.array([r[4] for r in rows], dtype=np.int64)
+        self.file_has_label = np.array([r[5] for r in rows], dtype=bool)
+        self.file_invalid_lines = np.array([r[6] for r in rows], dtype=np.int32)
+
+        counts = np.array([len(r[7][0]) if r[7] is not None else 0 for r in rows], dtype=np.int32)
+        self.file_box_count = counts
+        self.file_box_start = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)[:-1])) if n else np.zeros(0, dtype=np.int64)
+
+        with_boxes = [r[7] for r in rows if r[7] is not None and len(r[7][0])]
+        if with_boxes:
+            self.box_class = np.concatenate([b[0] for b in with_boxes]).astype(np.int16)
+            self.box_xywh = np.concatenate([b[1] for b in with_boxes]).astype(np.float32)
+        else:
+            self.box_class = np.zeros(0, dtype=np.int16)
+            self.box_xywh = np.zeros((0, 4), dtype=np.float32)
+        self.box_file = np.repeat(np.arange(n, dtype=np.int32), counts)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _split_id(self, split):
+        return SPLITS.index(split)
+
+    def _box_mask(self, split=None):
+        if split is None:
+            return slice(None)
+        return self.file_split[self.box_file] == self._split_id(split)
+
+    def image_path(self, index):
+        """Path of the image for a file row (archive-relative for zip sources)"""
+        split = SPLITS[int(self.file_split[index])]
+        filename = str(self.file_stem[index]) + str(self.file_image_ext[index])
+        if self.zip_dataset is not None:
+            return f"{split}/images/{filename}"
+        return os.path.join(self.dataset_path, split, 'images', filename)
+
+    def image_paths(self, split):
+        """All image paths of a split, in manifest order"""
+        rows = np.flatnonzero((self.file_split == self._split_id(split)) & (self.file_image_ext != ''))
+        return [self.image_path(i) for i in rows]
+
+    def labels_for(self, split, stem):
+        """Return (classes, xywh) for one image, empty arrays if unlabeled"""
+        rows = np.flatnonzero((self.file_split == self._split_id(split)) & (self.file_stem == stem))
+        if len(rows) == 0:
+            return self.box_class[:0], self.box_xywh[:0]
+        start = int(self.file_box_start[rows[0]])
+        count = int(self.file_box_count[rows[0]])
+        return self.box_class[start:start + count], self.box_xywh[start:start + count]
+
+    def class_counts(self, split=None):
+        """Number of boxes per class name"""
+        classes = self.box_class[self._box_mask(split)]
+        if len(classes) == 0:
+            return {}
+        counts = np.bincount(classes.astype(np.int64))
+        return {self.class_names.get(c, str(c)): int(n) for c, n in enumerate(counts) if n}
+
+    def images_per_class(self, split=None):
+        """Number of images containing at least one box of each class"""
+        mask = self._box_mask(split)
+        pairs = np.unique(np.stack([self.box_file[mask], self.box_class[mask].astype(np.int32)], axis=1), axis=0)
+        if len(pairs) == 0:
+            return {}
+        counts = np.bincount(pairs[:, 1])
+        return {self.class_names.get(c, str(c)): int(n) for c, n in enumerate(counts) if n}
+
+    def box_size_stats(self, split=None, bins=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0)):
+        """Distribution of normalized box sizes (sqrt of area) and w/h percentiles"""
+        xywh = self.box_xywh[self._box_mask(split)]
+        if len(xywh) == 0:
+            return {'boxes': 0}
+        size = np.sqrt(np.clip(xywh[:, 2] * xywh[:, 3], 0, None))
+        hist, edges = np.histogram(size, bins=np.asarray(bins, dtype=np.float32))
+        percentiles = (5, 25, 50, 75, 95)
+        return {
+            'boxes': int(len(xywh)),
+            'size_histogram': {f"{edges[i]:.2f}-{edges[i + 1]:.2f}": int(h) for i, h in enumerate(hist)},
+            'width_percentiles': dict(zip(percentiles, np.percentile(xywh[:, 2], percentiles).round(4).tolist())),
+            'height_percentiles': dict(zip(percentiles, np.percentile(xywh[:, 3], percentiles).round(4).tolist())),
+        }
+
+    def mismatches(self, split=None):
+        """Images without labels, labels without images, empty labels and invalid rows"""
+        rows = np.ones(len(self.file_stem), dtype=bool) if split is None else self.file_split == self._split_id(split)
+        has_image = self.file_image_ext != ''
+
+        def names(mask):
+            return [f"{SPLITS[int(self.file_split[i])]}/{self.file_stem[i]}" for i in np.flatnonzero(rows & mask)]
+
+        return {
+            'images_without_labels': names(has_image & ~self.file_has_label),
+            'labels_without_images': names(~has_image & self.file_has_label),
+            'empty_labels': names(self.file_has_label & (self.file_box_count == 0)),
+            'invalid_lines': int(self.file_invalid_lines[rows].sum()),
+        }
+
+    def split_summary(self):
+        """Images, labels and boxes per split"""
+        summary = {}
+        for split_id, split in enumerate(SPLITS):
+            rows = self.file_split == split_id
+            summary[split] = {
+                'images': int((rows & (self.file_image_ext != '')).sum()),
+                'labels': int((rows & self.file_has_label).sum()),
+                'boxes': int(self.file_box_count[rows].sum()),
+            }
+        return summary
+
+    def stratified_sample(self, n, split='test', seed=0):
+        """
+        Sample n image paths keeping the class mix of the split
+        Each image is assigned to the rarest class it contains (background if none).
+        With more strata than n, n strata are drawn (weighted by size) and one image taken from each.
+        """
+        split_rows = np.flatnonzero((self.file_split == self._split_id(split)) & (self.file_image_ext != ''))
+        if len(split_rows) == 0 or n <= 0:
+            return []
+
+        class_totals = np.bincount(self.box_class.astype(np.int64), minlength=1)
+        rarity = np.argsort(np.argsort(class_totals))  # 0 = rarest
+
+        strata = {}
+        for row in split_rows:
+            start = int(self.file_box_start[row])
+            classes = self.box_class[start:start + int(self.file_box_count[row])]
+            key = -1 if len(classes) == 0 else int(classes[np.argmin(rarity[classes])])
+            strata.setdefault(key, []).append(row)
+
+        rng = np.random.default_rng(seed)
+        n = min(n, len(split_rows))
+        total = len(split_rows)
+        if len(strata) > n:
+            keys = sorted(strata)
+            sizes = np.array([len(strata[k]) for k in keys], dtype=np.float64)
+            drawn = rng.choice(len(keys), size=n, replace=False, p=sizes / sizes.sum())
+            quotas = {k: 0 for k in keys}
+            quotas.update({keys[i]: 1 for i in drawn})
+        else:
+            quotas = {k: max(1, round(n * len(v) / total)) for k, v in strata.items()}
+
+        # Trim or top up so the quotas sum exactly to n, touching the largest strata first
+        # (every stratum keeps at least 1: there are at most n of them here)
+        order = sorted(strata, key=lambda k: len(strata[k]), reverse=True)
+        while sum(quotas.values()) > n:
+            for k in order:
+                if quotas[k] > 1 and sum(quotas.values()) > n:
+                    quotas[k] -= 1
+        while sum(quotas.values()) < n:
+            for k in order:
+                if quotas[k] < len(strata[k]) and sum(quotas.values()) < n:
+                    quotas[k] += 1
+
+        chosen = []
+        for k, rows in strata.items():
+            picked = rng.choice(rows, size=min(quotas[k], len(rows)), replace=False)
+            chosen.extend(int(r) for r in picked)
+
+        return [self.image_path(i) for i in sorted(chosen)]
+
+    def print_report(self):
+        """Print split, class and mismatch statistics"""
+        print(f"\n🗂️  Label manifest: {self.manifest_path}")
+        for split, info in self.split_summary().items():
+            print(f"   {split}: {info['images']} images, {info['labels']} labels, {info['boxes']} boxes")
+
+        print(f"\n📊 Boxes per class:")
+        for name, count in self.class_counts().items():
+            print(f"   {name}: {count}")
+
+        problems = self.mismatches()
+        print(f"\n🔍 Label/image consistency:")
+        print(f"   Images without labels: {len(problems['images_without_labels'])}")
+        print(f"   Labels without images: {len(problems['labels_without_images'])}")
+        print(f"   Empty label files: {len(problems['empty_labels'])}")
+        print(f"   Invalid label lines: {problems['invalid_lines']}")
+
+
+def load_manifest(dataset_path="datasets/wildfire", refresh=True, zip_dataset=None):
+    """Load the manifest for a dataset folder or archive, refreshing changed label files"""
+    manifest = DatasetManifest(dataset_path, zip_dataset=zip_dataset)
+    if refresh:
+        stats = manifest.refresh()
+        print(f"🗂️  Manifest refreshed: {stats['parsed']} parsed, {stats['reused']} reused, {stats['removed']} removed")
+    else:
+        manifest.load()
+    return manifest
+
+
+def main():
+    """Build or refresh the manifest and print its report"""
+    dataset_path = sys.argv[1] if len(sys.argv) > 1 else "datasets/wildfire"
+    if not os.path.exists(dataset_path):
+        print(f"❌ Dataset not found: {dataset_path}")
+        sys.exit(1)
+
+    zip_dataset = None
+    if dataset_path.endswith('.zip'):
+        from zip_dataset import ZipDataset
+        zip_dataset = ZipDataset(dataset_path)
+
+    manifest = load_manifest(dataset_path, zip_dataset=zip_dataset)
+    manifest.print_report()
+
+    stats = manifest.box_size_stats()
+    if stats.get('boxes'):
+        print(f"\n📐 Box size distribution (sqrt of normalized area):")
+        for bucket, count in stats['size_histogram'].items():
+            print(f"   {bucket}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+🔄 Incremental Dataset Sync
+Applies a new dataset version (zip or folder) by content hash, touching only what changed
+"""
+
+import os
+import sys
+import json
+import hashlib
+import zlib
+from datetime import datetime
+from zip_dataset import ZipDataset
+
+CONTENT_MANIFEST_FILENAME = '.content_manifest.json'
+SYNC_DIR = '.sync'
+CONTENT_MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+
+# Files managed by the tools themselves, never part of the dataset content
+IGNORED_NAMES = (CONTENT_MANIFEST_FILENAME, '.label_manifest.npz')
+IGNORED_DIRS = (SYNC_DIR,)
+
+
+def hash_bytes(data):
+    """(sha256 hex, crc32) of an in-memory buffer"""
+    return hashlib.sha256(data).hexdigest(), zlib.crc32(data) & 0xFFFFFFFF
+
+
+def hash_file(path):
+    """(sha256 hex, crc32) of a file, read in chunks"""
+    sha = hashlib.sha256()
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+    return sha.hexdigest(), crc & 0xFFFFFFFF
+
+
+def _is_ignored(rel_path):
+    parts = rel_path.split('/')
+    return parts[-1] in IGNORED_NAMES or parts[0] in IGNORED_DIRS
+
+
+class ContentManifest:
+    """
+    {relative path: sha256, crc32, size, mtime_ns} for every file of a dataset folder
+
+    Files whose size and mtime match the previous manifest keep their hash,
+    so re-hashing an unchanged folder costs one stat per file.
+    """
+
+    def __init__(self, dataset_path="datasets/wildfire"):
+        self.dataset_path = str(dataset_path)
+        self.manifest_path = os.path.join(self.dataset_path, CONTENT_MANIFEST_FILENAME)
+        self.files = {}
+
+    def load(self):
+        if not os.path.exists(self.manifest_path):
+            return False
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read content manifest: {e}")
+            return False
+        if data.get('version') != CONTENT_MANIFEST_VERSION:
+            return False
+        self.files = data.get('files', {})
+        return True
+
+    def save(self):
+        os.makedirs(self.dataset_path, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CONTENT_MANIFEST_VERSION,
+                       'updated_at': datetime.now().isoformat(),
+                       'files': self.files}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def scan(self):
+        """Rehash the folder, reusing hashes of files with unchanged size/mtime"""
+        previous = self.files
+        files = {}
+        hashed = 0
+
+        for root, dirs, names in os.walk(self.dataset_path):
+            rel_root = os.path.relpath(root, self.dataset_path).replace(os.sep, '/')
+            if rel_root == '.':
+                rel_root = ''
+                dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+            for name in names:
+                rel_path = f"{rel_root}/{name}" if rel_root else name
+                if _is_ignored(rel_path):
+                    continue
+                st = os.stat(os.path.join(root, name))
+                old = previous.get(rel_path)
+                if old and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns:
+                    files[rel_path] = old
+                    continue
+                sha, crc = hash_file(os.path.join(root, name))
+                files[rel_path] = {'sha256': sha, 'crc32': crc, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+                hashed += 1
+
+        self.files = files
+        return hashed
+
+
+class FolderSource:
+    """New dataset version as an extracted folder"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.manifest = ContentManifest(self.path)
+
+    def describe(self):
+        return self.path
+
+    def list_files(self):
+        """{relative path: (size, crc32 or None)}"""
+        self.manifest.load()
+        self.manifest.scan()
+        return {p: (info['size'], info['crc32']) for p, info in self.manifest.files.items()}
+
+    def sha256(self, rel_path):
+        return self.manifest.files[rel_path]['sha256']
+
+    def read(self, rel_path):
+        with open(os.path.join(self.path, rel_path), 'rb') as f:
+            return f.read()
+
+    def close(self):
+        pass
+
+
+class ZipSource:
+    """New dataset version as a Roboflow zip, read without extraction"""
+
+    def __init__(self, path):
+        self.zip = ZipDataset(path)
+
+    def describe(self):
+        return self.zip.zip_path
+
+    def list_files(self):
+        root = self.zip.root
+        return {name[len(root):]: (entry.size, entry.crc)
+                for name, entry in self.zip.entries.items()
+                if name.startswith(root) and not _is_ignored(name[len(root):])}
+
+    def sha256(self, rel_path):
+        return hashlib.sha256(self.zip.read(rel_path)).hexdigest()
+
+    def read(self, rel_path):
+        return self.zip.read(rel_path)
+
+    def close(self):
+        self.zip.close()
+
+
+def open_source(path):
+    """Folder or zip source for a new dataset version"""
+    if os.path.isdir(path):
+        return FolderSource(path)
+    return ZipSource(path)
+
+
+def compute_diff(target, source):
+    """
+    Compare the target manifest with a source version
+    Size or CRC mismatches are definite changes; equal size+CRC is confirmed by sha256
+    """
+    source_files = source.list_files()
+    added, changed, unchanged = [], [], 0
+
+    for rel_path, (size, crc) in sorted(source_files.items()):
+        current = target.files.get(rel_path)
+        if current is None:
+            added.append(rel_path)
+        elif current['size'] != size or (crc is not None and current['crc32'] != crc):
+            changed.append(rel_path)
+        elif source.sha256(rel_path) != current['sha256']:
+            changed.append(rel_path)
+        else:
+            unchanged += 1
+
+    removed = sorted(p for p in target.files if p not in source_files)
+    return {
+        'source': source.describe(),
+        'target': target.dataset_path,
+        'created_at': datetime.now().isoformat(),
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'unchanged': unchanged,
+    }
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.sync-tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def apply_diff(target, source, diff):
+    """Write added/changed files, delete removed ones and update the target manifest"""
+    for rel_path in diff['added'] + diff['changed']:
+        data = source.read(rel_path)
+        full_path = os.path.join(target.dataset_path, rel_path)
+        _write_atomic(full_path, data)
+        sha, crc = hash_bytes(data)
+        st = os.stat(full_path)
+        target.files[rel_path] = {'sha256': sha, 'crc32': crc, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+    for rel_path in diff['removed']:
+        full_path = os.path.join(target.dataset_path, rel_path)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+        target.files.pop(rel_path, None)
+
+    target.save()
+
+
+def save_diff(dataset_path, diff):
+    """
+    Store the diff under <dataset>/.sync/ (timestamped copy + latest_diff.json)
+    An empty diff keeps latest_diff.json on the last real change set, which affected_images() relies on.
+    """
+    sync_dir = os.path.join(dataset_path, SYNC_DIR)
+    os.makedirs(sync_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    data = json.dumps(diff, indent=2)
+    # Exclusive create: a sync in the same microsecond gets the next sequence number
+    sequence = 0
+    while True:
+        suffix = f"_{sequence}" if sequence else ""
+        diff_path = os.path.join(sync_dir, f"diff_{timestamp}{suffix}.json")
+        try:
+            with open(diff_path, 'x', encoding='utf-8') as f:
+                f.write(data)
+            break
+        except FileExistsError:
+            sequence += 1
+    if diff['added'] or diff['changed'] or diff['removed']:
+        _write_atomic(os.path.join(sync_dir, 'latest_diff.json'), data.encode('utf-8'))
+    return diff_path
+
+
+def load_latest_diff(dataset_path="datasets/wildfire"):
+    """Most recent sync diff, None if the dataset was never synced"""
+    path = os.path.join(dataset_path, SYNC_DIR, 'latest_diff.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def affected_images(diff, kinds=('images', 'labels')):
+    """
+    Image keys ('split/stem') a downstream cache must drop or recompute
+
+    Preprocessed images and features only depend on the image bytes (kinds=('images',)),
+    predictions compared against ground truth also depend on the label files.
+    """
+    affected = set()
+    for rel_path in diff['added'] + diff['changed'] + diff['removed']:
+        parts = rel_path.split('/')
+        if len(parts) == 3 and parts[1] in kinds:
+            affected.add(f"{parts[0]}/{os.path.splitext(parts[2])[0]}")
+    return affected
+
+
+def sync_dataset(source_path, dataset_path="datasets/wildfire", dry_run=False):
+    """
+    Sync a dataset folder with a new version (zip archive or folder)
+    Returns the diff, also saved to <dataset>/.sync/ unless dry_run
+    """
+    print(f"🔄 Syncing {dataset_path} from {source_path}")
+    target = ContentManifest(dataset_path)
+    target.load()
+    hashed = target.scan()
+    print(f"   Target hashed: {hashed} new/modified files, {len(target.files)} total")
+
+    source = open_source(source_path)
+    try:
+        diff = compute_diff(target, source)
+        print(f"   Added: {len(diff['added'])} | Changed: {len(diff['changed'])} | "
+              f"Removed: {len(diff['removed'])} | Unchanged: {diff['unchanged']}")
+        if dry_run:
+            return diff
+        apply_diff(target, source, diff)
+    finally:
+        source.close()
+
+    diff_path = save_diff(dataset_path, diff)
+    print(f"✅ Sync completed, diff saved to: {diff_path}")
+    return diff
+
+
+def main():
+    """Sync datasets/wildfire (or a given folder) with a new zip/folder version"""
+    if len(sys.argv) < 2:
+        print("Usage: python src/dataset_sync.py <new_version.zip|folder> [dataset_path] [--dry-run]")
+        sys.exit(1)
+
+    args = [a for a in sys.argv[1:] if a != '--dry-run']
+    source_path = args[0]
+    dataset_path = args[1] if len(args) > 1 else "datasets/wildfire"
+
+    if not os.path.exists(source_path):
+        print(f"❌ Source not found: {source_path}")
+        sys.exit(1)
+
+    diff = sync_dataset(source_path, dataset_path, dry_run='--dry-run' in sys.argv)
+    affected = affected_images(diff)
+    print(f"📋 Images affected for downstream caches: {len(affected)}")
+
+
+if __name__ == "__main__":
+    main()
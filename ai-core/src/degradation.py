@@ -0,0 +1,152 @@
+"""
+🪜 Load-Adaptive Model Degradation Ladder
+Steps down to cheaper preloaded models under sustained load and back up when it drops
+"""
+
+import os
+import time
+import threading
+from collections import deque
+import numpy as np
+
+# Hysteresis thresholds: degrade above the high marks, recover below the low marks
+QUEUE_HIGH = 8
+QUEUE_LOW = 2
+P95_HIGH_MS = 1500
+P95_LOW_MS = 600
+SUSTAIN_DOWN_S = 5.0
+SUSTAIN_UP_S = 20.0
+LATENCY_WINDOW_S = 10.0
+
+
+class ModelRung:
+    """One ladder step: a model variant (one detector per worker thread) and an optional forced input size"""
+
+    def __init__(self, name, detectors, img_size=None):
+        self.name = name
+        self.detectors = detectors
+        self.img_size = img_size
+
+    def warmup(self, shape=(480, 640, 3)):
+        """Build every predictor now so the first request after a switch is not slow"""
+        image = np.zeros(shape, dtype=np.uint8)
+        for detector in self.detectors:
+            detector.detect_fire(image, img_size=self.img_size)
+
+
+class DegradationLadder:
+    """
+    Ordered model variants, rung 0 = most accurate
+
+    The worker feeds observe() with queue depth and request latencies. Overload
+    (queue >= QUEUE_HIGH or p95 >= P95_HIGH_MS) sustained for SUSTAIN_DOWN_S steps
+    one rung down; calm (queue <= QUEUE_LOW and p95 <= P95_LOW_MS) sustained for
+    the longer SUSTAIN_UP_S steps one rung back up.
+    """
+
+    def __init__(self, rungs, queue_high=QUEUE_HIGH, queue_low=QUEUE_LOW, p95_high_ms=P95_HIGH_MS,
+                 p95_low_ms=P95_LOW_MS, sustain_down_s=SUSTAIN_DOWN_S, sustain_up_s=SUSTAIN_UP_S,
+                 window_s=LATENCY_WINDOW_S):
+        if not rungs:
+            raise ValueError("Degradation ladder needs at least one rung")
+        self.rungs = list(rungs)
+        self.workers = len(self.rungs[0].detectors)
+        if any(len(r.detectors) != self.workers for r in self.rungs):
+            raise ValueError("Every rung needs one detector per worker thread")
+
+        self.queue_high, self.queue_low = queue_high, queue_low
+        self.p95_high_ms, self.p95_low_ms = p95_high_ms, p95_low_ms
+        self.sustain_down_s, self.sustain_up_s = sustain_down_s, sustain_up_s
+        self.window_s = window_s
+
+        self.level = 0
+        self.transitions = []
+        self._latencies = deque()  # (time, latency_ms) for the current rung
+        self._over_since = None
+        self._under_since = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        with self._lock:
+            return self.rungs[self.level]
+
+    def _p95(self, now):
+        while self._latencies and now - self._latencies[0][0] > self.window_s:
+            self._latencies.popleft()
+        if not self._latencies:
+            return None
+        return float(np.percentile([latency for _, latency in self._latencies], 95))
+
+    def observe(self, queue_depth, latency_ms=None, now=None):
+        """Record a load sample (and optionally a completed request latency), switching rungs if due"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if latency_ms is not None:
+                self._latencies.append((now, latency_ms))
+            p95 = self._p95(now)
+
+            overloaded = queue_depth >= self.queue_high or (p95 is not None and p95 >= self.p95_high_ms)
+            calm = queue_depth <= self.queue_low and (p95 is None or p95 <= self.p95_low_ms)
+
+            self._over_since = (self._over_since or now) if overloaded else None
+            self._under_since = (self._under_since or now) if calm else None
+
+            if self._over_since is not None and now - self._over_since >= self.sustain_down_s \
+                    and self.level < len(self.rungs) - 1:
+                self._switch(self.level + 1, now, queue_depth, p95)
+            elif self._under_since is not None and now - self._under_since >= self.sustain_up_s \
+                    and self.level > 0:
+                self._switch(self.level - 1, now, queue_depth, p95)
+
+    def _switch(self, level, now, queue_depth, p95):
+        direction = '⬇️  Degrading' if level > self.level else '⬆️  Recovering'
+        print(f"{direction} to rung {level} ({self.rungs[level].name}) | queue={queue_depth} "
+              f"p95={'n/a' if p95 is None else f'{p95:.0f} ms'}")
+        self.transitions.append({'from': self.rungs[self.level].name, 'to': self.rungs[level].name,
+                                 'queue_depth': queue_depth, 'p95_ms': p95, 'at': now})
+        self.level = level
+        # Latencies of the previous rung say nothing about the new one
+        self._latencies.clear()
+        self._over_since = None
+        self._under_since = None
+
+    def status(self):
+        with self._lock:
+            return {'rung': self.rungs[self.level].name, 'level': self.level,
+                    'rungs': [r.name for r in self.rungs], 'transitions': len(self.transitions)}
+
+
+def build_default_ladder(workers=1, small_weights="runs/detect/fire_detection_yolo_s/weights/best.pt",
+                         nano_weights="runs/detect/fire_detection_yolo/weights/best.pt", reduced_size=320):
+    """
+    Trained s model -> nano model -> nano at reduced resolution
+    Rungs whose weights are missing are left out; every model is loaded and warmed up here
+    """
+    from yolo_fire_detection import FireDetectionYOLO
+
+    def load(weights):
+        detectors = []
+        for _ in range(workers):
+            detector = FireDetectionYOLO()
+            if not detector.load_trained_model(weights):
+                return None
+            detectors.append(detector)
+        return detectors
+
+    loaded = {}  # nano rungs share models: only one rung serves at a time
+    rungs = []
+    for name, weights, img_size in (('yolov8s', small_weights, None),
+                                    ('yolov8n', nano_weights, None),
+                                    (f'yolov8n-{reduced_size}', nano_weights, reduced_size)):
+        if not os.path.exists(weights):
+            print(f"⚠️  Skipping rung {name}: weights not found ({weights})")
+            continue
+        if weights not in loaded:
+            loaded[weights] = load(weights)
+        detectors = loaded[weights]
+        if detectors:
+            rungs.append(ModelRung(name, detectors, img_size))
+
+    for rung in rungs:
+        rung.warmup()
+    return DegradationLadder(rungs)
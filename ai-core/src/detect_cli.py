@@ -0,0 +1,169 @@
+"""
+🖥️ Batch Detection CLI
+`python main.py detect <files|folders|globs|videos> ...`: scriptable, single-process, NDJSON output
+"""
+
+import os
+import sys
+import glob
+import time
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from pipeline import resolve_backend
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# Exit codes (2 = invalid arguments, from argparse)
+EXIT_OK = 0
+EXIT_NO_INPUTS = 3      # nothing matched the given paths/globs
+EXIT_MODEL_ERROR = 4    # model missing or failed to load
+EXIT_PARTIAL = 5        # some inputs failed (missing, unreadable, detection error)
+EXIT_FIRE = 10          # fire found, only with --fire-exit-code
+
+
+def add_arguments(parser):
+    """Options of the detect subcommand"""
+    parser.add_argument('inputs', nargs='+', help='image/video files, folders or glob patterns')
+    parser.add_argument('--model', help='weights (default: runs/detect/fire_detection_yolo/weights/best.pt)')
+    parser.add_argument('--conf', type=float, default=config.YOLO_CONFIDENCE_THRESHOLD, help='confidence threshold')
+    parser.add_argument('--iou', type=float, default=None, help='images only: NMS IoU threshold (default 0.7)')
+    parser.add_argument('--imgsz', type=int, default=None,
+                        help=f'images only: model input size (default {config.YOLO_INPUT_SIZE}); '
+                             'videos use the adaptive input size')
+    parser.add_argument('--batch', type=int, default=8, help='images per inference batch')
+    parser.add_argument('--workers', type=int, default=2, help='image decode threads')
+    parser.add_argument('--backend', choices=('auto', 'torch', 'ultralytics'), default='auto',
+                        help="torch: pooled batched PyTorch; ultralytics: predictor (exported .onnx/.torchscript "
+                             "weights); auto: torch for .pt weights")
+    parser.add_argument('--recursive', action='store_true', help='descend into subfolders')
+    parser.add_argument('--frame-step', type=int, default=None, help='videos: analyze one frame every N')
+    parser.add_argument('--track', action='store_true', help='videos: track-then-detect mode')
+    parser.add_argument('--output', '-o', help='write NDJSON here instead of stdout')
+    parser.add_argument('--fire-exit-code', action='store_true', help=f'exit with {EXIT_FIRE} if fire is detected')
+
+
+def expand_inputs(inputs, recursive=False):
+    """(images, videos, unmatched) from files, folders and glob patterns, duplicates removed"""
+    images, videos, unmatched = [], [], []
+    seen = set()
+
+    def add(path):
+        key = os.path.abspath(path)
+        if key in seen:
+            return
+        seen.add(key)
+        ext = os.path.splitext(path)[1].lower()
+        if ext in IMAGE_EXTENSIONS:
+            images.append(path)
+        elif ext in VIDEO_EXTENSIONS:
+            videos.append(path)
+
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            if recursive:
+                for root, dirs, files in os.walk(pattern):
+                    dirs.sort()
+                    for name in sorted(files):
+                        add(os.path.join(root, name))
+            else:
+                for name in sorted(os.listdir(pattern)):
+                    add(os.path.join(pattern, name))
+        elif os.path.isfile(pattern):
+            add(pattern)
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                unmatched.append(pattern)
+            for path in matches:
+                if os.path.isfile(path):
+                    add(path)
+    return images, videos, unmatched
+
+
+def run_detect(args):
+    """Run the detect subcommand, returns the exit code"""
+    from video_detection import write_ndjson
+
+    images, videos, unmatched = expand_inputs(args.inputs, args.recursive)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    counts = {'images': 0, 'videos': 0, 'with_fire': 0, 'failed': 0}
+    started = time.time()
+    try:
+        for pattern in unmatched:
+            counts['failed'] += 1
+            write_ndjson({'type': 'error', 'source': pattern, 'error': 'No such file or no glob match'}, out)
+        if not images and not videos:
+            print("❌ No images or videos found in the given inputs", file=sys.stderr)
+            return EXIT_NO_INPUTS
+
+        # Status messages go to stderr, stdout carries only NDJSON records
+        with contextlib.redirect_stdout(sys.stderr):
+            from yolo_fire_detection import FireDetectionYOLO
+            from pipeline import detection_pipeline
+            from video_detection import detect_video, VideoOpenError
+
+            detector = FireDetectionYOLO()
+            if not detector.load_trained_model(args.model):
+                return EXIT_MODEL_ERROR
+
+            if videos and (args.imgsz or args.iou is not None):
+                print("⚠️  --imgsz/--iou apply to images only, videos use the default detection settings")
+
+            report = None
+            if images:
+                pipeline = detection_pipeline(detector, args.conf, args.imgsz or config.YOLO_INPUT_SIZE,
+                                              args.batch, args.workers,
+                                              iou_threshold=args.iou,
+                                              backend=resolve_backend(args.backend, args.model))
+                for item in pipeline.run(images):
+                    counts['images'] += 1
+                    if item.error:
+                        counts['failed'] += 1
+                        write_ndjson({'type': 'error', 'source': str(item.source), 'error': item.error}, out)
+                        continue
+                    counts['with_fire'] += item.output['fire_detected']
+                    write_ndjson(dict(type='image', **item.output), out)
+                report = pipeline.report()
+
+            for video in videos:
+                counts['videos'] += 1
+                try:
+                    result = detect_video(detector, video, args.conf, args.frame_step, args.track)
+                except Exception as e:  # one bad video must not stop the run (and its summary record)
+                    counts['failed'] += 1
+                    error = str(e) if isinstance(e, VideoOpenError) else f"{type(e).__name__}: {e}"
+                    write_ndjson({'type': 'error', 'source': video, 'error': error}, out)
+                    continue
+                counts['with_fire'] += result['fire_detected']
+                write_ndjson(dict(type='video', source=video, **result), out)
+
+        summary = dict(type='summary', **counts, elapsed_s=round(time.time() - started, 3))
+        if report:
+            summary['pipeline'] = {'bottleneck': report['bottleneck'],
+                                   'utilization': {k: v['utilization'] for k, v in report['stages'].items()}}
+        write_ndjson(summary, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if counts['failed']:
+        return EXIT_PARTIAL
+    if args.fire_exit_code and counts['with_fire']:
+        return EXIT_FIRE
+    return EXIT_OK
+
+
+def main():
+    """Standalone entry point (same as `python main.py detect ...`)"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Batch fire detection with NDJSON output')
+    add_arguments(parser)
+    sys.exit(run_detect(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
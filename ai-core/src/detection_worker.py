@@ -0,0 +1,467 @@
+"""
+🚦 Deadline-Aware Detection Worker
+Earliest-deadline-first scheduling with load shedding for image detection requests
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import itertools
+import functools
+import threading
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+import numpy as np
+
+DEFAULT_DEADLINE_MS = 2000
+DEFAULT_MAX_QUEUE = 64
+LATENCY_WINDOW = 200
+
+# Overload responses map to these HTTP statuses in the API
+STATUS_QUEUE_FULL = 429
+STATUS_DEADLINE = 503
+
+
+class OverloadError(Exception):
+    """Request rejected or dropped because the worker cannot serve it in time"""
+
+    def __init__(self, message, status_code=STATUS_DEADLINE, retry_after_ms=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after_ms = retry_after_ms
+
+
+def overload_response(error):
+    """API-shaped failure payload for an OverloadError (see api/src/types/errors.ts)"""
+    response = {'success': False, 'error': str(error), 'status_code': error.status_code}
+    if error.retry_after_ms is not None:
+        response['retry_after_ms'] = int(error.retry_after_ms)
+    return response
+
+
+class DetectionRequest:
+    """One queued detection with its arrival time and absolute deadline (monotonic seconds)"""
+
+    def __init__(self, image, conf_threshold, arrival, deadline, latency_budget_ms=None):
+        self.image = image
+        self.conf_threshold = conf_threshold
+        self.latency_budget_ms = latency_budget_ms
+        self.arrival = arrival
+        self.deadline = deadline
+        self.future = Future()
+
+
+class DetectionWorker:
+    """
+    Serves detect_fire() calls from a deadline-ordered queue
+
+    - submit() stamps arrival time and deadline, and fast-fails (503) when the
+      estimated completion is already past the deadline or (429) when the queue is full
+    - worker threads always take the earliest deadline; requests that can no longer
+      finish in time are dropped instead of being served late
+    - when the remaining time cannot fit the default input size, it becomes the
+      detect_fire() latency budget so a smaller resolution is used
+    - with a DegradationLadder, each request runs on the current rung's model and
+      the result is tagged with that rung
+    """
+
+    def __init__(self, detectors=None, max_queue=DEFAULT_MAX_QUEUE, default_deadline_ms=DEFAULT_DEADLINE_MS,
+                 ladder=None):
+        # One detector per worker thread: a YOLO model is not shared between threads
+        self.ladder = ladder
+        if ladder is not None:
+            self.workers = ladder.workers
+        else:
+            self.detectors = detectors if isinstance(detectors, (list, tuple)) else [detectors]
+            self.workers = len(self.detectors)
+        self.max_queue = max_queue
+        self.default_deadline_ms = default_deadline_ms
+
+        self._heap = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads = []
+        self._in_flight = 0
+
+        self.service_ms = None  # EWMA of detection time
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)  # arrival -> completion
+        self.counters = {'submitted': 0, 'completed': 0, 'shed': 0, 'expired': 0,
+                         'failed': 0, 'late': 0}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(i,), name=f"detection-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop the threads; queued requests fail with 503"""
+        with self._cond:
+            self._running = False
+            pending = [item[2] for item in self._heap]
+            self._heap.clear()
+            self._cond.notify_all()
+        for request in pending:
+            request.future.set_exception(OverloadError("Detection worker stopped", STATUS_DEADLINE))
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def _estimated_wait_ms(self, deadline):
+        """Time until a request with this deadline would finish: queued work ahead of it + its own run"""
+        service = self.service_ms or 0.0
+        ahead = sum(1 for item in self._heap if item[0] <= deadline) + self._in_flight
+        return (ahead / self.workers + 1) * service
+
+    def submit(self, image, conf_threshold=0.5, deadline_ms=None, latency_budget_ms=None):
+        """
+        Queue a detection, returns a Future with the result dict
+        Raises OverloadError right away when the request cannot be served in time
+        """
+        now = time.monotonic()
+        deadline_ms = self.default_deadline_ms if deadline_ms is None else deadline_ms
+        request = DetectionRequest(image, conf_threshold, now, now + deadline_ms / 1000, latency_budget_ms)
+
+        with self._cond:
+            if not self._running:
+                raise OverloadError("Detection worker not running", STATUS_DEADLINE)
+            self.counters['submitted'] += 1
+
+            if len(self._heap) >= self.max_queue:
+                self.counters['shed'] += 1
+                raise OverloadError(f"Detection queue full ({self.max_queue} pending)", STATUS_QUEUE_FULL,
+                                    retry_after_ms=self._estimated_wait_ms(float('inf')))
+
+            wait_ms = self._estimated_wait_ms(request.deadline)
+            if wait_ms > deadline_ms:
+                self.counters['shed'] += 1
+                if self.ladder is not None:
+                    # Shedding is overload too, even if the queue itself stays short
+                    self.ladder.observe(self.ladder.queue_high)
+                raise OverloadError(f"Cannot meet {deadline_ms:.0f} ms deadline (estimated {wait_ms:.0f} ms)",
+                                    STATUS_DEADLINE, retry_after_ms=wait_ms)
+
+            heapq.heappush(self._heap, (request.deadline, next(self._sequence), request))
+            queue_depth = len(self._heap)
+            self._cond.notify()
+
+        if self.ladder is not None:
+            self.ladder.observe(queue_depth)
+        return request.future
+
+    def detect(self, image, conf_threshold=0.5, deadline_ms=None, latency_budget_ms=None):
+        """Blocking submit: result dict, or the overload payload when shed/expired"""
+        try:
+            return self.submit(image, conf_threshold, deadline_ms, latency_budget_ms).result()
+        except OverloadError as e:
+            return overload_response(e)
+
+    def _next_request(self):
+        """Earliest-deadline request that can still finish in time (expired ones are dropped)"""
+        with self._cond:
+            while True:
+                while self._running and not self._heap:
+                    self._cond.wait()
+                if not self._running:
+                    return None
+
+                _, _, request = heapq.heappop(self._heap)
+                now = time.monotonic()
+                if now + (self.service_ms or 0.0) / 1000 <= request.deadline:
+                    self._in_flight += 1
+                    return request
+
+                self.counters['expired'] += 1
+                late_ms = (now - request.arrival) * 1000
+                request.future.set_exception(
+                    OverloadError(f"Deadline expired after {late_ms:.0f} ms in queue", STATUS_DEADLINE))
+
+    @staticmethod
+    def _latency_budget(detector, request, remaining_ms):
+        if request.latency_budget_ms is not None:
+            return min(request.latency_budget_ms, remaining_ms)
+        # Default input size unless it would miss the deadline
+        latency_model = detector.latency_model
+        estimate = latency_model.estimate(latency_model.default_size)
+        return remaining_ms if estimate is not None and estimate > remaining_ms else None
+
+    def _run(self, index):
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+
+            rung = self.ladder.current() if self.ladder is not None else None
+            detector = rung.detectors[index] if rung is not None else self.detectors[index]
+            img_size = rung.img_size if rung is not None else None
+            # The first call also builds the predictor, keep it out of the estimate
+            warm = detector.model.predictor is not None
+
+            start = time.monotonic()
+            budget_ms = self._latency_budget(detector, request, max(0.0, (request.deadline - start) * 1000))
+            try:
+                detections = detector.detect_fire(request.image, request.conf_threshold, verbose=False,
+                                                  latency_budget_ms=budget_ms, img_size=img_size)
+                if detections is None:
+                    raise RuntimeError("Detection failed")
+            except Exception as e:
+                with self._cond:
+                    self._in_flight -= 1
+                    self.counters['failed'] += 1
+                request.future.set_exception(e)
+                continue
+
+            end = time.monotonic()
+            service_ms = (end - start) * 1000
+            with self._cond:
+                self._in_flight -= 1
+                if warm:
+                    self.service_ms = service_ms if self.service_ms is None else 0.8 * self.service_ms + 0.2 * service_ms
+                self.latencies_ms.append((end - request.arrival) * 1000)
+                self.counters['completed'] += 1
+                if end > request.deadline:
+                    self.counters['late'] += 1
+                queue_depth = len(self._heap)
+            if self.ladder is not None:
+                self.ladder.observe(queue_depth, (end - request.arrival) * 1000)
+
+            info = detector.last_detection_info or {}
+            request.future.set_result({
+                'success': True,
+                'detections': detections,
+                'queue_ms': round((start - request.arrival) * 1000, 2),
+                'service_ms': round(service_ms, 2),
+                'deadline_ms': round((request.deadline - request.arrival) * 1000, 2),
+                'input_size': info.get('input_size'),
+                'rung': rung.name if rung is not None else None,
+            })
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def latency_percentile(self, q=95):
+        with self._cond:
+            latencies = list(self.latencies_ms)
+        return float(np.percentile(latencies, q)) if latencies else None
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._heap)
+
+    def metrics(self):
+        """Counters (shed/expired included), queue depth and latency snapshot"""
+        p95 = self.latency_percentile(95)
+        with self._cond:
+            metrics = dict(self.counters,
+                           queue_depth=len(self._heap),
+                           in_flight=self._in_flight,
+                           service_ms=round(self.service_ms, 2) if self.service_ms else None,
+                           p95_latency_ms=round(p95, 2) if p95 is not None else None)
+        if self.ladder is not None:
+            metrics['ladder'] = self.ladder.status()
+        return metrics
+
+
+def image_size(path):
+    """(width, height) from the image header, None if it cannot be read"""
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def detection_result(response, image_path, version):
+    """Worker result -> API DetectionResult (api/src/types/detection.ts), scheduling times in metadata"""
+    from video_detection import to_bounding_boxes
+
+    boxes = to_bounding_boxes(response['detections'])
+    size = image_size(image_path)
+    return {
+        'success': True,
+        'fire_detected': bool(boxes),
+        'confidence': max((b['confidence'] for b in boxes), default=0.0),
+        'bounding_boxes': boxes,
+        'metadata': {
+            'processing_time': f"{(response['queue_ms'] + response['service_ms']) / 1000:.1f}s",
+            'model_version': f"{version}:{response['rung']}" if response['rung'] else version,
+            'image_size': f"{size[0]}x{size[1]}" if size else 'unknown',
+            'timestamp': datetime.now().isoformat(),
+            'queue_ms': response['queue_ms'],
+            'service_ms': response['service_ms'],
+            'deadline_ms': response['deadline_ms'],
+            'input_size': response['input_size'],
+        },
+    }
+
+
+def serve_requests(worker, version, inp=None, out=None, conf_threshold=0.5):
+    """
+    Serving loop used by the API: one JSON request per input line, one JSON response per output line
+
+    Request: {"id", "image": path, "conf"?, "deadline_ms"?} or {"id", "command": "metrics"}.
+    Responses carry the request id and come back in completion order; shed/expired
+    requests get the overload payload (status_code 429/503) right away.
+    At end of input, queued requests are finished before returning.
+    """
+    inp, out = inp or sys.stdin, out or sys.stdout
+    write_lock = threading.Lock()
+    idle = threading.Condition()
+    pending = [0]
+
+    def write(response, request_id):
+        response['id'] = request_id
+        with write_lock:
+            out.write(json.dumps(response) + '\n')
+            out.flush()
+
+    def finish(request_id, image, future):
+        try:
+            response = detection_result(future.result(), image, version)
+        except OverloadError as e:
+            response = overload_response(e)
+        except Exception as e:
+            response = {'success': False, 'error': f"{type(e).__name__}: {e}"}
+        write(response, request_id)
+        with idle:
+            pending[0] -= 1
+            idle.notify_all()
+
+    for line in inp:
+        if not line.strip():
+            continue
+        request = {}
+        try:
+            request = json.loads(line)
+            if request.get('command') == 'metrics':
+                write(worker.metrics(), request.get('id'))
+                continue
+            future = worker.submit(request['image'], request.get('conf', conf_threshold), request.get('deadline_ms'))
+        except OverloadError as e:
+            response = overload_response(e)
+        except Exception as e:  # a malformed line must not stop the worker
+            response = {'success': False, 'error': f"{type(e).__name__}: {e}"}
+        else:
+            with idle:
+                pending[0] += 1
+            future.add_done_callback(functools.partial(finish, request.get('id'), request['image']))
+            continue
+        write(response, request.get('id') if isinstance(request, dict) else None)
+
+    with idle:
+        idle.wait_for(lambda: pending[0] == 0)
+
+
+def serve(model_path=None, ladder=False, workers=1):
+    """`serve` entrypoint: load the model(s), then answer requests on stdin until it closes"""
+    import contextlib
+    from yolo_fire_detection import FireDetectionYOLO
+    from degradation import build_default_ladder
+    from video_detection import model_version
+
+    # stdout carries only JSON responses, status messages go to stderr
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if ladder:
+            worker = DetectionWorker(ladder=build_default_ladder(workers))
+            version = 'yolov8'
+        else:
+            detectors = []
+            for _ in range(workers):
+                detector = FireDetectionYOLO()
+                if not detector.load_trained_model(model_path):
+                    sys.exit(1)
+                detectors.append(detector)
+            worker = DetectionWorker(detectors)
+            version = model_version(detectors[0])
+        print(f"🚦 Detection worker serving on stdin ({worker.workers} thread(s))")
+        with worker:
+            serve_requests(worker, version, sys.stdin, out)
+
+
+def main():
+    """
+    serve [model_path] [--ladder] [--workers N]: long-lived worker the API sends requests to
+    otherwise burst test: flood the worker with test images and print the scheduling metrics
+    """
+    from yolo_fire_detection import FireDetectionYOLO
+    from degradation import build_default_ladder
+
+    if sys.argv[1:2] == ['serve']:
+        import argparse
+        parser = argparse.ArgumentParser(description='Deadline-aware detection worker (JSON lines on stdin/stdout)')
+        parser.add_argument('command', choices=('serve',))
+        parser.add_argument('model', nargs='?', default=None)
+        parser.add_argument('--ladder', action='store_true', help='serve the default degradation ladder')
+        parser.add_argument('--workers', type=int, default=1, help='detection threads (one model each)')
+        args = parser.parse_args()
+        serve(args.model, args.ladder, args.workers)
+        return
+
+    args = [a for a in sys.argv[1:] if a != '--ladder']
+    model_path = args[0] if len(args) > 0 else "runs/detect/fire_detection_yolo/weights/best.pt"
+    images_dir = args[1] if len(args) > 1 else "datasets/wildfire/test/images"
+    deadline_ms = float(args[2]) if len(args) > 2 else DEFAULT_DEADLINE_MS
+
+    if '--ladder' in sys.argv:
+        # Default degradation ladder (s -> n -> n@320), model_path is ignored
+        worker = DetectionWorker(ladder=build_default_ladder())
+    else:
+        detector = FireDetectionYOLO()
+        if not detector.load_trained_model(model_path):
+            sys.exit(1)
+        worker = DetectionWorker(detector)
+    if not os.path.isdir(images_dir):
+        print(f"❌ Images folder not found: {images_dir}")
+        sys.exit(1)
+
+    images = [os.path.join(images_dir, f) for f in sorted(os.listdir(images_dir))
+              if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+    print(f"🚦 Submitting {len(images)} requests at once (deadline {deadline_ms:.0f} ms)")
+
+    with worker:
+        futures = []
+        for image in images:
+            try:
+                futures.append(worker.submit(image, deadline_ms=deadline_ms))
+            except OverloadError as e:
+                print(f"   ⏹️  {e.status_code}: {e}")
+        for future in futures:
+            try:
+                future.result()
+            except OverloadError:
+                pass
+        metrics = worker.metrics()
+
+    print(f"\n📊 Worker metrics:")
+    for key, value in metrics.items():
+        print(f"   {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
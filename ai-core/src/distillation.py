@@ -0,0 +1,221 @@
+"""
+🎓 Knowledge Distillation: YOLOv8s/m Teacher -> YOLOv8n Student
+The trained teacher's head outputs guide the nano model during training
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+import torch
+import torch.nn.functional as F
+from ultralytics import YOLO
+from dataset_manifest import DatasetManifest
+
+
+def _head_outputs(preds, reg_max, nc):
+    """
+    Normalize Detect head outputs to (box_logits [B, N, 4*reg_max], cls_logits [B, N, nc])
+
+    Handles the per-level feature map list (train mode), the (y, x) eval tuple
+    and the dict layout used by newer Ultralytics releases.
+    """
+    if isinstance(preds, tuple):
+        preds = preds[1]
+    if isinstance(preds, dict):
+        preds = preds.get('one2many', preds)
+        return preds['boxes'].permute(0, 2, 1), preds['scores'].permute(0, 2, 1)
+
+    batch = preds[0].shape[0]
+    flat = torch.cat([p.view(batch, 4 * reg_max + nc, -1) for p in preds], dim=2)
+    box, cls = flat.split((4 * reg_max, nc), dim=1)
+    return box.permute(0, 2, 1), cls.permute(0, 2, 1)
+
+
+class DistillationLoss:
+    """
+    Detection loss + teacher guidance
+
+    - classification: BCE between student logits and teacher probabilities (temperature T)
+    - box: KL between teacher and student DFL distributions, weighted by teacher confidence
+    """
+
+    def __init__(self, base_criterion, student, teacher, kd_weight=1.0, temperature=2.0):
+        self.base = base_criterion
+        self.teacher = teacher
+        self.kd_weight = kd_weight
+        self.temperature = temperature
+        head = student.model[-1]
+        self.reg_max, self.nc = head.reg_max, head.nc
+        self.last_kd = 0.0
+
+    def __getattr__(self, name):
+        # Trainer hooks (update(), hyp, ...) go to the wrapped criterion. copy/pickle probe
+        # dunders and set attributes on an empty instance, where 'base' does not exist yet
+        if name == 'base' or (name.startswith('__') and name.endswith('__')):
+            raise AttributeError(name)
+        return getattr(self.base, name)
+
+    def kd_loss(self, student_preds, teacher_preds):
+        T = self.temperature
+        s_box, s_cls = _head_outputs(student_preds, self.reg_max, self.nc)
+        t_box, t_cls = _head_outputs(teacher_preds, self.reg_max, self.nc)
+
+        t_prob = torch.sigmoid(t_cls.float() / T)
+        cls_kd = F.binary_cross_entropy_with_logits(s_cls.float() / T, t_prob, reduction='none').sum(-1).mean() * T * T
+
+        b, n = s_box.shape[:2]
+        s_dist = F.log_softmax(s_box.float().view(b, n, 4, self.reg_max) / T, dim=-1)
+        t_dist = F.softmax(t_box.float().view(b, n, 4, self.reg_max) / T, dim=-1)
+        box_kl = (t_dist * (torch.log(t_dist + 1e-9) - s_dist)).sum(-1).mean(-1)  # [B, N]
+        weight = t_prob.max(-1).values
+        box_kd = (box_kl * weight).sum() / weight.sum().clamp(min=1.0) * T * T
+
+        return cls_kd + box_kd
+
+    def __call__(self, preds, batch):
+        loss, loss_items = self.base(preds, batch)
+        with torch.no_grad():
+            teacher_preds = self.teacher(batch['img'])
+        kd = self.kd_loss(preds, teacher_preds)
+        self.last_kd = float(kd.detach())
+        # Detection losses are scaled by batch size (scalar or per-component vector)
+        batch_size = batch['img'].shape[0]
+        loss = loss + (self.kd_weight * kd * batch_size) / loss.numel()
+        return loss, loss_items
+
+
+def load_teacher(weights, device):
+    """Frozen teacher model in eval mode"""
+    teacher = YOLO(weights).model.float().to(device).eval()
+    for p in teacher.parameters():
+        p.requires_grad = False
+    return teacher
+
+
+def attach_distillation(model, teacher_weights, kd_weight=1.0, temperature=2.0):
+    """
+    Turn model.train() into distillation training
+
+    The teacher is attached at train start (after the EMA copy is made),
+    so saved checkpoints stay plain, standard-loadable YOLO weights.
+    """
+    def on_train_start(trainer):
+        student = trainer.model.module if hasattr(trainer.model, 'module') else trainer.model
+        teacher = load_teacher(teacher_weights, trainer.device)
+
+        s_head, t_head = student.model[-1], teacher.model[-1]
+        if (s_head.nc, s_head.reg_max) != (t_head.nc, t_head.reg_max) or not torch.equal(
+                s_head.stride.cpu(), t_head.stride.cpu()):
+            raise ValueError("Teacher and student must share classes, reg_max and strides")
+
+        student.criterion = DistillationLoss(student.init_criterion(), student, teacher, kd_weight, temperature)
+        print(f"🎓 Distillation enabled: teacher={teacher_weights} kd_weight={kd_weight} T={temperature}")
+
+    model.add_callback("on_train_start", on_train_start)
+    return model
+
+
+def measure_cpu_latency(weights, image_paths, img_size=640, warmup=3):
+    """Median / p95 single-image CPU latency in milliseconds"""
+    model = YOLO(weights)
+    for path in image_paths[:warmup]:
+        model.predict(path, imgsz=img_size, device='cpu', verbose=False)
+
+    timings = []
+    for path in image_paths:
+        start = time.perf_counter()
+        model.predict(path, imgsz=img_size, device='cpu', verbose=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), float(np.percentile(timings, 95))
+
+
+def evaluate_model(weights, data_yaml, image_paths, img_size=640):
+    """mAP on the validation split plus measured CPU latency"""
+    metrics = YOLO(weights).val(data=data_yaml, imgsz=img_size, device='cpu', plots=False, verbose=False)
+    median_ms, p95_ms = measure_cpu_latency(weights, image_paths, img_size)
+    return {
+        'weights': str(weights),
+        'map50': float(metrics.box.map50),
+        'map50_95': float(metrics.box.map),
+        'cpu_latency_ms': round(median_ms, 2),
+        'cpu_latency_p95_ms': round(p95_ms, 2),
+    }
+
+
+def comparison_report(models, dataset_path="datasets/wildfire", img_size=640, latency_images=50,
+                      output_dir="runs/distillation"):
+    """
+    Compare teacher, distilled student and plain nano on mAP and CPU latency
+    models: {name: weights path}; missing weights are skipped
+    """
+    data_yaml = os.path.join(dataset_path, 'data.yaml')
+    manifest = DatasetManifest(dataset_path)
+    manifest.refresh()
+    image_paths = manifest.stratified_sample(latency_images, split='test')
+    if not image_paths:
+        image_paths = manifest.stratified_sample(latency_images, split='valid')
+    if not image_paths:
+        raise ValueError(f"No test/valid images to time in {dataset_path}")
+
+    report = {'timestamp': datetime.now().isoformat(), 'img_size': img_size, 'models': {}}
+    for name, weights in models.items():
+        if not weights or not os.path.exists(weights):
+            print(f"⚠️  Skipping {name}: weights not found ({weights})")
+            continue
+        print(f"📏 Evaluating {name}: {weights}")
+        report['models'][name] = evaluate_model(weights, data_yaml, image_paths, img_size)
+
+    print(f"\n📊 DISTILLATION REPORT")
+    print(f"   {'Model':<18} {'mAP50':>8} {'mAP50-95':>9} {'CPU ms':>8} {'p95 ms':>8}")
+    for name, row in report['models'].items():
+        print(f"   {name:<18} {row['map50']:>8.3f} {row['map50_95']:>9.3f} "
+              f"{row['cpu_latency_ms']:>8.1f} {row['cpu_latency_p95_ms']:>8.1f}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, f"distillation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Report saved to: {report_path}")
+    return report
+
+
+def main():
+    """Train a distilled nano student and compare it with the teacher and a plain nano"""
+    from yolo_fire_detection import FireDetectionYOLO
+
+    parser = argparse.ArgumentParser(description="Distill a trained YOLOv8s/m fire detector into YOLOv8n")
+    parser.add_argument('--teacher', required=True, help="Trained teacher weights (yolov8s/m best.pt)")
+    parser.add_argument('--baseline', default="runs/detect/fire_detection_yolo/weights/best.pt",
+                        help="Plain-trained nano weights for the comparison")
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--kd-weight', type=float, default=1.0)
+    parser.add_argument('--temperature', type=float, default=2.0)
+    parser.add_argument('--report-only', metavar='STUDENT', help="Skip training, report on these student weights")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.teacher):
+        print(f"❌ Teacher weights not found: {args.teacher}")
+        print("💡 Train one first: FireDetectionYOLO().train_model(model_size='s')")
+        sys.exit(1)
+
+    student_weights = args.report_only
+    if not student_weights:
+        detector = FireDetectionYOLO()
+        if not detector.train_model(epochs=args.epochs, teacher_weights=args.teacher,
+                                    kd_weight=args.kd_weight, temperature=args.temperature):
+            sys.exit(1)
+        student_weights = detector.trained_model_path
+
+    comparison_report({
+        'teacher': args.teacher,
+        'student (distilled)': student_weights,
+        'nano (plain)': args.baseline,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+🔬 Parallel Hyperparameter Search (ASHA) for YOLOv8 Fire Detection
+Many short trials in a process pool; only promising configs get longer budgets
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import sqlite3
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+# name: (low, high, log scale)
+SEARCH_SPACE = {
+    'hsv_h': (0.0, 0.05, False),
+    'hsv_s': (0.3, 0.9, False),
+    'hsv_v': (0.2, 0.6, False),
+    'degrees': (0.0, 20.0, False),
+    'translate': (0.0, 0.25, False),
+    'scale': (0.2, 0.8, False),
+    'fliplr': (0.0, 0.5, False),
+    'lr0': (1e-3, 3e-2, True),
+    'lrf': (0.01, 0.3, True),
+    'momentum': (0.8, 0.98, False),
+    'weight_decay': (1e-5, 1e-3, True),
+}
+
+FITNESS_KEY = 'metrics/mAP50-95(B)'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    trial_id INTEGER NOT NULL,
+    rung INTEGER NOT NULL,
+    epochs INTEGER NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    fitness REAL,
+    map50 REAL,
+    map50_95 REAL,
+    precision REAL,
+    recall REAL,
+    weights TEXT,
+    duration_s REAL,
+    error TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    PRIMARY KEY (trial_id, rung)
+)
+"""
+
+
+def sample_params(rng):
+    """Random configuration from SEARCH_SPACE"""
+    params = {}
+    for name, (low, high, log) in SEARCH_SPACE.items():
+        if log:
+            value = math.exp(rng.uniform(math.log(low), math.log(high)))
+        else:
+            value = rng.uniform(low, high)
+        params[name] = round(value, 6)
+    return params
+
+
+def rung_budgets(min_epochs, max_epochs, eta):
+    """Epoch budget of each rung: min, min*eta, ... capped at max"""
+    budgets = [min_epochs]
+    while budgets[-1] * eta <= max_epochs:
+        budgets.append(budgets[-1] * eta)
+    return budgets
+
+
+class ResultsTable:
+    """SQLite table holding every trial of a study (one row per trial and rung)"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def recover_interrupted(self):
+        """Trials left 'running' by a killed search are run again"""
+        cur = self.conn.execute("UPDATE trials SET status = 'pending' WHERE status = 'running'")
+        self.conn.commit()
+        return cur.rowcount
+
+    def add(self, trial_id, rung, epochs, params):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO trials (trial_id, rung, epochs, params, status) VALUES (?, ?, ?, ?, 'pending')",
+            (trial_id, rung, epochs, json.dumps(params)))
+        self.conn.commit()
+
+    def mark_running(self, trial_id, rung):
+        self.conn.execute("UPDATE trials SET status = 'running', started_at = ? WHERE trial_id = ? AND rung = ?",
+                          (datetime.now().isoformat(), trial_id, rung))
+        self.conn.commit()
+
+    def record(self, result):
+        self.conn.execute(
+            """UPDATE trials SET status = ?, fitness = ?, map50 = ?, map50_95 = ?, precision = ?, recall = ?,
+                   weights = ?, duration_s = ?, error = ?, finished_at = ?
+               WHERE trial_id = ? AND rung = ?""",
+            (result['status'], result.get('fitness'), result.get('map50'), result.get('map50_95'),
+             result.get('precision'), result.get('recall'), result.get('weights'), result.get('duration_s'),
+             result.get('error'), datetime.now().isoformat(), result['trial_id'], result['rung']))
+        self.conn.commit()
+
+    def rows(self, where="1 = 1", args=()):
+        return [dict(r) for r in self.conn.execute(f"SELECT * FROM trials WHERE {where} ORDER BY trial_id, rung", args)]
+
+    def next_trial_id(self):
+        value = self.conn.execute("SELECT MAX(trial_id) FROM trials").fetchone()[0]
+        return 0 if value is None else value + 1
+
+
+class ASHAScheduler:
+    """
+    Asynchronous successive halving
+
+    A finished trial at rung k is promoted to rung k+1 when it ranks in the top
+    1/eta of all finished trials at rung k; otherwise a new config starts at rung 0.
+    """
+
+    def __init__(self, table, budgets, eta, n_trials, seed=0):
+        self.table = table
+        self.budgets = budgets
+        self.eta = eta
+        self.n_trials = n_trials
+        self.rng = random.Random(seed)
+        # Skip the random draws already consumed by a previous (interrupted) run:
+        # one per trial created so far, except trial 0 (hand-set, no draw)
+        for _ in range(max(0, table.next_trial_id() - 1)):
+            sample_params(self.rng)
+
+    def _promotable(self, rung):
+        done = self.table.rows("rung = ? AND status = 'done'", (rung,))
+        if not done:
+            return None
+        done.sort(key=lambda r: r['fitness'], reverse=True)
+        top_k = len(done) // self.eta
+        promoted = {r['trial_id'] for r in self.table.rows("rung = ?", (rung + 1,))}
+        for row in done[:top_k]:
+            if row['trial_id'] not in promoted:
+                return row
+        return None
+
+    def next_job(self):
+        """Next (trial_id, rung) to run, or None if nothing can start right now"""
+        pending = self.table.rows("status = 'pending'")
+        if pending:
+            return pending[0]
+
+        for rung in reversed(range(len(self.budgets) - 1)):
+            row = self._promotable(rung)
+            if row is not None:
+                self.table.add(row['trial_id'], rung + 1, self.budgets[rung + 1], json.loads(row['params']))
+                return self.table.rows("trial_id = ? AND rung = ?", (row['trial_id'], rung + 1))[0]
+
+        trial_id = self.table.next_trial_id()
+        if trial_id >= self.n_trials:
+            return None
+        # Trial 0 is the current hand-set configuration, as a reference point
+        if trial_id == 0:
+            # Imported here, not at module level: spawn workers re-import this module and
+            # torch (pulled in by yolo_fire_detection) must not load before _init_worker runs
+            from yolo_fire_detection import TRAINING_HYPERPARAMETERS
+            params = dict(TRAINING_HYPERPARAMETERS)
+        else:
+            params = sample_params(self.rng)
+        self.table.add(trial_id, 0, self.budgets[0], params)
+        return self.table.rows("trial_id = ? AND rung = 0", (trial_id,))[0]
+
+
+def _init_worker(threads):
+    """Per-process CPU budget for a trial (the env vars only apply if torch is not loaded yet)"""
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['MKL_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+
+def run_trial(job, data_yaml, study_dir, weights, img_size, batch_size, previous_weights):
+    """
+    Train one (trial, rung) and return its metrics
+    Promoted trials continue from the weights of their previous rung
+    No workers setting: Ultralytics loads batches in the main process (workers=0) on CPU
+    """
+    from ultralytics import YOLO
+
+    trial_id, rung = job['trial_id'], job['rung']
+    params = json.loads(job['params'])
+    start = time.time()
+    result = {'trial_id': trial_id, 'rung': rung}
+
+    try:
+        epochs = job['epochs']
+        init_weights = weights
+        extra = {}
+        if previous_weights and os.path.exists(previous_weights):
+            init_weights = previous_weights
+            epochs = job['epochs'] - job['previous_epochs']
+            extra['warmup_epochs'] = 0
+
+        model = YOLO(init_weights)
+        metrics = model.train(
+            data=data_yaml,
+            epochs=epochs,
+            imgsz=img_size,
+            batch=batch_size,
+            device='cpu',
+            project=study_dir,
+            name=f"trial_{trial_id:04d}_rung{rung}",
+            exist_ok=True,
+            plots=False,
+            verbose=False,
+            seed=trial_id,
+            **params,
+            **extra,
+        )
+        values = metrics.results_dict
+        result.update({
+            'status': 'done',
+            'fitness': float(values.get(FITNESS_KEY, 0.0)),
+            'map50': float(values.get('metrics/mAP50(B)', 0.0)),
+            'map50_95': float(values.get('metrics/mAP50-95(B)', 0.0)),
+            'precision': float(values.get('metrics/precision(B)', 0.0)),
+            'recall': float(values.get('metrics/recall(B)', 0.0)),
+            'weights': str(model.trainer.last),
+        })
+    except Exception as e:
+        result.update({'status': 'failed', 'error': str(e)})
+
+    result['duration_s'] = round(time.time() - start, 1)
+    return result
+
+
+def run_search(data_yaml="datasets/wildfire/data.yaml", study="fire_asha", n_trials=27, parallel=2,
+               threads_per_trial=None, min_epochs=3, max_epochs=27, eta=3, weights='yolov8n.pt',
+               img_size=640, batch_size=8, seed=0):
+    """
+    Run (or resume) an ASHA study; all trial metrics go to runs/hpsearch/<study>/results.db
+    """
+    study_dir = os.path.abspath(os.path.join("runs", "hpsearch", study))
+    table = ResultsTable(os.path.join(study_dir, "results.db"))
+    budgets = rung_budgets(min_epochs, max_epochs, eta)
+    threads_per_trial = threads_per_trial or max(1, (os.cpu_count() or 1) // parallel)
+
+    recovered = table.recover_interrupted()
+    print(f"🔬 ASHA search '{study}': {n_trials} trials, rungs {budgets} epochs, eta={eta}")
+    print(f"   {parallel} parallel trials x {threads_per_trial} CPU threads")
+    if recovered:
+        print(f"   ♻️  Resuming: {recovered} interrupted trial(s) will run again")
+
+    scheduler = ASHAScheduler(table, budgets, eta, n_trials, seed=seed)
+    context = multiprocessing.get_context('spawn')
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=parallel, mp_context=context,
+                             initializer=_init_worker, initargs=(threads_per_trial,)) as pool:
+        while True:
+            while len(running) < parallel:
+                job = scheduler.next_job()
+                if job is None:
+                    break
+                previous = table.rows("trial_id = ? AND rung = ?", (job['trial_id'], job['rung'] - 1))
+                job['previous_epochs'] = previous[0]['epochs'] if previous else 0
+                previous_weights = previous[0]['weights'] if previous else None
+                table.mark_running(job['trial_id'], job['rung'])
+                future = pool.submit(run_trial, job, data_yaml, study_dir, weights, img_size,
+                                     batch_size, previous_weights)
+                running[future] = job
+                print(f"▶️  Trial {job['trial_id']} rung {job['rung']} ({job['epochs']} epochs)")
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                job = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'trial_id': job['trial_id'], 'rung': job['rung'], 'status': 'failed', 'error': str(e)}
+                table.record(result)
+                if result['status'] == 'done':
+                    print(f"✅ Trial {job['trial_id']} rung {job['rung']}: fitness={result['fitness']:.4f} "
+                          f"({result['duration_s']}s)")
+                else:
+                    print(f"❌ Trial {job['trial_id']} rung {job['rung']} failed: {result.get('error')}")
+
+    return summarize(table, study_dir)
+
+
+def summarize(table, study_dir, top=5):
+    """Print the best trials and save the best configuration as JSON"""
+    done = table.rows("status = 'done'")
+    if not done:
+        print("❌ No finished trials")
+        return None
+
+    # Rank by highest rung reached first, then fitness
+    done.sort(key=lambda r: (r['rung'], r['fitness']), reverse=True)
+    print(f"\n🏆 Top {min(top, len(done))} trials:")
+    for row in done[:top]:
+        print(f"   Trial {row['trial_id']:>3} rung {row['rung']} ({row['epochs']} ep): "
+              f"mAP50-95={row['map50_95']:.4f} mAP50={row['map50']:.4f}")
+
+    best = done[0]
+    best_path = os.path.join(study_dir, "best_hyperparameters.json")
+    with open(best_path, 'w', encoding='utf-8') as f:
+        json.dump({'trial_id': best['trial_id'], 'rung': best['rung'], 'epochs': best['epochs'],
+                   'fitness': best['fitness'], 'hyperparameters': json.loads(best['params'])}, f, indent=2)
+    print(f"📄 Best configuration saved to: {best_path}")
+    print("💡 Use it with: FireDetectionYOLO().train_model(hyperparameters=...)")
+    return best
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="ASHA hyperparameter search for YOLOv8 fire detection")
+    parser.add_argument('--data', default="datasets/wildfire/data.yaml")
+    parser.add_argument('--study', default="fire_asha")
+    parser.add_argument('--trials', type=int, default=27)
+    parser.add_argument('--parallel', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=None, help="CPU threads per trial")
+    parser.add_argument('--min-epochs', type=int, default=3)
+    parser.add_argument('--max-epochs', type=int, default=27)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--weights', default='yolov8n.pt')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--batch', type=int, default=8)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"❌ Dataset config not found: {args.data}")
+        sys.exit(1)
+
+    run_search(args.data, args.study, args.trials, args.parallel, args.threads, args.min_epochs,
+               args.max_epochs, args.eta, args.weights, args.imgsz, args.batch)
+
+
+if __name__ == "__main__":
+    main()
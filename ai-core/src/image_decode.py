@@ -0,0 +1,101 @@
+"""
+🖼️ Reduced-Size JPEG Decoding
+Decodes large JPEGs at 1/2, 1/4 or 1/8 scale (libjpeg DCT scaling) when the model input is smaller
+"""
+
+import struct
+from pathlib import Path
+import cv2
+
+JPEG_EXTENSIONS = {'.jpg', '.jpeg', '.jpe', '.jfif'}
+REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+# Start-of-frame markers (C4 = DHT, C8 = JPG extension, CC = DAC are not frames)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(path):
+    """(width, height) read from the JPEG frame header without decoding, None if it is not a JPEG"""
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            return None
+        while True:
+            byte = f.read(1)
+            if not byte:
+                return None
+            if byte != b'\xff':
+                continue
+            marker = f.read(1)
+            while marker == b'\xff':
+                marker = f.read(1)
+            if not marker:
+                return None
+            code = marker[0]
+            if code in (0x00, 0x01, 0xD8) or 0xD0 <= code <= 0xD7:
+                continue  # stuffed byte / markers without a length
+            length = struct.unpack('>H', f.read(2))[0]
+            if code in SOF_MARKERS:
+                _, height, width = struct.unpack('>BHH', f.read(5))
+                return width, height
+            f.seek(length - 2, 1)
+
+
+def reduction_factor(width, height, target_size):
+    """Largest DCT scale (8, 4, 2 or 1) whose output still has a long side >= target_size"""
+    long_side = max(width, height)
+    for factor, _ in REDUCED_FLAGS:
+        if -(-long_side // factor) >= target_size:
+            return factor
+    return 1
+
+
+def load_image(path, target_size=None):
+    """
+    BGR image and the (sx, sy) factors mapping its pixels back to the original resolution
+    JPEGs are decoded at the smallest DCT scale covering target_size; other formats
+    (or no target) are decoded in full with scale (1.0, 1.0).
+    """
+    path = str(path)
+    factor = 1
+    if target_size and Path(path).suffix.lower() in JPEG_EXTENSIONS:
+        size = jpeg_size(path)
+        if size:
+            factor = reduction_factor(size[0], size[1], target_size)
+
+    if factor == 1:
+        image = cv2.imread(path)
+        return image, (1.0, 1.0)
+
+    image = cv2.imread(path, dict(REDUCED_FLAGS)[factor])
+    if image is None:
+        return None, (1.0, 1.0)
+    width, height = size
+    # imread applies the EXIF orientation, which may swap the header's width and height
+    if (image.shape[1] >= image.shape[0]) != (width >= height):
+        width, height = height, width
+    return image, (width / image.shape[1], height / image.shape[0])
+
+
+def main():
+    """Compare full and reduced decode of a JPEG: python src/image_decode.py <image.jpg> [target_size]"""
+    import sys
+    import time
+    import tracemalloc
+
+    if len(sys.argv) < 2:
+        print("Usage: python src/image_decode.py <image.jpg> [target_size]")
+        sys.exit(1)
+    path, target = sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 640
+
+    for label, size in (('full', None), ('reduced', target)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        image, scale = load_image(path, size)
+        elapsed = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:>8}: {image.shape[1]}x{image.shape[0]} in {elapsed:.1f} ms, "
+              f"{image.nbytes / 1e6:.1f} MB pixels (peak traced {peak / 1e6:.1f} MB), scale {scale[0]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+🏭 Pipelined Detection Runner
+read -> decode (thread pool) -> batched inference -> postprocess (thread pool),
+connected by bounded queues, with per-stage utilization
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+QUEUE_SIZE = 16      # items per inter-stage queue: bounds memory and applies backpressure
+BATCH_TIMEOUT_S = 0.01  # how long inference waits to fill a batch once it has one item
+_END = object()
+
+
+def resolve_backend(backend, model_path):
+    """'auto' -> 'torch' for .pt weights (or the default model), 'ultralytics' for exported ones"""
+    if backend != 'auto':
+        return backend
+    return 'torch' if model_path is None or str(model_path).endswith('.pt') else 'ultralytics'
+
+
+class PipelineItem:
+    """One source flowing through the stages; a failed stage sets error and later stages skip it"""
+
+    __slots__ = ('index', 'source', 'data', 'result', 'output', 'error')
+
+    def __init__(self, index, source):
+        self.index = index
+        self.source = source
+        self.data = None     # decode output
+        self.result = None   # inference output
+        self.output = None   # postprocess output
+        self.error = None
+
+
+class StageStats:
+    """Busy time and time blocked on the input/output queues of one stage"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_s = 0.0
+        self.wait_input_s = 0.0
+        self.wait_output_s = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, busy=0.0, wait_input=0.0, wait_output=0.0, items=0, errors=0):
+        with self._lock:
+            self.busy_s += busy
+            self.wait_input_s += wait_input
+            self.wait_output_s += wait_output
+            self.items += items
+            self.errors += errors
+
+    def report(self, wall_s):
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'errors': self.errors,
+            'busy_s': round(self.busy_s, 3),
+            'utilization': round(self.busy_s / (wall_s * self.workers), 3) if wall_s else 0.0,
+            'wait_input_s': round(self.wait_input_s, 3),
+            'wait_output_s': round(self.wait_output_s, 3),
+        }
+
+
+class Pipeline:
+    """
+    Runs decode(source) -> infer([data, ...]) -> postprocess(item) over an iterable of sources
+
+    decode and postprocess run on thread pools (OpenCV and NumPy release the GIL);
+    infer runs on one thread that owns the model and gets batches of up to
+    batch_size decoded items. Every queue is bounded, so a slow stage blocks the
+    ones before it instead of piling up decoded frames. run() yields finished
+    PipelineItems in source order (ordered=True) or as they complete; report()
+    shows each stage's utilization, and the busiest one is the bottleneck.
+    """
+
+    def __init__(self, decode, infer, postprocess=None, decode_workers=2, post_workers=1, batch_size=4,
+                 queue_size=QUEUE_SIZE, ordered=True):
+        self.decode = decode
+        self.infer = infer
+        self.postprocess = postprocess
+        self.decode_workers = max(1, decode_workers)
+        self.post_workers = max(1, post_workers)
+        self.batch_size = max(1, batch_size)
+        self.queue_size = queue_size
+        self.ordered = ordered
+        self.stats = {}
+        self.wall_s = 0.0
+
+    # Queue helpers: block in short slices so a stopped pipeline never hangs
+    # ------------------------------------------------------------------
+
+    def _put(self, q, item, stats):
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.add(wait_output=time.perf_counter() - start)
+
+    def _get(self, q, stats, timeout=None):
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        try:
+            while not self._stop.is_set():
+                remaining = 0.1 if deadline is None else min(0.1, deadline - time.perf_counter())
+                if remaining <= 0:
+                    return None
+                try:
+                    return q.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+            return _END
+        finally:
+            stats.add(wait_input=time.perf_counter() - start)
+
+    def _finish_worker(self, stage, out_q):
+        """The last worker of a stage to see the end marker forwards it"""
+        with self._lock:
+            self._running[stage] -= 1
+            last = self._running[stage] == 0
+        if last:
+            self._put(out_q, _END, self.stats[stage])
+
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _read(self, sources, out_q):
+        stats = self.stats['read']
+        try:
+            for index, source in enumerate(sources):
+                if self._stop.is_set():
+                    break
+                stats.add(items=1)
+                self._put(out_q, PipelineItem(index, source), stats)
+        finally:
+            self._put(out_q, _END, stats)
+
+    def _map_worker(self, stage, fn, in_q, out_q):
+        stats = self.stats[stage]
+        while True:
+            item = self._get(in_q, stats)
+            if item is _END:
+                self._put(in_q, _END, stats)  # let the sibling workers see it too
+                break
+            if item.error is None and fn is not None:
+                start = time.perf_counter()
+                try:
+                    if stage == 'decode':
+                        item.data = fn(item.source)
+                    else:
+                        item.output = fn(item)
+                        item.data = None  # release the decoded frame as soon as possible
+                except Exception as e:
+                    item.error = f"{stage}: {e}"
+                    stats.add(errors=1)
+                stats.add(busy=time.perf_counter() - start, items=1)
+            self._put(out_q, item, stats)
+        self._finish_worker(stage, out_q)
+
+    def _infer_worker(self, in_q, out_q):
+        stats = self.stats['infer']
+        done = False
+        while not done:
+            first = self._get(in_q, stats)
+            if first is _END:
+                break
+            batch = [first]
+            while len(batch) < self.batch_size:
+                item = self._get(in_q, stats, timeout=BATCH_TIMEOUT_S)
+                if item is None:
+                    break
+                if item is _END:
+                    done = True
+                    break
+                batch.append(item)
+
+            ready = [item for item in batch if item.error is None]
+            if ready:
+                start = time.perf_counter()
+                try:
+                    for item, result in zip(ready, self.infer([item.data for item in ready])):
+                        item.result = result
+                except Exception as e:
+                    for item in ready:
+                        item.error = f"infer: {e}"
+                    stats.add(errors=len(ready))
+                stats.add(busy=time.perf_counter() - start, items=len(ready))
+            for item in batch:
+                self._put(out_q, item, stats)
+        self._put(out_q, _END, stats)
+
+    # Public API
+    # ------------------------------------------------------------------
+
+    def run(self, sources):
+        """Yield finished PipelineItems (check item.error); stops the workers if the caller stops early"""
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._running = {'decode': self.decode_workers, 'post': self.post_workers}
+        self.stats = {'read': StageStats('read', 1), 'decode': StageStats('decode', self.decode_workers),
+                      'infer': StageStats('infer', 1), 'post': StageStats('post', self.post_workers)}
+        read_q, decoded_q, inferred_q, done_q = (queue.Queue(self.queue_size) for _ in range(4))
+
+        threads = [threading.Thread(target=self._read, args=(sources, read_q), daemon=True),
+                   threading.Thread(target=self._infer_worker, args=(decoded_q, inferred_q), daemon=True)]
+        threads += [threading.Thread(target=self._map_worker, args=('decode', self.decode, read_q, decoded_q),
+                                     daemon=True) for _ in range(self.decode_workers)]
+        threads += [threading.Thread(target=self._map_worker, args=('post', self.postprocess, inferred_q, done_q),
+                                     daemon=True) for _ in range(self.post_workers)]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        pending = {}
+        next_index = 0
+        try:
+            while True:
+                item = done_q.get()
+                if item is _END:
+                    break
+                if not self.ordered:
+                    yield item
+                    continue
+                pending[item.index] = item
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=1.0)
+            self.wall_s = time.perf_counter() - started
+
+    def report(self):
+        """Per-stage utilization of the last run and the bottleneck stage"""
+        stages = {name: stats.report(self.wall_s) for name, stats in self.stats.items()}
+        working = {name: s for name, s in stages.items() if name != 'read'}
+        return {
+            'wall_s': round(self.wall_s, 3),
+            'items': stages['post']['items'] if stages else 0,
+            'stages': stages,
+            'bottleneck': max(working, key=lambda name: working[name]['utilization']) if working else None,
+        }
+
+
+def detection_pipeline(detector, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD, img_size=config.YOLO_INPUT_SIZE,
+                       batch_size=4, decode_workers=2, post_workers=1, ordered=True, iou_threshold=None,
+                       backend='torch'):
+    """
+    Pipeline over image paths: reduced-size JPEG decode, batched inference, detections
+    mapped back to the original resolution (before rounding, as detect_fire does). item.output is
+    {'source', 'fire_detected', 'confidence', 'detections'}.
+
+    backend 'torch' runs the PyTorch network on pooled batches (PooledDetector);
+    'ultralytics' calls detect_fire() per image, which also serves exported
+    weights (.onnx, .torchscript, ...) loaded by ultralytics.
+    """
+    from image_decode import load_image
+    from preprocess import PooledDetector, NMS_IOU
+
+    if backend == 'torch':
+        pooled = PooledDetector(detector, img_size, iou_threshold=iou_threshold or NMS_IOU)
+
+        def infer(decoded):
+            return pooled.detect([image for image, _ in decoded], conf_threshold, [scale for _, scale in decoded])
+    elif backend == 'ultralytics':
+        def infer(decoded):
+            return [detector.detect_fire(image, conf_threshold, img_size=img_size, verbose=False,
+                                         iou_threshold=iou_threshold, decode_scale=scale) for image, scale in decoded]
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    def decode(path):
+        image, scale = load_image(path, img_size)
+        if image is None:
+            raise ValueError(f"Cannot read image: {path}")
+        return image, scale
+
+    def postprocess(item):
+        detections = item.result
+        if detections is None:
+            raise ValueError("Detection failed")
+        return {
+            'source': str(item.source),
+            'fire_detected': bool(detections),
+            'confidence': max((d['confidence'] for d in detections), default=0.0),
+            'detections': detections,
+        }
+
+    return Pipeline(decode, infer, postprocess, decode_workers, post_workers, batch_size, ordered=ordered)
+
+
+def main():
+    """Run the detection pipeline over images and print the stage report"""
+    import json
+    import glob
+    import argparse
+    from yolo_fire_detection import FireDetectionYOLO
+
+    p = argparse.ArgumentParser(description='Pipelined fire detection over images')
+    p.add_argument('paths', nargs='+', help='images or folders')
+    p.add_argument('--model', default=None)
+    p.add_argument('--conf', type=float, default=config.YOLO_CONFIDENCE_THRESHOLD)
+    p.add_argument('--batch', type=int, default=4)
+    p.add_argument('--decode-workers', type=int, default=2)
+    p.add_argument('--post-workers', type=int, default=1)
+    args = p.parse_args()
+
+    images = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            images += sorted(f for f in glob.glob(os.path.join(path, '*'))
+                             if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        else:
+            images.append(path)
+
+    detector = FireDetectionYOLO()
+    if not detector.load_trained_model(args.model):
+        sys.exit(1)
+
+    pipeline = detection_pipeline(detector, args.conf, batch_size=args.batch, decode_workers=args.decode_workers,
+                                  post_workers=args.post_workers)
+    with_fire = failed = 0
+    for item in pipeline.run(images):
+        if item.error:
+            failed += 1
+            print(f"❌ {item.source}: {item.error}")
+        elif item.output['fire_detected']:
+            with_fire += 1
+    print(f"📊 {len(images)} images, {with_fire} with fire, {failed} failed")
+    print(json.dumps(pipeline.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+🧮 Pooled Letterbox Preprocessing
+Letterbox + normalize frames in place into preallocated input tensors (no per-frame allocations)
+"""
+
+import os
+import sys
+import threading
+from collections import namedtuple
+import numpy as np
+import cv2
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+try:
+    from ultralytics.utils.nms import non_max_suppression
+except ImportError:  # ultralytics < 8.3.150
+    from ultralytics.utils.ops import non_max_suppression
+
+PAD_VALUE = 114  # grey padding, as in ultralytics' LetterBox
+STRIDE = 32
+NMS_IOU = 0.7  # ultralytics predictor default, so results match detect_fire()
+
+LetterboxInfo = namedtuple('LetterboxInfo', 'scale pad_x pad_y width height')
+
+
+class BufferPool:
+    """
+    Free lists of preallocated arrays keyed by (shape, dtype)
+
+    acquire() only allocates when no free array of that shape is left, so after the
+    first few batches `allocations` stops growing; stats() exposes the counters.
+    """
+
+    def __init__(self, max_free_per_shape=4):
+        self.max_free_per_shape = max_free_per_shape
+        self._free = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.acquires = 0
+        self.releases = 0
+
+    def acquire(self, shape, dtype=np.float32):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            self.acquires += 1
+            free = self._free.get(key)
+            if free:
+                return free.pop()
+            self.allocations += 1
+        buffer = np.empty(shape, dtype=dtype)
+        with self._lock:
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def release(self, buffer):
+        key = (buffer.shape, buffer.dtype.str)
+        with self._lock:
+            self.releases += 1
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_free_per_shape:
+                free.append(buffer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allocations': self.allocations,
+                'allocated_mb': round(self.allocated_bytes / 1e6, 2),
+                'acquires': self.acquires,
+                'releases': self.releases,
+                'reuse_ratio': round(1 - self.allocations / self.acquires, 4) if self.acquires else None,
+            }
+
+
+class LetterboxPreprocessor:
+    """
+    Frames -> (batch, 3, H, W) float32 RGB tensor in [0, 1], written in place
+
+    The long side is scaled to `size`; with rect=True (as the ultralytics predictor)
+    the short side is only padded up to a multiple of the stride, otherwise to `size`.
+    Each frame is resized straight into a persistent uint8 canvas (only the borders
+    are repainted), then converted with one vectorized multiply from a
+    BGR->RGB/HWC->CHW view into its slot of a pooled batch tensor. One preprocessor
+    per thread: canvases are reused between calls.
+    """
+
+    def __init__(self, size=config.YOLO_INPUT_SIZE, pool=None, pad_value=PAD_VALUE, rect=True):
+        if size % STRIDE:
+            raise ValueError(f"Input size must be a multiple of {STRIDE}, got {size}")
+        self.size = size
+        self.pool = pool or BufferPool()
+        self.pad_value = pad_value
+        self.rect = rect
+        self._canvases = {}  # (height, width) -> uint8 canvas
+
+    def _input_shape(self, frame_shapes):
+        if not self.rect:
+            return self.size, self.size
+        height = width = 0
+        for frame_height, frame_width in frame_shapes:
+            scale = min(self.size / frame_height, self.size / frame_width)
+            height = max(height, -(-int(round(frame_height * scale)) // STRIDE) * STRIDE)
+            width = max(width, -(-int(round(frame_width * scale)) // STRIDE) * STRIDE)
+        return height, width
+
+    def letterbox_into(self, frame, out):
+        """Letterbox one BGR frame into out (3, H, W) float32, returns its LetterboxInfo"""
+        height, width = frame.shape[:2]
+        out_h, out_w = out.shape[1:]
+        scale = min(out_h / height, out_w / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        left, top = (out_w - new_w) // 2, (out_h - new_h) // 2
+        canvas = self._canvases.get((out_h, out_w))
+        if canvas is None:
+            canvas = self._canvases[(out_h, out_w)] = self.pool.acquire((out_h, out_w, 3), np.uint8)
+
+        canvas[:top] = self.pad_value
+        canvas[top + new_h:] = self.pad_value
+        canvas[top:top + new_h, :left] = self.pad_value
+        canvas[top:top + new_h, left + new_w:] = self.pad_value
+        target = canvas[top:top + new_h, left:left + new_w]
+        if (new_w, new_h) == (width, height):
+            np.copyto(target, frame)
+        else:
+            cv2.resize(frame, (new_w, new_h), dst=target, interpolation=cv2.INTER_LINEAR)
+
+        np.multiply(canvas[:, :, ::-1].transpose(2, 0, 1), np.float32(1 / 255), out=out, dtype=np.float32)
+        return LetterboxInfo(scale, left, top, width, height)
+
+    def __call__(self, frames):
+        """Pooled batch tensor (release it with self.pool.release) and one LetterboxInfo per frame"""
+        height, width = self._input_shape([frame.shape[:2] for frame in frames])
+        batch = self.pool.acquire((len(frames), 3, height, width), np.float32)
+        infos = [self.letterbox_into(frame, batch[i]) for i, frame in enumerate(frames)]
+        return batch, infos
+
+
+def unletterbox(boxes, info):
+    """xyxy boxes on the letterboxed input -> original frame pixels (in place on a float array)"""
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - info.pad_x) / info.scale).clip(0, info.width)
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - info.pad_y) / info.scale).clip(0, info.height)
+    return boxes
+
+
+class PooledDetector:
+    """
+    Batched fire detection on pooled preprocessing, same detection dicts as detect_fire()
+
+    Runs the detector's network directly on the pooled tensor (torch.from_numpy shares
+    its memory) instead of the ultralytics predictor, which allocates new arrays for
+    every letterbox, transpose and float conversion.
+    """
+
+    def __init__(self, detector, size=config.YOLO_INPUT_SIZE, pool=None, iou_threshold=NMS_IOU):
+        if detector.model is None:
+            raise ValueError("Model not loaded. Use load_trained_model() first")
+        self.network = detector.model.model.eval()
+        # Conv+BN fusion, as the ultralytics predictor does (no-op if already fused)
+        self.network.fuse(verbose=False)
+        self.names = detector.model.names
+        self.device = next(self.network.parameters()).device
+        self.preprocessor = LetterboxPreprocessor(size, pool)
+        self.iou_threshold = iou_threshold
+
+    @property
+    def pool(self):
+        return self.preprocessor.pool
+
+    def detect(self, frames, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD, scales=None):
+        """
+        One list of detections per BGR frame
+        scales: optional (sx, sy) per frame (load_image() of a reduced decode), applied before rounding
+        """
+        batch, infos = self.preprocessor(frames)
+        try:
+            with torch.inference_mode():
+                preds = self.network(torch.from_numpy(batch).to(self.device))
+        finally:
+            self.pool.release(batch)
+        preds = preds[0] if isinstance(preds, (list, tuple)) else preds
+        outputs = non_max_suppression(preds, conf_threshold, self.iou_threshold)
+
+        results = []
+        for i, (output, info) in enumerate(zip(outputs, infos)):
+            output = output.cpu().numpy()
+            boxes = unletterbox(output[:, :4], info)
+            if scales is not None and tuple(scales[i]) != (1.0, 1.0):
+                boxes[:, [0, 2]] *= scales[i][0]
+                boxes[:, [1, 3]] *= scales[i][1]
+            detections = []
+            for (x1, y1, x2, y2), confidence, class_id in zip(boxes, output[:, 4], output[:, 5]):
+                detections.append({
+                    'class': self.names[int(class_id)],
+                    'confidence': float(confidence),
+                    'bbox': [int(x1), int(y1), int(x2), int(y2)],
+                    'center': [int((x1 + x2) / 2), int((y1 + y2) / 2)],
+                    'area': int((x2 - x1) * (y2 - y1)),
+                    'input_size': self.preprocessor.size,
+                })
+            results.append(detections)
+        return results
+
+
+def preprocess_allocations(frames, size=config.YOLO_INPUT_SIZE, rounds=20):
+    """
+    Bytes allocated per frame in steady state: pooled preprocessing vs ultralytics' LetterBox path
+    (measured with tracemalloc, which sees NumPy and OpenCV array allocations)
+    """
+    import tracemalloc
+    from ultralytics.data.augment import LetterBox
+
+    def ultralytics_path(frame):
+        image = LetterBox((size, size), auto=True)(image=frame)
+        image = np.ascontiguousarray(image[..., ::-1].transpose(2, 0, 1)[None])
+        return torch.from_numpy(image).float() / 255
+
+    pool = BufferPool()
+    preprocessor = LetterboxPreprocessor(size, pool)
+
+    def pooled_path(frame):
+        batch, _ = preprocessor([frame])
+        pool.release(batch)
+
+    report = {}
+    for name, run in (('ultralytics', ultralytics_path), ('pooled', pooled_path)):
+        for frame in frames:  # warm up: fills the pool and OpenCV's internal buffers
+            run(frame)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(rounds):
+            for frame in frames:
+                run(frame)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report[name] = {'peak_kb_above_baseline': round((peak - before) / 1024, 1)}
+    report['pool'] = pool.stats()
+    return report
+
+
+def main():
+    """Allocation report and pooled vs predictor detection on a few images: python src/preprocess.py <images...>"""
+    import json
+    import time
+    from yolo_fire_detection import FireDetectionYOLO
+
+    paths = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not paths:
+        print("Usage: python src/preprocess.py <image> [image ...] [--model path]")
+        sys.exit(1)
+    model_path = sys.argv[sys.argv.index('--model') + 1] if '--model' in sys.argv else None
+    paths = [p for p in paths if p != model_path]
+    frames = [cv2.imread(p) for p in paths]
+
+    print(json.dumps(preprocess_allocations(frames), indent=2))
+
+    detector = FireDetectionYOLO()
+    if not detector.load_trained_model(model_path):
+        sys.exit(1)
+    pooled = PooledDetector(detector)
+    for name, run in (('predictor', lambda: [detector.detect_fire(f, verbose=False) for f in frames]),
+                      ('pooled', lambda: pooled.detect(frames))):
+        run()
+        start = time.perf_counter()
+        for _ in range(10):
+            run()
+        print(f"⏱️  {name}: {(time.perf_counter() - start) * 100 / len(frames):.1f} ms/frame")
+    print(f"📦 Pool: {pooled.pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+✂️ Structured Channel Pruning + Fine-tune Recovery
+Removes low-importance conv channels from trained YOLOv8 weights to reach a FLOPs target
+"""
+
+import os
+import sys
+import json
+import argparse
+from copy import deepcopy
+from datetime import datetime
+import torch
+import torch.nn as nn
+from ultralytics import YOLO
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.nn.modules import Conv, Bottleneck, Detect
+from distillation import measure_cpu_latency
+from dataset_manifest import DatasetManifest
+
+DEFAULT_TARGETS = (0.2, 0.35, 0.5)
+CHANNEL_ROUND = 8  # keep channel counts SIMD friendly on CPU
+MIN_CHANNELS = 8
+
+
+def count_flops(model, img_size=640):
+    """GFLOPs of one forward pass (conv + linear layers), counted with forward hooks"""
+    flops = [0]
+
+    def conv_hook(module, inputs, output):
+        kh, kw = module.kernel_size
+        flops[0] += 2 * output.numel() * (module.in_channels // module.groups) * kh * kw
+
+    def linear_hook(module, inputs, output):
+        flops[0] += 2 * output.numel() * module.in_features
+
+    hooks = []
+    for m in model.modules():
+        if isinstance(m, nn.Conv2d):
+            hooks.append(m.register_forward_hook(conv_hook))
+        elif isinstance(m, nn.Linear):
+            hooks.append(m.register_forward_hook(linear_hook))
+
+    was_training = model.training
+    model.eval()
+    try:
+        p = next(model.parameters())
+        with torch.no_grad():
+            model(torch.zeros(1, 3, img_size, img_size, device=p.device, dtype=p.dtype))
+    finally:
+        for h in hooks:
+            h.remove()
+        model.train(was_training)
+    return flops[0] / 1e9
+
+
+def count_parameters(model):
+    return sum(p.numel() for p in model.parameters())
+
+
+def prunable_pairs(model):
+    """
+    (producer Conv, consumer conv) pairs whose inner channels can be removed safely
+
+    - Bottleneck cv1 -> cv2: the hidden channels never reach a residual add or concat
+    - Detect box/class branches: Conv -> Conv -> Conv2d intermediate channels
+    Outputs feeding concats, chunks or shortcuts are left untouched.
+    """
+    pairs = []
+    for m in model.modules():
+        if isinstance(m, Bottleneck):
+            pairs.append((m.cv1, m.cv2.conv))
+        elif isinstance(m, Detect):
+            for branch in list(m.cv2) + list(m.cv3):
+                layers = list(branch)
+                for producer, consumer in zip(layers, layers[1:]):
+                    consumer_conv = consumer.conv if isinstance(consumer, Conv) else consumer
+                    if isinstance(producer, Conv) and isinstance(consumer_conv, nn.Conv2d):
+                        pairs.append((producer, consumer_conv))
+    return [(p, c) for p, c in pairs if p.conv.groups == 1 and c.groups == 1]
+
+
+def channel_importance(producer):
+    """|BN gamma| per output channel (L1 of the filters if the layer is already fused)"""
+    bn = getattr(producer, 'bn', None)
+    if isinstance(bn, nn.BatchNorm2d):
+        return bn.weight.detach().abs()
+    return producer.conv.weight.detach().abs().sum(dim=(1, 2, 3))
+
+
+def _kept_channels(channels, ratio):
+    keep = int(round(channels * (1 - ratio) / CHANNEL_ROUND)) * CHANNEL_ROUND
+    return min(channels, max(MIN_CHANNELS, keep))
+
+
+def _prune_pair(producer, consumer, keep_idx):
+    conv = producer.conv
+    conv.weight = nn.Parameter(conv.weight.data[keep_idx].clone())
+    if conv.bias is not None:
+        conv.bias = nn.Parameter(conv.bias.data[keep_idx].clone())
+    conv.out_channels = len(keep_idx)
+
+    bn = getattr(producer, 'bn', None)
+    if isinstance(bn, nn.BatchNorm2d):
+        bn.weight = nn.Parameter(bn.weight.data[keep_idx].clone())
+        bn.bias = nn.Parameter(bn.bias.data[keep_idx].clone())
+        bn.running_mean = bn.running_mean[keep_idx].clone()
+        bn.running_var = bn.running_var[keep_idx].clone()
+        bn.num_features = len(keep_idx)
+
+    consumer.weight = nn.Parameter(consumer.weight.data[:, keep_idx].clone())
+    consumer.in_channels = len(keep_idx)
+
+
+def prune_model(model, ratio):
+    """Remove the lowest-importance `ratio` of channels from every prunable pair (in place)"""
+    removed = 0
+    for producer, consumer in prunable_pairs(model):
+        channels = producer.conv.out_channels
+        keep = _kept_channels(channels, ratio)
+        if keep >= channels:
+            continue
+        keep_idx = torch.argsort(channel_importance(producer), descending=True)[:keep].sort().values
+        _prune_pair(producer, consumer, keep_idx)
+        removed += channels - keep
+    return removed
+
+
+def prune_to_flops(model, target_reduction, img_size=640, steps=12):
+    """
+    Binary search of the per-layer prune ratio that reaches the FLOPs reduction target
+    Returns (pruned copy, info dict); the input model is left unchanged
+    """
+    base_flops = count_flops(model, img_size)
+    best = None
+    low, high = 0.0, 0.95
+    for _ in range(steps):
+        ratio = (low + high) / 2
+        candidate = deepcopy(model)
+        prune_model(candidate, ratio)
+        reduction = 1 - count_flops(candidate, img_size) / base_flops
+        if reduction >= target_reduction:
+            best, high = (candidate, ratio, reduction), ratio
+        else:
+            low = ratio
+
+    if best is None:
+        # Target beyond what the safe pairs allow: prune as far as possible
+        candidate = deepcopy(model)
+        prune_model(candidate, high)
+        best = (candidate, high, 1 - count_flops(candidate, img_size) / base_flops)
+        print(f"⚠️  FLOPs target {target_reduction:.0%} not reachable, got {best[2]:.1%}")
+
+    pruned, ratio, reduction = best
+    base_params = count_parameters(model)
+    info = {
+        'target_flops_reduction': target_reduction,
+        'channel_ratio': round(ratio, 4),
+        'flops_reduction': round(reduction, 4),
+        'gflops': round(base_flops * (1 - reduction), 3),
+        'base_gflops': round(base_flops, 3),
+        'parameters': count_parameters(pruned),
+        'sparsity': round(1 - count_parameters(pruned) / base_params, 4),
+    }
+    return pruned, info
+
+
+def save_pruned_checkpoint(yolo_model, pruned, info, path):
+    """Write the pruned module in the regular Ultralytics checkpoint format"""
+    ckpt = dict(yolo_model.ckpt or {})
+    ckpt.update({
+        'model': deepcopy(pruned).half(),
+        'ema': None,
+        'optimizer': None,
+        'updates': None,
+        'date': datetime.now().isoformat(),
+        'pruning': info,
+    })
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    torch.save(ckpt, path)
+    return path
+
+
+class PrunedDetectionTrainer(DetectionTrainer):
+    """Fine-tune a pruned checkpoint as-is instead of rebuilding it from the (unpruned) yaml"""
+
+    def get_model(self, cfg=None, weights=None, verbose=True):
+        if not isinstance(weights, nn.Module):
+            raise ValueError("PrunedDetectionTrainer needs the pruned checkpoint as weights")
+        for p in weights.parameters():
+            p.requires_grad = True
+        return weights
+
+
+def finetune_pruned(pruned_path, data_yaml, epochs=20, img_size=640, batch_size=16, name='pruned'):
+    """Recover accuracy of a pruned checkpoint on the dataset, returns the best weights path"""
+    from yolo_fire_detection import TRAINING_HYPERPARAMETERS
+
+    model = YOLO(pruned_path)
+    model.train(
+        trainer=PrunedDetectionTrainer,
+        data=data_yaml,
+        epochs=epochs,
+        imgsz=img_size,
+        batch=batch_size,
+        name=name,
+        project='runs/prune',
+        exist_ok=True,
+        device=0 if torch.cuda.is_available() else 'cpu',
+        plots=False,
+        **TRAINING_HYPERPARAMETERS,
+    )
+    return str(model.trainer.best)
+
+
+def _evaluate(weights, data_yaml, image_paths, img_size):
+    metrics = YOLO(weights).val(data=data_yaml, imgsz=img_size, device='cpu', plots=False, verbose=False)
+    median_ms, _ = measure_cpu_latency(weights, image_paths, img_size)
+    return float(metrics.box.map50), float(metrics.box.map), round(median_ms, 2)
+
+
+def pruning_report(weights, dataset_path="datasets/wildfire", targets=DEFAULT_TARGETS, epochs=20,
+                   img_size=640, batch_size=16, latency_images=30, output_dir="runs/prune"):
+    """
+    Prune the trained weights at several FLOPs targets, fine-tune each one and
+    report sparsity / FLOPs / CPU latency / mAP to choose an operating point
+    """
+    data_yaml = os.path.join(dataset_path, 'data.yaml')
+    manifest = DatasetManifest(dataset_path)
+    manifest.refresh()
+    image_paths = manifest.stratified_sample(latency_images, split='test') or \
+        manifest.stratified_sample(latency_images, split='valid')
+
+    base = YOLO(weights)
+    base_model = base.model.float()
+    map50, map50_95, latency = _evaluate(weights, data_yaml, image_paths, img_size)
+    rows = [{
+        'target_flops_reduction': 0.0, 'flops_reduction': 0.0, 'sparsity': 0.0,
+        'gflops': round(count_flops(base_model, img_size), 3), 'parameters': count_parameters(base_model),
+        'map50': map50, 'map50_95': map50_95, 'cpu_latency_ms': latency, 'weights': str(weights),
+    }]
+
+    for target in targets:
+        print(f"\n✂️  Pruning for {target:.0%} fewer FLOPs")
+        pruned, info = prune_to_flops(base_model, target, img_size)
+        tag = f"flops{int(target * 100)}"
+        pruned_path = save_pruned_checkpoint(base, pruned, info, os.path.join(output_dir, f"{tag}_pruned.pt"))
+        print(f"   Channel ratio: {info['channel_ratio']:.2f} | FLOPs -{info['flops_reduction']:.1%} | "
+              f"Params -{info['sparsity']:.1%}")
+
+        info['map50_95_before_finetune'] = _evaluate(pruned_path, data_yaml, image_paths, img_size)[1]
+        best_path = finetune_pruned(pruned_path, data_yaml, epochs, img_size, batch_size, name=f"{tag}_finetune")
+        info['map50'], info['map50_95'], info['cpu_latency_ms'] = _evaluate(best_path, data_yaml, image_paths, img_size)
+        info['weights'] = best_path
+        rows.append(info)
+
+    print(f"\n📊 PRUNING REPORT")
+    print(f"   {'FLOPs -':>8} {'Params -':>9} {'GFLOPs':>7} {'CPU ms':>7} {'mAP50':>7} {'mAP50-95':>9}")
+    for row in rows:
+        print(f"   {row['flops_reduction']:>8.1%} {row['sparsity']:>9.1%} {row['gflops']:>7.2f} "
+              f"{row['cpu_latency_ms']:>7.1f} {row['map50']:>7.3f} {row['map50_95']:>9.3f}")
+
+    report = {'timestamp': datetime.now().isoformat(), 'source_weights': str(weights),
+              'img_size': img_size, 'finetune_epochs': epochs, 'results': rows}
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, f"pruning_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Report saved to: {report_path}")
+    return report
+
+
+def main():
+    """Prune trained weights at several FLOPs targets and compare the fine-tuned results"""
+    parser = argparse.ArgumentParser(description="Structured channel pruning for the YOLOv8 fire detector")
+    parser.add_argument('--weights', default="runs/detect/fire_detection_yolo/weights/best.pt")
+    parser.add_argument('--dataset', default="datasets/wildfire")
+    parser.add_argument('--targets', type=float, nargs='+', default=list(DEFAULT_TARGETS),
+                        help="FLOPs reduction targets (0-1)")
+    parser.add_argument('--epochs', type=int, default=20, help="Fine-tune epochs per prune ratio")
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--batch', type=int, default=16)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.weights):
+        print(f"❌ Weights not found: {args.weights}")
+        sys.exit(1)
+
+    pruning_report(args.weights, args.dataset, args.targets, args.epochs, args.imgsz, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+🧠 Shared-Memory Frame Handoff
+Frames passed to the detection worker through POSIX shared memory (/dev/shm) instead of files:
+single-frame segments announced by a small JSON descriptor, and a ring buffer for camera streams
+"""
+
+import sys
+import json
+import time
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+import cv2
+
+# Ownership of a single-frame segment once its descriptor is sent
+RELEASE_UNLINK = 'unlink'  # handed over: the worker removes the segment after detection
+RELEASE_CLOSE = 'close'    # kept: the producer reuses/removes it, the worker only detaches
+
+ENCODING_RAW = 'raw'  # pixels (shape/dtype in the descriptor); anything else is an encoded image (jpeg, png, ...)
+
+# Ring slot states: FREE -> WRITING -> READY (producer), READY -> READING -> FREE (consumer)
+SLOT_FREE, SLOT_WRITING, SLOT_READY, SLOT_READING = 0, 1, 2, 3
+RING_MAGIC = 0x51464952  # "QFIR"
+RING_HEADER_FIELDS = 4   # magic, slots, slot_bytes, reserved
+SLOT_META_FIELDS = 8     # state, seq, height, width, channels, nbytes, timestamp_us, reserved
+RING_ALIGN = 64
+POLL_INTERVAL_S = 0.002
+
+_deferred_close = []  # segments still referenced by a live array view when released
+
+
+class SharedFrameError(Exception):
+    """Invalid descriptor or missing shared-memory segment"""
+
+
+def attach_segment(name, adopt=False):
+    """
+    Open an existing segment
+    adopt=True takes ownership: the resource tracker unlinks it if this process dies first.
+    Otherwise the registration Python < 3.13 makes for every attached segment is dropped,
+    so detaching never removes a segment the producer still owns.
+    """
+    try:
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=adopt)
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        raise SharedFrameError(f"Shared-memory segment not found: {name}")
+    if not adopt:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _close(shm):
+    """Detach a segment; if an array view still exports its buffer, retry on a later release"""
+    pending = _deferred_close + [shm]
+    _deferred_close.clear()
+    for segment in pending:
+        try:
+            segment.close()
+        except BufferError:
+            _deferred_close.append(segment)
+
+
+class SharedFrame:
+    """
+    Zero-copy NumPy view of a frame in a single-frame segment
+
+    Descriptor (one JSON object): {"shm_name", "shape", "dtype", "offset", "nbytes",
+    "encoding": "raw" | "jpeg" | ..., "release": "unlink" | "close"}. Use as a context
+    manager; `array` must not be used after release().
+    """
+
+    def __init__(self, descriptor):
+        self.descriptor = descriptor
+        self.release_mode = descriptor.get('release', RELEASE_UNLINK)
+        if self.release_mode not in (RELEASE_UNLINK, RELEASE_CLOSE):
+            raise SharedFrameError(f"Unknown release mode: {self.release_mode}")
+        self._shm = attach_segment(descriptor['shm_name'], adopt=self.release_mode == RELEASE_UNLINK)
+        offset = int(descriptor.get('offset', 0))
+        try:
+            if descriptor.get('encoding', ENCODING_RAW) == ENCODING_RAW:
+                self.array = np.ndarray(tuple(descriptor['shape']), dtype=np.dtype(descriptor.get('dtype', 'uint8')),
+                                        buffer=self._shm.buf, offset=offset)
+            else:
+                nbytes = int(descriptor.get('nbytes', self._shm.size - offset))
+                self.array = np.frombuffer(self._shm.buf, dtype=np.uint8, count=nbytes, offset=offset)
+        except (KeyError, TypeError, ValueError) as e:
+            self.release()
+            raise SharedFrameError(f"Invalid frame descriptor: {e}")
+
+    def image(self):
+        """BGR image: the shared view itself for raw frames, decoded from the shared bytes otherwise"""
+        if self.descriptor.get('encoding', ENCODING_RAW) == ENCODING_RAW:
+            return self.array
+        image = cv2.imdecode(self.array, cv2.IMREAD_COLOR)
+        if image is None:
+            raise SharedFrameError(f"Cannot decode {self.descriptor.get('encoding')} frame")
+        return image
+
+    def release(self):
+        """Drop the view, detach, and unlink the segment if ownership was handed over"""
+        if self._shm is None:
+            return
+        self.array = None
+        shm, self._shm = self._shm, None
+        if self.release_mode == RELEASE_UNLINK:
+            shm.unlink()
+        _close(shm)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def write_frame(frame, name=None, release=RELEASE_UNLINK):
+    """
+    Producer side for Python callers: copy a frame into a new segment, returns (descriptor, segment)
+    With RELEASE_UNLINK the caller only closes its handle; the worker removes the segment.
+    """
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(1, frame.nbytes))
+    np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+    if release == RELEASE_UNLINK:
+        # The worker unlinks it; keep the resource tracker from doing it again at exit
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    descriptor = {'shm_name': shm.name, 'shape': list(frame.shape), 'dtype': str(frame.dtype), 'offset': 0,
+                  'nbytes': frame.nbytes, 'encoding': ENCODING_RAW, 'release': release}
+    return descriptor, shm
+
+
+class RingFrame:
+    """A READY slot taken by the consumer; hand it back with FrameRing.release()"""
+
+    def __init__(self, index, seq, timestamp_us, array):
+        self.index = index
+        self.seq = seq
+        self.timestamp_us = timestamp_us
+        self.array = array
+
+
+class FrameRing:
+    """
+    Single-producer / single-consumer ring of fixed-size frame slots in one segment
+
+    Layout: int64 header [magic, slots, slot_bytes, 0], int64 slot metadata
+    [state, seq, height, width, channels, nbytes, timestamp_us, 0] per slot, then
+    the 64-byte aligned slots. Each state transition is owned by one side only
+    (the producer moves FREE -> WRITING -> READY, the consumer READY -> READING -> FREE)
+    and the state is written after the pixels, so no lock is needed. A full ring
+    drops the new frame instead of waiting. The creator owns the segment and
+    unlinks it in close(); the consumer only detaches.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        header = np.ndarray((RING_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        if header[0] != RING_MAGIC:
+            raise SharedFrameError(f"Segment {shm.name} is not a frame ring")
+        self.slots, self.slot_bytes = int(header[1]), int(header[2])
+        self.meta = np.ndarray((self.slots, SLOT_META_FIELDS), dtype=np.int64, buffer=shm.buf,
+                               offset=header.nbytes)
+        self.data_offset = self._align(header.nbytes + self.meta.nbytes)
+        self.cursor = 0   # next slot to write (producer) or read (consumer)
+        self.seq = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _align(n):
+        return (n + RING_ALIGN - 1) // RING_ALIGN * RING_ALIGN
+
+    @classmethod
+    def create(cls, name, slots=8, slot_bytes=1920 * 1080 * 3):
+        """Producer: allocate the ring (slot_bytes = largest frame it will carry)"""
+        meta_bytes = cls._align(RING_HEADER_FIELDS * 8 + slots * SLOT_META_FIELDS * 8)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=meta_bytes + slots * cls._align(slot_bytes))
+        np.ndarray((RING_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)[:] = (RING_MAGIC, slots,
+                                                                                cls._align(slot_bytes), 0)
+        ring = cls(shm, owner=True)
+        ring.meta[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        """Consumer: open an existing ring"""
+        return cls(attach_segment(name), owner=False)
+
+    def _slot(self, index, nbytes):
+        start = self.data_offset + index * self.slot_bytes
+        return np.ndarray((nbytes,), dtype=np.uint8, buffer=self.shm.buf, offset=start)
+
+    # Producer
+    # ------------------------------------------------------------------
+
+    def write(self, frame):
+        """Copy a uint8 frame into the next slot and publish it; returns its seq, None if the ring is full"""
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise SharedFrameError(f"Frame {frame.shape} {frame.dtype} does not fit a {self.slot_bytes}-byte slot")
+        index = self.cursor
+        meta = self.meta[index]
+        if meta[0] != SLOT_FREE:
+            self.dropped += 1
+            return None
+        meta[0] = SLOT_WRITING
+        self._slot(index, frame.nbytes)[:] = frame.reshape(-1)
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        self.seq += 1
+        meta[1:7] = (self.seq, height, width, channels, frame.nbytes, int(time.time() * 1e6))
+        meta[0] = SLOT_READY
+        self.cursor = (index + 1) % self.slots
+        return self.seq
+
+    # Consumer
+    # ------------------------------------------------------------------
+
+    def read(self):
+        """Take the next READY slot as a zero-copy RingFrame, None if nothing is pending"""
+        index = self.cursor
+        meta = self.meta[index]
+        if meta[0] != SLOT_READY:
+            return None
+        meta[0] = SLOT_READING
+        seq, height, width, channels, nbytes, timestamp_us = (int(v) for v in meta[1:7])
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        self.cursor = (index + 1) % self.slots
+        return RingFrame(index, seq, timestamp_us, self._slot(index, nbytes).reshape(shape))
+
+    def release(self, frame):
+        """Give a slot back to the producer; frame.array must not be used afterwards"""
+        frame.array = None
+        self.meta[frame.index][0] = SLOT_FREE
+
+    def pending(self):
+        return int(np.count_nonzero(self.meta[:, 0] == SLOT_READY))
+
+    def close(self):
+        self.meta = None
+        _close(self.shm)
+        if self.owner:
+            self.shm.unlink()
+
+
+def _frame_response(detector, image, conf_threshold, started):
+    detections = detector.detect_fire(image, conf_threshold, verbose=False)
+    if detections is None:  # detect_fire's error result
+        return {'success': False, 'error': 'Detection failed',
+                'processing_ms': round((time.perf_counter() - started) * 1000, 2)}
+    return {
+        'success': True,
+        'fire_detected': bool(detections),
+        'confidence': max((d['confidence'] for d in detections), default=0.0),
+        'detections': detections,
+        'processing_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def serve_descriptors(detector, inp=None, out=None, conf_threshold=0.5):
+    """
+    Worker loop: one JSON frame descriptor per input line -> one JSON result per output line
+    The segment is released (and unlinked when handed over) right after detection, even on errors.
+    """
+    inp, out = inp or sys.stdin, out or sys.stdout
+    for line in inp:
+        if not line.strip():
+            continue
+        started = time.perf_counter()
+        descriptor = {}
+        try:
+            descriptor = json.loads(line)
+            with SharedFrame(descriptor) as frame:
+                response = _frame_response(detector, frame.image(), descriptor.get('conf', conf_threshold), started)
+        except Exception as e:  # a bad line (malformed descriptor, detection error) must not stop the worker
+            response = {'success': False, 'error': f"{type(e).__name__}: {e}"}
+        response['id'] = descriptor.get('id') if isinstance(descriptor, dict) else None
+        out.write(json.dumps(response) + '\n')
+        out.flush()
+
+
+def serve_ring(detector, name, out=None, conf_threshold=0.5, max_frames=None):
+    """Worker loop for a camera stream: detect every frame published in the ring, in order"""
+    out = out or sys.stdout
+    ring = FrameRing.attach(name)
+    processed = 0
+    try:
+        while max_frames is None or processed < max_frames:
+            frame = ring.read()
+            if frame is None:
+                time.sleep(POLL_INTERVAL_S)
+                continue
+            started = time.perf_counter()
+            try:
+                response = _frame_response(detector, frame.array, conf_threshold, started)
+            finally:
+                ring.release(frame)
+            response.update(seq=frame.seq, timestamp_us=frame.timestamp_us,
+                            age_ms=round(time.time() * 1000 - frame.timestamp_us / 1000, 2))
+            out.write(json.dumps(response) + '\n')
+            out.flush()
+            processed += 1
+    finally:
+        ring.close()
+
+
+def main():
+    """serve [model] (descriptors on stdin) / ring <name> [model]"""
+    import contextlib
+    from yolo_fire_detection import FireDetectionYOLO
+
+    args = sys.argv[1:]
+    if not args or args[0] not in ('serve', 'ring') or (args[0] == 'ring' and len(args) < 2):
+        print("Usage: python src/shm_frames.py serve [model_path]\n"
+              "       python src/shm_frames.py ring <ring_name> [model_path]")
+        sys.exit(1)
+    model_args = args[2:] if args[0] == 'ring' else args[1:]
+    model_path = model_args[0] if model_args else None
+
+    # stdout carries only JSON results, status messages go to stderr
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        detector = FireDetectionYOLO()
+        if not detector.load_trained_model(model_path):
+            sys.exit(1)
+        if args[0] == 'serve':
+            serve_descriptors(detector, sys.stdin, out)
+        else:
+            serve_ring(detector, args[1], out)
+
+
+if __name__ == "__main__":
+    main()
@@ -93,8 +93,19 @@ def visualize_detection(image_path, detections, results):
     else:
         print("✅ Nenhuma detecção encontrada")
 
+def draw_detections(image, detections):
+    """Desenhar caixas e confianças das detecções (BGR, in place)"""
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox']
+        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        cv2.putText(image, f"{det['class']} {det['confidence']:.2f}", (x1, max(y1 - 6, 12)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+    return image
+
 def test_dataset_folder(model, images_folder, conf_threshold=0.5):
-    """Testar em pasta de imagens"""
+    """Testar em pasta de imagens (decodificação, inferência e saída sobrepostas no pipeline)"""
+    from yolo_fire_detection import FireDetectionYOLO
+    from pipeline import detection_pipeline, resolve_backend
     
     if not os.path.exists(images_folder):
         print(f"❌ Pasta não encontrada: {images_folder}")
@@ -119,18 +130,23 @@ def test_dataset_folder(model, images_folder, conf_threshold=0.5):
     fig, axes = plt.subplots(3, 3, figsize=(15, 15))
     axes = axes.flatten()
     
-    for i, img_file in enumerate(sample_images):
-        img_path = os.path.join(images_folder, img_file)
-        detections, results = test_single_image(model, img_path, conf_threshold)
-        
-        # Get annotated image
-        annotated = results[0].plot()
-        annotated_rgb = cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB)
+    detector = FireDetectionYOLO()
+    detector.model = model
+    pipeline = detection_pipeline(detector, conf_threshold,
+                                  backend=resolve_backend('auto', getattr(model, 'model_name', None)))
+    sample_paths = [os.path.join(images_folder, img_file) for img_file in sample_images]
+    for i, item in enumerate(pipeline.run(sample_paths)):
+        img_file = os.path.basename(item.source)
+        axes[i].axis('off')
+        if item.error:
+            print(f"❌ {img_file}: {item.error}")
+            continue
+        detections = item.output['detections']
         
-        # Display
-        axes[i].imshow(annotated_rgb)
+        # Display annotated image
+        annotated = draw_detections(cv2.imread(item.source), detections)
+        axes[i].imshow(cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB))
         axes[i].set_title(f"{img_file}\n{len(detections)} detections")
-        axes[i].axis('off')
         
         # Update statistics
         if detections:
@@ -149,6 +165,7 @@ def test_dataset_folder(model, images_folder, conf_threshold=0.5):
     print(f"   Imagens com detecção: {images_with_fire}")
     print(f"   Total de detecções: {total_detections}")
     print(f"   Média por imagem: {total_detections/len(sample_images):.1f}")
+    print(f"   Gargalo do pipeline: {pipeline.report()['bottleneck']}")
 
 def validate_model_performance(model, dataset_path="datasets/wildfire"):
     """Validar performance do modelo no dataset"""
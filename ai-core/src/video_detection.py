@@ -0,0 +1,300 @@
+"""
+🎥 Video Fire Detection
+Frame sampling + per-frame detection in the API's VideoDetectionResult format
+"""
+
+import os
+import sys
+import json
+import time
+import contextlib
+from datetime import datetime
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+
+class VideoOpenError(Exception):
+    """The video file is missing or cannot be decoded"""
+
+
+class DetectionError(Exception):
+    """detect_fire() failed on a frame: a model error, not a frame without fire"""
+
+
+def video_info(video_path):
+    """fps, frame count and resolution of a video"""
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise VideoOpenError(f"Cannot open video: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return {
+            'fps': fps,
+            'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+    finally:
+        cap.release()
+
+
+def frame_step_for(fps, sample_fps=None):
+    """Analyze one frame out of every N to get about `sample_fps` analyzed frames per second"""
+    sample_fps = sample_fps or config.VIDEO_SAMPLE_FPS
+    return max(1, int(round(fps / sample_fps)))
+
+
+def to_bounding_boxes(detections):
+    """detect_fire() detections -> API BoundingBox dicts (x, y, width, height)"""
+    boxes = []
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox']
+        boxes.append({
+            'x': x1,
+            'y': y1,
+            'width': x2 - x1,
+            'height': y2 - y1,
+            'confidence': round(det['confidence'], 4),
+            'class': det['class'],
+        })
+    return boxes
+
+
+def frame_result(frame_number, fps, detections):
+    """FrameDetection dict for one analyzed frame"""
+    boxes = to_bounding_boxes(detections)
+    return {
+        'frame_number': frame_number,
+        'timestamp': round(frame_number / fps, 3),
+        'fire_detected': bool(boxes),
+        'confidence': max((b['confidence'] for b in boxes), default=0.0),
+        'bounding_boxes': boxes,
+    }
+
+
+def iter_frame_results(detector, video_path, start_frame=0, end_frame=None, frame_step=1,
+                       conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD, camera_roi=None):
+    """
+    Yield FrameDetection dicts for the sampled frames (multiples of frame_step) in [start_frame, end_frame)
+    Sampling is aligned to frame 0, so any split of a video analyzes the same frames.
+    Skipped frames are only grabbed, not decoded; camera_roi crops/filters each frame
+    Raises DetectionError when detection fails on a frame, so the video is not reported as fire-free
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise VideoOpenError(f"Cannot open video: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if end_frame is None:
+            end_frame = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        frame_number = start_frame
+        while frame_number < end_frame:
+            if frame_number % frame_step:
+                if not cap.grab():
+                    break
+            else:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                detections = detector.detect_fire(frame, conf_threshold, verbose=False, camera_roi=camera_roi)
+                if detections is None:
+                    raise DetectionError(f"Detection failed on frame {frame_number} of {video_path}")
+                yield frame_result(frame_number, fps, detections)
+            frame_number += 1
+    finally:
+        cap.release()
+
+
+def model_version(detector):
+    path = getattr(detector.model, 'ckpt_path', None)
+    return f"yolov8:{os.path.basename(str(path))}" if path else 'yolov8'
+
+
+class VideoSummary:
+    """
+    Running totals of analyzed frames plus run-length encoded fire intervals
+
+    total_frames counts analyzed frames. Each fire interval is a run of consecutive
+    analyzed frames with fire; no-fire runs are implied by the gaps. The summary is
+    derived from the intervals only, so clients can recompute it exactly:
+    frames_with_fire = sum(frames), overall_confidence = round(sum(confidence_sum) / frames_with_fire, 4)
+    """
+
+    def __init__(self):
+        self.total_frames = 0
+        self.frames_with_fire = 0
+        self.fire_intervals = []
+        self.keyframes = None  # counted in track-then-detect mode only
+        self.failed_keyframes = 0
+        self._open = None  # interval of the current fire run
+
+    def add(self, frame):
+        self.total_frames += 1
+        if 'keyframe' in frame:
+            self.keyframes = (self.keyframes or 0) + frame['keyframe']
+            self.failed_keyframes += frame.get('detection_failed', False)
+        if not frame['fire_detected']:
+            self._open = None
+            return
+
+        self.frames_with_fire += 1
+        interval = self._open
+        if interval is None:
+            interval = self._open = {
+                'start_frame': frame['frame_number'], 'end_frame': frame['frame_number'],
+                'start_time': frame['timestamp'], 'end_time': frame['timestamp'],
+                'frames': 0, 'confidence_sum': 0.0, 'peak_confidence': -1.0, 'peak_frame': None, 'bounding_boxes': [],
+            }
+            self.fire_intervals.append(interval)
+        interval['end_frame'] = frame['frame_number']
+        interval['end_time'] = frame['timestamp']
+        interval['frames'] += 1
+        # Frame confidences have 4 decimals, so 4-decimal sums are exact
+        interval['confidence_sum'] = round(interval['confidence_sum'] + frame['confidence'], 4)
+        if frame['confidence'] > interval['peak_confidence']:
+            # Representative boxes: those of the most confident frame of the run
+            interval['peak_confidence'] = frame['confidence']
+            interval['peak_frame'] = frame['frame_number']
+            interval['bounding_boxes'] = frame['bounding_boxes']
+
+    def overall_confidence(self):
+        if not self.frames_with_fire:
+            return 0.0
+        return round(sum(i['confidence_sum'] for i in self.fire_intervals) / self.frames_with_fire, 4)
+
+    def result(self, info, processing_seconds, version, frame_step=1):
+        """VideoDetectionResult fields except frame_results"""
+        result = {
+            'total_frames': self.total_frames,
+            'frames_with_fire': self.frames_with_fire,
+            'fire_detected': self.frames_with_fire > 0,
+            'overall_confidence': self.overall_confidence(),
+            'fire_intervals': self.fire_intervals,
+            'metadata': {
+                'processing_time': f"{processing_seconds:.1f}s",
+                'model_version': version,
+                'image_size': f"{info['width']}x{info['height']}",
+                'timestamp': datetime.now().isoformat(),
+                'video_frames': info['frame_count'],
+                'fps': round(info['fps'], 3),
+                'frame_step': frame_step,
+            },
+        }
+        if self.keyframes is not None:
+            result['metadata']['keyframes'] = self.keyframes
+            result['metadata']['keyframe_ratio'] = round(self.keyframes / max(1, self.total_frames), 4)
+            result['metadata']['failed_keyframes'] = self.failed_keyframes
+        return result
+
+
+def summarize_video(frame_results, info, processing_seconds, version, frame_step=1, include_frames=False):
+    """VideoDetectionResult dict from the analyzed frames (per-frame frame_results only if include_frames)"""
+    summary = VideoSummary()
+    for frame in frame_results:
+        summary.add(frame)
+    result = summary.result(info, processing_seconds, version, frame_step)
+    if include_frames:
+        result['frame_results'] = frame_results
+    return result
+
+
+def frame_iterator(tracking=False):
+    """iter_frame_results, or its track-then-detect counterpart (detector on keyframes only)"""
+    if tracking:
+        from video_tracking import iter_tracked_frame_results
+        return iter_tracked_frame_results
+    return iter_frame_results
+
+
+def detect_video(detector, video_path, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD, frame_step=None,
+                 tracking=False, camera_roi=None, include_frames=False):
+    """
+    Analyze a whole video, returns a VideoDetectionResult dict
+    Fire intervals by default; include_frames also keeps one FrameDetection per analyzed frame
+    """
+    start = time.time()
+    info = video_info(video_path)
+    frame_step = frame_step or frame_step_for(info['fps'])
+    iterate = frame_iterator(tracking)
+    summary = VideoSummary()
+    frames = []
+    for frame in iterate(detector, video_path, 0, info['frame_count'], frame_step, conf_threshold,
+                         camera_roi=camera_roi):
+        summary.add(frame)
+        if include_frames:
+            frames.append(frame)
+    result = summary.result(info, time.time() - start, model_version(detector), frame_step)
+    if include_frames:
+        result['frame_results'] = frames
+    return result
+
+
+def write_ndjson(record, out):
+    out.write(json.dumps(record, separators=(',', ':')) + '\n')
+    out.flush()
+
+
+def stream_video(detector, video_path, out=None, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD, frame_step=None,
+                 tracking=False, camera_roi=None):
+    """
+    Analyze a video emitting newline-delimited JSON while processing:
+    {"type": "frame", ...FrameDetection} per analyzed frame, then one
+    {"type": "summary", total_frames, frames_with_fire, overall_confidence, fire_intervals, ...}
+    Nothing is kept per frame, so memory stays constant for any video length.
+    Returns the summary record.
+    """
+    out = out or sys.stdout
+    start = time.time()
+    info = video_info(video_path)
+    frame_step = frame_step or frame_step_for(info['fps'])
+    summary = VideoSummary()
+    iterate = frame_iterator(tracking)
+
+    for frame in iterate(detector, video_path, 0, info['frame_count'], frame_step, conf_threshold,
+                         camera_roi=camera_roi):
+        summary.add(frame)
+        write_ndjson(dict(type='frame', **frame), out)
+
+    record = dict(type='summary', **summary.result(info, time.time() - start, model_version(detector), frame_step))
+    write_ndjson(record, out)
+    return record
+
+
+def main():
+    """
+    Analyze a video and print the result as JSON
+    --ndjson: stream one record per frame, --frames: include per-frame results
+    """
+    from yolo_fire_detection import FireDetectionYOLO
+
+    args = [a for a in sys.argv[1:] if a not in ('--ndjson', '--track', '--frames')]
+    tracking = '--track' in sys.argv
+    if not args:
+        print("Usage: python src/video_detection.py <video> [model_path] [--ndjson] [--track] [--frames]")
+        sys.exit(1)
+
+    if '--ndjson' in sys.argv:
+        # stdout carries only NDJSON records, status messages go to stderr
+        out = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            detector = FireDetectionYOLO()
+            if not detector.load_trained_model(args[1] if len(args) > 1 else None):
+                sys.exit(1)
+            stream_video(detector, args[0], out, tracking=tracking)
+        return
+
+    detector = FireDetectionYOLO()
+    if not detector.load_trained_model(args[1] if len(args) > 1 else None):
+        sys.exit(1)
+
+    result = detect_video(detector, args[0], tracking=tracking, include_frames='--frames' in sys.argv)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""
+🗂️ Asynchronous Video Job Queue
+Durable SQLite-backed queue with worker processes, frame progress and segment-level resume
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import multiprocessing
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+FINAL_STATUSES = (STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED)
+
+HEARTBEAT_TIMEOUT_S = 120  # running jobs silent for longer are considered interrupted
+PROGRESS_EVERY_FRAMES = 10  # analyzed frames between progress writes
+POLL_INTERVAL_S = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    video_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    options TEXT NOT NULL,
+    total_frames INTEGER,
+    frames_processed INTEGER NOT NULL DEFAULT 0,
+    segment_frames INTEGER,
+    worker TEXT,
+    heartbeat_at REAL,
+    error TEXT,
+    result TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS segments (
+    job_id TEXT NOT NULL,
+    segment_index INTEGER NOT NULL,
+    start_frame INTEGER NOT NULL,
+    end_frame INTEGER NOT NULL,
+    frame_results TEXT NOT NULL,
+    completed_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, segment_index)
+);
+"""
+
+
+def _worker_alive(worker):
+    """False only when the worker ran on this host and its process is gone"""
+    host, _, pid = (worker or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobCancelled(Exception):
+    """The job was cancelled while a worker was processing it"""
+
+
+class VideoJobQueue:
+    """
+    submit / status / result / cancel for video analysis jobs
+
+    Jobs are processed in segments of `segment_frames` frames. Each finished
+    segment is committed with its frame results, so a job interrupted by a
+    crash or restart resumes from its last completed segment.
+    """
+
+    def __init__(self, db_path=config.VIDEO_JOBS_DB):
+        self.db_path = str(db_path)
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Client operations
+    # ------------------------------------------------------------------
+
+    def submit(self, video_path, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD, frame_step=None, tracking=False,
+               camera_id=None, include_frames=False):
+        """
+        Queue a video for analysis, returns the job id
+        tracking: track-then-detect mode; camera_id: apply that camera's ROI;
+        include_frames: keep per-frame frame_results in the result (fire intervals only by default)
+        """
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(video_path)
+        job_id = uuid.uuid4().hex
+        options = {'conf_threshold': conf_threshold, 'frame_step': frame_step, 'tracking': tracking,
+                   'camera_id': camera_id, 'include_frames': include_frames}
+        self.conn.execute(
+            "INSERT INTO jobs (job_id, video_path, status, options, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, os.path.abspath(video_path), STATUS_QUEUED, json.dumps(options), datetime.now().isoformat()))
+        return job_id
+
+    def status(self, job_id):
+        """Job state and progress in frames, None for an unknown id"""
+        row = self.conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        segments = self.conn.execute("SELECT COUNT(*) FROM segments WHERE job_id = ?", (job_id,)).fetchone()[0]
+        total = row['total_frames']
+        return {
+            'job_id': job_id,
+            'status': row['status'],
+            'video_path': row['video_path'],
+            'frames_processed': row['frames_processed'],
+            'total_frames': total,
+            'progress': round(row['frames_processed'] / total, 4) if total else 0.0,
+            'segments_completed': segments,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+        }
+
+    def result(self, job_id):
+        """VideoDetectionResult of a completed job, None otherwise"""
+        row = self.conn.execute("SELECT status, result FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None or row['status'] != STATUS_COMPLETED:
+            return None
+        return json.loads(row['result'])
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; running workers stop at their next progress check"""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = ?, finished_at = ? WHERE job_id = ? AND status IN (?, ?)",
+            (STATUS_CANCELLED, datetime.now().isoformat(), job_id, STATUS_QUEUED, STATUS_RUNNING))
+        return cursor.rowcount > 0
+
+    def retry(self, job_id):
+        """Queue a failed job again; it resumes after its last completed segment"""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, error = NULL, finished_at = NULL "
+            "WHERE job_id = ? AND status = ?",
+            (STATUS_QUEUED, job_id, STATUS_FAILED))
+        return cursor.rowcount > 0
+
+    def iter_segments(self, job_id, poll_interval=POLL_INTERVAL_S):
+        """
+        Yield completed segments in frame order as workers commit them,
+        until the job reaches a final status and every segment was yielded
+        """
+        next_index = 0
+        while True:
+            row = self.conn.execute(
+                "SELECT * FROM segments WHERE job_id = ? AND segment_index = ?", (job_id, next_index)).fetchone()
+            if row is not None:
+                yield {'segment_index': row['segment_index'], 'start_frame': row['start_frame'],
+                       'end_frame': row['end_frame'], 'frame_results': json.loads(row['frame_results'])}
+                next_index += 1
+                continue
+            status = self.conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if status is None or status['status'] in FINAL_STATUSES:
+                return
+            time.sleep(poll_interval)
+
+    def list_jobs(self, limit=20):
+        rows = self.conn.execute("SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self.status(r['job_id']) for r in rows]
+
+    # ------------------------------------------------------------------
+    # Worker operations
+    # ------------------------------------------------------------------
+
+    def requeue_interrupted(self, timeout_s=HEARTBEAT_TIMEOUT_S):
+        """
+        Running jobs whose worker is gone go back to the queue: workers on this host
+        are checked by pid, others once their heartbeat is older than timeout_s
+        """
+        rows = self.conn.execute("SELECT job_id, worker, heartbeat_at FROM jobs WHERE status = ?",
+                                 (STATUS_RUNNING,)).fetchall()
+        requeued = 0
+        for row in rows:
+            if _worker_alive(row['worker']) and row['heartbeat_at'] >= time.time() - timeout_s:
+                continue
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE job_id = ? AND status = ? AND worker IS ?",
+                (STATUS_QUEUED, row['job_id'], STATUS_RUNNING, row['worker']))
+            requeued += cursor.rowcount
+        return requeued
+
+    def claim_next(self, worker):
+        """Atomically take the oldest queued job, returns its row or None"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (STATUS_QUEUED,)).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, heartbeat_at = ?, "
+                    "started_at = COALESCE(started_at, ?) WHERE job_id = ?",
+                    (STATUS_RUNNING, worker, time.time(), datetime.now().isoformat(), row['job_id']))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _check_owner(self, job_id, worker):
+        row = self.conn.execute("SELECT status, worker FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None or row['status'] != STATUS_RUNNING or row['worker'] != worker:
+            raise JobCancelled(job_id)
+
+    def heartbeat(self, job_id, worker, frames_processed):
+        """Store progress; raises JobCancelled if the job was cancelled or taken over"""
+        self._check_owner(job_id, worker)
+        self.conn.execute("UPDATE jobs SET frames_processed = ?, heartbeat_at = ? WHERE job_id = ?",
+                          (frames_processed, time.time(), job_id))
+
+    def set_plan(self, job_id, total_frames, segment_frames):
+        self.conn.execute("UPDATE jobs SET total_frames = ?, segment_frames = ? WHERE job_id = ?",
+                          (total_frames, segment_frames, job_id))
+
+    def completed_segments(self, job_id):
+        rows = self.conn.execute("SELECT segment_index FROM segments WHERE job_id = ?", (job_id,)).fetchall()
+        return {r['segment_index'] for r in rows}
+
+    def save_segment(self, job_id, worker, segment_index, start_frame, end_frame, frame_results):
+        """Commit a finished segment together with the progress it represents"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._check_owner(job_id, worker)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, segment_index, start_frame, end_frame, json.dumps(frame_results),
+                 datetime.now().isoformat()))
+            self.conn.execute("UPDATE jobs SET frames_processed = ?, heartbeat_at = ? WHERE job_id = ?",
+                              (end_frame, time.time(), job_id))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def segment_frame_results(self, job_id):
+        rows = self.conn.execute(
+            "SELECT frame_results FROM segments WHERE job_id = ? ORDER BY segment_index", (job_id,)).fetchall()
+        frames = []
+        for row in rows:
+            frames.extend(json.loads(row['frame_results']))
+        return frames
+
+    def finish(self, job_id, status, result=None, error=None):
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ? AND status = ?",
+            (status, json.dumps(result) if result is not None else None, error,
+             datetime.now().isoformat(), job_id, STATUS_RUNNING))
+
+
+def process_job(queue, detector, job, worker, segment_frames=config.VIDEO_JOB_SEGMENT_FRAMES):
+    """Run the remaining segments of a claimed job and store the final result"""
+    from video_detection import video_info, frame_step_for, frame_iterator, summarize_video, model_version
+    from camera_roi import ROIRegistry
+
+    job_id = job['job_id']
+    options = json.loads(job['options'])
+    info = video_info(job['video_path'])
+    frame_step = options.get('frame_step') or frame_step_for(info['fps'])
+    # Segments start on sampled frames, so resuming analyzes exactly the same frames
+    segment_frames = job['segment_frames'] or max(frame_step, segment_frames // frame_step * frame_step)
+    queue.set_plan(job_id, info['frame_count'], segment_frames)
+
+    done = queue.completed_segments(job_id)
+    if done:
+        print(f"♻️  Resuming job {job_id}: {len(done)} segment(s) already completed")
+
+    # Track-then-detect starts each segment on a keyframe, so resumed segments match too
+    iterate = frame_iterator(options.get('tracking', False))
+    camera_roi = ROIRegistry.from_file().get(options.get('camera_id'))
+    started = time.time()
+    segment_count = (info['frame_count'] + segment_frames - 1) // segment_frames
+    for index in range(segment_count):
+        if index in done:
+            continue
+        start_frame = index * segment_frames
+        end_frame = min(info['frame_count'], start_frame + segment_frames)
+
+        frames = []
+        for frame in iterate(detector, job['video_path'], start_frame, end_frame,
+                             frame_step, options['conf_threshold'], camera_roi=camera_roi):
+            frames.append(frame)
+            if len(frames) % PROGRESS_EVERY_FRAMES == 0:
+                queue.heartbeat(job_id, worker, frame['frame_number'] + 1)
+        queue.save_segment(job_id, worker, index, start_frame, end_frame, frames)
+
+    result = summarize_video(queue.segment_frame_results(job_id), info, time.time() - started,
+                             model_version(detector), frame_step, options.get('include_frames', False))
+    queue.finish(job_id, STATUS_COMPLETED, result=result)
+    return result
+
+
+def worker_loop(db_path=config.VIDEO_JOBS_DB, model_path=None, threads=None, max_jobs=None):
+    """Worker process: load the model once, then claim and process jobs until stopped"""
+    if threads:
+        os.environ['OMP_NUM_THREADS'] = str(threads)
+        import torch
+        torch.set_num_threads(threads)
+    from yolo_fire_detection import FireDetectionYOLO
+
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    detector = FireDetectionYOLO()
+    if not detector.load_trained_model(model_path):
+        return
+
+    queue = VideoJobQueue(db_path)
+    processed = 0
+    try:
+        while max_jobs is None or processed < max_jobs:
+            queue.requeue_interrupted()
+            job = queue.claim_next(worker)
+            if job is None:
+                time.sleep(POLL_INTERVAL_S)
+                continue
+
+            print(f"🎬 [{worker}] Processing job {job['job_id']}: {job['video_path']}")
+            try:
+                process_job(queue, detector, job, worker)
+                print(f"✅ [{worker}] Job {job['job_id']} completed")
+            except JobCancelled:
+                print(f"⏹️  [{worker}] Job {job['job_id']} cancelled")
+            except Exception as e:
+                queue.finish(job['job_id'], STATUS_FAILED, error=str(e))
+                print(f"❌ [{worker}] Job {job['job_id']} failed: {e}")
+            processed += 1
+    finally:
+        queue.close()
+
+
+def run_workers(workers=2, db_path=config.VIDEO_JOBS_DB, model_path=None, threads=None):
+    """Start a pool of worker processes and wait for them"""
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=worker_loop, args=(db_path, model_path, threads), daemon=False)
+                 for _ in range(workers)]
+    for p in processes:
+        p.start()
+    print(f"👷 {workers} video worker(s) started ({threads} threads each), queue: {db_path}")
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
+        # Running jobs are picked up again (from their last segment) once the heartbeat times out
+        for p in processes:
+            p.terminate()
+
+
+def main():
+    """submit / status / result / cancel / retry / list / worker"""
+    parser = argparse.ArgumentParser(description="Video fire detection job queue")
+    parser.add_argument('--db', default=config.VIDEO_JOBS_DB)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('submit')
+    p.add_argument('video')
+    p.add_argument('--conf', type=float, default=config.YOLO_CONFIDENCE_THRESHOLD)
+    p.add_argument('--frame-step', type=int)
+    p.add_argument('--track', action='store_true', help="Track-then-detect mode")
+    p.add_argument('--camera', help="Camera id whose ROI/exclusion zones apply")
+    p.add_argument('--frames', action='store_true', help="Keep per-frame results besides the fire intervals")
+    for name in ('status', 'result', 'cancel', 'retry', 'stream'):
+        sub.add_parser(name).add_argument('job_id')
+    sub.add_parser('list')
+    p = sub.add_parser('worker')
+    p.add_argument('--workers', type=int, default=2)
+    p.add_argument('--model')
+    p.add_argument('--threads', type=int)
+    args = parser.parse_args()
+
+    from video_detection import write_ndjson
+
+    if args.command == 'worker':
+        run_workers(args.workers, args.db, args.model, args.threads)
+        return
+
+    queue = VideoJobQueue(args.db)
+    try:
+        if args.command == 'submit':
+            print(json.dumps({'job_id': queue.submit(args.video, args.conf, args.frame_step, args.track, args.camera,
+                                                     args.frames)}))
+        elif args.command == 'status':
+            status = queue.status(args.job_id)
+            if status is None:
+                print(f"❌ Unknown job: {args.job_id}")
+                sys.exit(1)
+            print(json.dumps(status, indent=2))
+        elif args.command == 'result':
+            result = queue.result(args.job_id)
+            if result is None:
+                print(f"❌ No result for job {args.job_id} (unknown or not completed)")
+                sys.exit(1)
+            print(json.dumps(result, indent=2))
+        elif args.command == 'stream':
+            # NDJSON: one record per segment as it completes, then the summary
+            if queue.status(args.job_id) is None:
+                print(f"❌ Unknown job: {args.job_id}")
+                sys.exit(1)
+            for segment in queue.iter_segments(args.job_id):
+                write_ndjson(dict(type='segment', **segment), sys.stdout)
+            status = queue.status(args.job_id)
+            result = queue.result(args.job_id)
+            if result is None:
+                write_ndjson({'type': 'error', 'status': status['status'], 'error': status['error']}, sys.stdout)
+                sys.exit(1)
+            result.pop('frame_results', None)
+            write_ndjson(dict(type='summary', **result), sys.stdout)
+        elif args.command == 'cancel':
+            print("✅ Cancelled" if queue.cancel(args.job_id) else "⚠️  Job not cancellable")
+        elif args.command == 'retry':
+            print("✅ Requeued" if queue.retry(args.job_id) else "⚠️  Only failed jobs can be retried")
+        elif args.command == 'list':
+            for job in queue.list_jobs():
+                print(f"{job['job_id']}  {job['status']:<10} {job['frames_processed']}/{job['total_frames'] or '?'}  "
+                      f"{job['video_path']}")
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+⚡ Parallel Segment-Split Video Detection
+Splits a long video into time segments and analyzes them in parallel worker processes
+"""
+
+import os
+import sys
+import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+from video_detection import video_info, frame_step_for, frame_iterator, summarize_video, model_version
+
+SEGMENTS_PER_WORKER = 2  # a few segments per worker keeps the pool busy when segments run unevenly
+
+# Per-process state, set by _init_worker (one model per worker process)
+_detector = None
+
+
+def keyframe_positions(video_path):
+    """
+    Frame numbers of the keyframes of a video, read from the demuxed packets (no decoding)
+    Needs PyAV; returns None without it and the segments are split evenly instead.
+    """
+    try:
+        import av
+    except ImportError:
+        return None
+    try:
+        with av.open(str(video_path)) as container:
+            stream = container.streams.video[0]
+            fps = float(stream.average_rate or 30.0)
+            keyframes = set()
+            for packet in container.demux(stream):
+                if packet.is_keyframe and packet.pts is not None:
+                    keyframes.add(int(round(float((packet.pts - (stream.start_time or 0)) * stream.time_base) * fps)))
+            return sorted(keyframes)
+    except Exception:
+        return None
+
+
+def split_segments(frame_count, segments, keyframes=None):
+    """
+    [(start, end), ...] covering [0, frame_count) in `segments` parts
+    Boundaries move back to the closest keyframe when known, so each segment seek lands on
+    a keyframe and decodes nothing twice. Sampling is aligned to frame 0 (see
+    iter_frame_results), so boundaries do not need to be multiples of frame_step.
+    """
+    segments = max(1, min(segments, frame_count))
+    bounds = [0]
+    for i in range(1, segments):
+        target = frame_count * i // segments
+        if keyframes:
+            earlier = [k for k in keyframes if bounds[-1] < k <= target]
+            target = earlier[-1] if earlier else target
+        if target > bounds[-1]:
+            bounds.append(target)
+    bounds.append(frame_count)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _init_worker(model_path, threads):
+    """Pool initializer: limit torch threads and load the model once per process"""
+    global _detector
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    from yolo_fire_detection import FireDetectionYOLO
+
+    _detector = FireDetectionYOLO()
+    if not _detector.load_trained_model(model_path):
+        raise RuntimeError(f"Cannot load model: {model_path}")
+
+
+def _process_segment(video_path, start_frame, end_frame, frame_step, conf_threshold, tracking, camera_roi):
+    """Analyze one segment in a worker process; frame_number/timestamp are absolute video positions"""
+    iterate = frame_iterator(tracking)
+    started = time.time()
+    frames = list(iterate(_detector, video_path, start_frame, end_frame, frame_step, conf_threshold,
+                          camera_roi=camera_roi))
+    return frames, time.time() - started, model_version(_detector)
+
+
+def detect_video_parallel(video_path, model_path=None, workers=None, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD,
+                          frame_step=None, tracking=False, camera_roi=None, segments=None, include_frames=False):
+    """
+    Analyze a video in parallel segments, returns the same VideoDetectionResult as detect_video()
+
+    Each worker process holds its own model and cpu_count // workers torch threads.
+    Segments are merged back into one ordered timeline; in track-then-detect mode
+    every segment starts with a keyframe.
+    """
+    started = time.time()
+    info = video_info(video_path)
+    frame_step = frame_step or frame_step_for(info['fps'])
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    parts = split_segments(info['frame_count'], segments or workers * SEGMENTS_PER_WORKER,
+                           keyframe_positions(video_path))
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(model_path, threads)) as pool:
+        futures = [pool.submit(_process_segment, str(video_path), start, end, frame_step, conf_threshold,
+                               tracking, camera_roi) for start, end in parts]
+        outputs = [future.result() for future in futures]
+
+    frames = sorted((frame for segment_frames, _, _ in outputs for frame in segment_frames),
+                    key=lambda frame: frame['frame_number'])
+    result = summarize_video(frames, info, time.time() - started, outputs[0][2], frame_step, include_frames)
+    result['metadata']['workers'] = workers
+    result['metadata']['segments'] = len(parts)
+    result['metadata']['segment_seconds'] = [round(secs, 2) for _, secs, _ in outputs]
+    return result
+
+
+def benchmark(video_path, model_path=None, worker_counts=None, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD,
+              frame_step=None):
+    """Wall-clock time per worker count (1 = single process baseline) and whether all runs agree"""
+    worker_counts = worker_counts or sorted({1, os.cpu_count() or 1})
+    runs = []
+    reference = None
+    for workers in worker_counts:
+        started = time.time()
+        result = detect_video_parallel(video_path, model_path, workers, conf_threshold, frame_step,
+                                       include_frames=True)
+        seconds = time.time() - started
+        frames = [(f['frame_number'], f['fire_detected']) for f in result['frame_results']]
+        reference = reference if reference is not None else frames
+        runs.append({'workers': workers, 'seconds': round(seconds, 2), 'frames': len(frames),
+                     'speedup': round(runs[0]['seconds'] / seconds, 2) if runs else 1.0,
+                     'matches_baseline': frames == reference})
+        print(f"⏱️  {workers} worker(s): {seconds:.1f}s ({runs[-1]['speedup']}x)")
+    return runs
+
+
+def main():
+    """Analyze a video in parallel segments (--benchmark: compare worker counts)"""
+    import argparse
+
+    p = argparse.ArgumentParser(description='Parallel segment-split video fire detection')
+    p.add_argument('video')
+    p.add_argument('--model', default=None)
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--conf', type=float, default=config.YOLO_CONFIDENCE_THRESHOLD)
+    p.add_argument('--frame-step', type=int, default=None)
+    p.add_argument('--track', action='store_true')
+    p.add_argument('--frames', action='store_true', help='include per-frame results')
+    p.add_argument('--benchmark', action='store_true', help='time 1 worker vs --workers (default: all cores)')
+    args = p.parse_args()
+
+    if args.benchmark:
+        counts = sorted({1, args.workers or os.cpu_count() or 1})
+        print(json.dumps(benchmark(args.video, args.model, counts, args.conf, args.frame_step), indent=2))
+        return
+
+    result = detect_video_parallel(args.video, args.model, args.workers, args.conf, args.frame_step, args.track,
+                                   include_frames=args.frames)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
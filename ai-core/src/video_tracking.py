@@ -0,0 +1,322 @@
+"""
+🛰️ Track-then-Detect Video Mode
+Runs the detector on keyframes only and propagates boxes in between with optical flow
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime
+import numpy as np
+import cv2
+from video_detection import (VideoOpenError, DetectionError, video_info, frame_step_for, frame_result,
+                             iter_frame_results, model_version)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+MAX_KEYFRAME_INTERVAL = 10  # analyzed frames between forced detector runs
+MIN_TRACK_QUALITY = 0.5     # fraction of flow points that must track reliably
+MATCH_IOU = 0.5
+
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+
+def box_iou(a, b):
+    """IoU of two [x1, y1, x2, y2] boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_boxes(boxes_a, boxes_b, min_iou=MATCH_IOU):
+    """Greedy IoU matching, returns [(index_a, index_b, iou)]"""
+    pairs = sorted(((box_iou(a, b), i, j) for i, a in enumerate(boxes_a) for j, b in enumerate(boxes_b)),
+                   reverse=True)
+    used_a, used_b, matches = set(), set(), []
+    for iou, i, j in pairs:
+        if iou < min_iou:
+            break
+        if i not in used_a and j not in used_b:
+            used_a.add(i)
+            used_b.add(j)
+            matches.append((i, j, iou))
+    return matches
+
+
+class Track:
+    """One fire/smoke region followed between keyframes"""
+
+    def __init__(self, track_id, detection):
+        self.track_id = track_id
+        self.update(detection)
+
+    def update(self, detection):
+        self.box = [float(v) for v in detection['bbox']]
+        self.cls = detection['class']
+        self.confidence = detection['confidence']
+        self.frames_tracked = 0
+
+    def to_detection(self):
+        x1, y1, x2, y2 = self.box
+        return {
+            'class': self.cls,
+            'confidence': self.confidence,
+            'bbox': [int(x1), int(y1), int(x2), int(y2)],
+            'center': [int((x1 + x2) / 2), int((y1 + y2) / 2)],
+            'area': int((x2 - x1) * (y2 - y1)),
+            'track_id': self.track_id,
+        }
+
+
+def propagate_box(prev_gray, gray, box):
+    """
+    Move a box with pyramidal Lucas-Kanade flow of corner features inside it
+    Returns (new box or None, quality) where quality is the forward-backward consistent fraction
+    """
+    h, w = gray.shape
+    x1, y1 = max(0, int(box[0])), max(0, int(box[1]))
+    x2, y2 = min(w, int(box[2])), min(h, int(box[3]))
+    if x2 - x1 < 4 or y2 - y1 < 4:
+        return None, 0.0
+
+    mask = np.zeros_like(prev_gray)
+    mask[y1:y2, x1:x2] = 255
+    points = cv2.goodFeaturesToTrack(prev_gray, maxCorners=40, qualityLevel=0.01, minDistance=3, mask=mask)
+    if points is None or len(points) < 4:
+        return None, 0.0
+
+    forward, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, **LK_PARAMS)
+    backward, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, forward, None, **LK_PARAMS)
+    fb_error = np.linalg.norm((points - backward).reshape(-1, 2), axis=1)
+    good = (status.ravel() == 1) & (status_back.ravel() == 1) & (fb_error < 1.0)
+    quality = float(good.mean())
+    if good.sum() < 3:
+        return None, quality
+
+    old, new = points.reshape(-1, 2)[good], forward.reshape(-1, 2)[good]
+    dx, dy = np.median(new - old, axis=0)
+    # Scale from the spread of the tracked points around their centroid
+    spread_old = np.median(np.linalg.norm(old - old.mean(axis=0), axis=1))
+    spread_new = np.median(np.linalg.norm(new - new.mean(axis=0), axis=1))
+    scale = float(np.clip(spread_new / spread_old, 0.8, 1.25)) if spread_old > 1e-3 else 1.0
+
+    cx, cy = (box[0] + box[2]) / 2 + dx, (box[1] + box[3]) / 2 + dy
+    half_w, half_h = (box[2] - box[0]) * scale / 2, (box[3] - box[1]) * scale / 2
+    new_box = [max(0.0, cx - half_w), max(0.0, cy - half_h), min(float(w), cx + half_w), min(float(h), cy + half_h)]
+    if new_box[2] - new_box[0] < 2 or new_box[3] - new_box[1] < 2:
+        return None, quality
+    return new_box, quality
+
+
+class TrackThenDetect:
+    """
+    Keyframe scheduler: detect_fire() on keyframes, optical flow in between
+
+    A keyframe is forced every `max_interval` analyzed frames and as soon as a
+    track degrades (flow quality below `min_quality` or the box is lost).
+    When detection fails on a keyframe the existing tracks are kept and the detector
+    is retried on the next frame; DetectionError is raised if there is nothing to
+    fall back on (no successful keyframe yet) or it keeps failing for `max_interval` frames.
+    """
+
+    def __init__(self, detector, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD,
+                 max_interval=MAX_KEYFRAME_INTERVAL, min_quality=MIN_TRACK_QUALITY, camera_roi=None):
+        self.detector = detector
+        self.conf_threshold = conf_threshold
+        self.camera_roi = camera_roi
+        self.max_interval = max_interval
+        self.min_quality = min_quality
+        self.tracks = []
+        self.prev_gray = None
+        self.since_keyframe = 0
+        self.next_track_id = 0
+        self.keyframes = 0
+        self.failed_keyframes = 0
+        self.failures_in_row = 0
+        self.frames = 0
+
+    def _detect(self, frame):
+        """Refresh the tracks from the detector, False (tracks untouched) if detection failed"""
+        detections = self.detector.detect_fire(frame, self.conf_threshold, verbose=False,
+                                               camera_roi=self.camera_roi)
+        if detections is None:
+            self.failed_keyframes += 1
+            self.failures_in_row += 1
+            if not self.keyframes or self.failures_in_row >= self.max_interval:
+                raise DetectionError(f"Detection failed on {self.failures_in_row} keyframe(s) in a row")
+            return False
+        self.failures_in_row = 0
+        # Keep track ids across keyframes for detections that overlap an existing track
+        matches = match_boxes([d['bbox'] for d in detections], [t.box for t in self.tracks], min_iou=0.3)
+        matched = {i: self.tracks[j] for i, j, _ in matches}
+        tracks = []
+        for i, detection in enumerate(detections):
+            track = matched.get(i)
+            if track is None:
+                track = Track(self.next_track_id, detection)
+                self.next_track_id += 1
+            else:
+                track.update(detection)
+            tracks.append(track)
+        self.tracks = tracks
+        self.since_keyframe = 0
+        self.keyframes += 1
+        return True
+
+    def process(self, frame):
+        """
+        Detections for the next analyzed frame, whether the detector ran on it
+        and whether it failed there (the tracks were propagated instead)
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.frames += 1
+        keyframe = self.prev_gray is None or self.since_keyframe + 1 >= self.max_interval
+
+        if not keyframe:
+            for track in self.tracks:
+                box, quality = propagate_box(self.prev_gray, gray, track.box)
+                if box is None or quality < self.min_quality:
+                    keyframe = True
+                    break
+                track.box = box
+                track.frames_tracked += 1
+
+        failed = keyframe and not self._detect(frame)
+        if failed:
+            keyframe = False  # since_keyframe is left as is, so the next frame retries the detector
+        elif not keyframe:
+            self.since_keyframe += 1
+
+        self.prev_gray = gray
+        detections = [t.to_detection() for t in self.tracks]
+        return detections, keyframe, failed
+
+    @property
+    def keyframe_ratio(self):
+        return self.keyframes / self.frames if self.frames else 0.0
+
+
+def iter_tracked_frame_results(detector, video_path, start_frame=0, end_frame=None, frame_step=1,
+                               conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD, max_interval=MAX_KEYFRAME_INTERVAL,
+                               min_quality=MIN_TRACK_QUALITY, tracker=None, camera_roi=None):
+    """Same frames and record shape as iter_frame_results(), plus a 'keyframe' flag ('detection_failed' if so)"""
+    tracker = tracker or TrackThenDetect(detector, conf_threshold, max_interval, min_quality, camera_roi)
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise VideoOpenError(f"Cannot open video: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if end_frame is None:
+            end_frame = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        frame_number = start_frame
+        while frame_number < end_frame:
+            if frame_number % frame_step:
+                if not cap.grab():
+                    break
+            else:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                detections, keyframe, failed = tracker.process(frame)
+                result = frame_result(frame_number, fps, detections)
+                result['keyframe'] = keyframe
+                if failed:
+                    result['detection_failed'] = True
+                yield result
+            frame_number += 1
+    finally:
+        cap.release()
+
+
+def compare_tracking(detector, video_path, frame_step=1, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD,
+                     max_interval=MAX_KEYFRAME_INTERVAL, min_quality=MIN_TRACK_QUALITY):
+    """
+    Track-then-detect vs detect-every-frame on the same frames:
+    keyframe ratio, speedup, box recall/precision against the full run and mean IoU of matched boxes
+    """
+    def boxes(frame):
+        return [[b['x'], b['y'], b['x'] + b['width'], b['y'] + b['height']] for b in frame['bounding_boxes']]
+
+    start = time.perf_counter()
+    full = list(iter_frame_results(detector, video_path, 0, None, frame_step, conf_threshold))
+    full_seconds = time.perf_counter() - start
+
+    tracker = TrackThenDetect(detector, conf_threshold, max_interval, min_quality)
+    start = time.perf_counter()
+    tracked = list(iter_tracked_frame_results(detector, video_path, 0, None, frame_step, tracker=tracker))
+    tracked_seconds = time.perf_counter() - start
+
+    full_boxes = tracked_boxes = matched = 0
+    ious, agree = [], 0
+    for reference, candidate in zip(full, tracked):
+        ref, cand = boxes(reference), boxes(candidate)
+        matches = match_boxes(ref, cand)
+        full_boxes += len(ref)
+        tracked_boxes += len(cand)
+        matched += len(matches)
+        ious.extend(iou for _, _, iou in matches)
+        agree += reference['fire_detected'] == candidate['fire_detected']
+
+    frames = len(tracked)
+    return {
+        'video': str(video_path),
+        'frames_analyzed': frames,
+        'frame_step': frame_step,
+        'max_keyframe_interval': max_interval,
+        'keyframes': tracker.keyframes,
+        'keyframe_ratio': round(tracker.keyframe_ratio, 4),
+        'failed_keyframes': tracker.failed_keyframes,
+        'full_seconds': round(full_seconds, 2),
+        'tracked_seconds': round(tracked_seconds, 2),
+        'speedup': round(full_seconds / tracked_seconds, 2) if tracked_seconds else None,
+        'box_recall': round(matched / full_boxes, 4) if full_boxes else None,
+        'box_precision': round(matched / tracked_boxes, 4) if tracked_boxes else None,
+        'mean_iou': round(float(np.mean(ious)), 4) if ious else None,
+        'fire_detected_agreement': round(agree / frames, 4) if frames else None,
+        'model_version': model_version(detector),
+        'timestamp': datetime.now().isoformat(),
+    }
+
+
+def main():
+    """Compare track-then-detect with detect-every-frame on a test video"""
+    from yolo_fire_detection import FireDetectionYOLO
+
+    if len(sys.argv) < 2:
+        print("Usage: python src/video_tracking.py <video> [model_path] [max_interval]")
+        sys.exit(1)
+
+    detector = FireDetectionYOLO()
+    if not detector.load_trained_model(sys.argv[2] if len(sys.argv) > 2 else None):
+        sys.exit(1)
+
+    max_interval = int(sys.argv[3]) if len(sys.argv) > 3 else MAX_KEYFRAME_INTERVAL
+    frame_step = frame_step_for(video_info(sys.argv[1])['fps'])
+    report = compare_tracking(detector, sys.argv[1], frame_step, max_interval=max_interval)
+
+    print(f"\n🛰️  TRACK-THEN-DETECT REPORT")
+    print(f"   Frames analyzed: {report['frames_analyzed']} | Keyframes: {report['keyframes']} "
+          f"({report['keyframe_ratio']:.1%})")
+    print(f"   Time: {report['full_seconds']}s full vs {report['tracked_seconds']}s tracked "
+          f"(x{report['speedup']})")
+    print(f"   Box recall: {report['box_recall']} | precision: {report['box_precision']} | "
+          f"mean IoU: {report['mean_iou']}")
+    print(f"   fire_detected agreement: {report['fire_detected_agreement']}")
+
+    os.makedirs("runs/tracking", exist_ok=True)
+    report_path = os.path.join("runs/tracking", f"tracking_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Report saved to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+🔎 Fast Video Triage
+Cheap first pass over long footage (keyframes only / sparse sampling, downscaled decode)
+that flags time ranges for full-rate analysis
+"""
+
+import os
+import sys
+import json
+import time
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+from video_detection import VideoOpenError, video_info, frame_step_for, iter_frame_results, model_version
+
+TRIAGE_CONF = 0.2  # lower than the full pass: a missed range is worse than a false alarm here
+MODE_KEYFRAMES = 'keyframes'
+MODE_SAMPLED = 'sampled'
+
+
+def scaled_size(width, height, max_side=None):
+    """(width, height) fitted inside max_side, even values (needed by most pixel formats)"""
+    scale = min(1.0, max_side / max(width, height)) if max_side else 1.0
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+
+def has_pyav():
+    try:
+        import av  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def iter_keyframes(video_path, max_side=config.VIDEO_TRIAGE_MAX_SIDE):
+    """
+    Yield (frame_number, BGR frame) for the I-frames only (PyAV)
+    The decoder skips every non-key frame and the colour conversion scales straight
+    to the reduced size, so full-resolution BGR frames are never built.
+    """
+    import av
+
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'
+        stream.codec_context.skip_frame = 'NONKEY'
+        fps = float(stream.average_rate or 30.0)
+        width, height = scaled_size(stream.codec_context.width, stream.codec_context.height, max_side)
+        for index, frame in enumerate(container.decode(stream)):
+            frame_number = int(round(frame.time * fps)) if frame.time is not None else index
+            yield frame_number, frame.to_ndarray(width=width, height=height, format='bgr24')
+
+
+def iter_sampled_frames(video_path, frame_step, max_side=config.VIDEO_TRIAGE_MAX_SIDE):
+    """
+    Yield (frame_number, BGR frame) for every frame_step-th frame (OpenCV)
+    Skipped frames are grab()bed without retrieve(), so they are demuxed/decoded but never
+    converted to BGR; retrieved frames are downscaled to max_side.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise VideoOpenError(f"Cannot open video: {video_path}")
+    try:
+        size = None
+        frame_number = 0
+        while cap.grab():
+            if frame_number % frame_step == 0:
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+                if size is None:
+                    size = scaled_size(frame.shape[1], frame.shape[0], max_side)
+                if size != (frame.shape[1], frame.shape[0]):
+                    frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                yield frame_number, frame
+            frame_number += 1
+    finally:
+        cap.release()
+
+
+def flag_ranges(samples, frame_count, fps):
+    """
+    Time ranges to re-analyze at full rate from triage samples [(frame_number, confidence), ...]
+    A hit covers everything between its neighbouring samples, since fire could have started
+    anywhere in that gap; overlapping ranges are merged. A failed sample (confidence None)
+    is flagged like a hit: its frame was never checked, so the full pass must look at it.
+    """
+    ranges = []
+    for i, (frame_number, confidence) in enumerate(samples):
+        failed = confidence is None
+        if not failed and confidence <= 0:
+            continue
+        confidence = confidence or 0.0
+        start = samples[i - 1][0] if i > 0 else 0
+        end = samples[i + 1][0] if i + 1 < len(samples) else frame_count
+        if ranges and start <= ranges[-1]['end_frame']:
+            ranges[-1]['end_frame'] = max(ranges[-1]['end_frame'], end)
+            ranges[-1]['peak_confidence'] = max(ranges[-1]['peak_confidence'], confidence)
+            ranges[-1]['hits'] += not failed
+            ranges[-1]['failed'] += failed
+        else:
+            ranges.append({'start_frame': start, 'end_frame': end, 'peak_confidence': confidence,
+                           'hits': int(not failed), 'failed': int(failed)})
+    for r in ranges:
+        r['start_time'] = round(r['start_frame'] / fps, 3)
+        r['end_time'] = round(r['end_frame'] / fps, 3)
+        r['peak_confidence'] = round(r['peak_confidence'], 4)
+    return ranges
+
+
+def _throughput(frames, seconds):
+    return {'frames': frames, 'seconds': round(seconds, 3), 'fps': round(frames / seconds, 1) if seconds else None}
+
+
+def triage_video(detector, video_path, mode=MODE_KEYFRAMES, conf_threshold=TRIAGE_CONF,
+                 max_side=config.VIDEO_TRIAGE_MAX_SIDE, interval_s=config.VIDEO_TRIAGE_INTERVAL_S, img_size=None):
+    """
+    Quick pass flagging ranges with possible fire; decode and inference throughput reported separately
+
+    mode 'keyframes' decodes I-frames only (needs PyAV, falls back to 'sampled');
+    mode 'sampled' decodes one frame every interval_s seconds.
+    Frames where detection fails are listed in failed_frames and their ranges are flagged.
+    """
+    info = video_info(video_path)
+    if mode == MODE_KEYFRAMES and not has_pyav():
+        print("⚠️  PyAV not installed, keyframe-only decode unavailable: sampling one frame "
+              f"every {interval_s}s instead (pip install av)")
+        mode = MODE_SAMPLED
+
+    if mode == MODE_KEYFRAMES:
+        frames = iter_keyframes(video_path, max_side)
+    else:
+        frames = iter_sampled_frames(video_path, max(1, int(round(info['fps'] * interval_s))), max_side)
+
+    samples = []
+    failed_frames = []
+    decode_seconds = inference_seconds = 0.0
+    decoded_size = None
+    started = time.time()
+    while True:
+        t0 = time.perf_counter()
+        item = next(frames, None)
+        decode_seconds += time.perf_counter() - t0
+        if item is None:
+            break
+        frame_number, frame = item
+        decoded_size = decoded_size or f"{frame.shape[1]}x{frame.shape[0]}"
+
+        t0 = time.perf_counter()
+        detections = detector.detect_fire(frame, conf_threshold, img_size=img_size, verbose=False)
+        inference_seconds += time.perf_counter() - t0
+        if detections is None:
+            failed_frames.append(frame_number)
+            samples.append((frame_number, None))
+        else:
+            samples.append((frame_number, max((d['confidence'] for d in detections), default=0.0)))
+
+    ranges = flag_ranges(samples, info['frame_count'], info['fps'])
+    flagged = sum(r['end_frame'] - r['start_frame'] for r in ranges)
+    return {
+        'mode': mode,
+        'ranges': ranges,
+        'flagged_ratio': round(flagged / max(1, info['frame_count']), 4),
+        'failed_frames': failed_frames,
+        'decode': _throughput(len(samples), decode_seconds),
+        'inference': _throughput(len(samples), inference_seconds),
+        'metadata': {
+            'processing_time': f"{time.time() - started:.1f}s",
+            'model_version': model_version(detector),
+            'image_size': f"{info['width']}x{info['height']}",
+            'decoded_size': decoded_size,
+            'video_frames': info['frame_count'],
+            'fps': round(info['fps'], 3),
+            'conf_threshold': conf_threshold,
+        },
+    }
+
+
+def analyze_ranges(detector, video_path, ranges, frame_step=None, conf_threshold=config.YOLO_CONFIDENCE_THRESHOLD):
+    """Full-rate second pass over the flagged ranges, FrameDetection dicts in timeline order"""
+    frame_step = frame_step or frame_step_for(video_info(video_path)['fps'])
+    frames = []
+    for r in ranges:
+        frames.extend(iter_frame_results(detector, video_path, r['start_frame'], r['end_frame'], frame_step,
+                                         conf_threshold))
+    return frames
+
+
+def main():
+    """Triage a video and print the flagged ranges (--full: re-analyze them at the normal sampling rate)"""
+    import argparse
+    from yolo_fire_detection import FireDetectionYOLO
+
+    p = argparse.ArgumentParser(description='Fast keyframe/downscaled triage of long videos')
+    p.add_argument('video')
+    p.add_argument('--model', default=None)
+    p.add_argument('--mode', choices=(MODE_KEYFRAMES, MODE_SAMPLED), default=MODE_KEYFRAMES)
+    p.add_argument('--conf', type=float, default=TRIAGE_CONF)
+    p.add_argument('--max-side', type=int, default=config.VIDEO_TRIAGE_MAX_SIDE)
+    p.add_argument('--interval', type=float, default=config.VIDEO_TRIAGE_INTERVAL_S)
+    p.add_argument('--imgsz', type=int, default=None)
+    p.add_argument('--full', action='store_true', help='analyze the flagged ranges afterwards')
+    args = p.parse_args()
+
+    detector = FireDetectionYOLO()
+    if not detector.load_trained_model(args.model):
+        sys.exit(1)
+
+    report = triage_video(detector, args.video, args.mode, args.conf, args.max_side, args.interval, args.imgsz)
+    print(f"🔎 Decode: {report['decode']['fps']} fps | Inference: {report['inference']['fps']} fps | "
+          f"{len(report['ranges'])} range(s) flagged ({report['flagged_ratio']:.1%} of the video)")
+    if report['failed_frames']:
+        print(f"⚠️  Detection failed on {len(report['failed_frames'])} triage frame(s), their ranges are flagged")
+    if args.full:
+        frames = analyze_ranges(detector, args.video, report['ranges'])
+        report['frame_results'] = frames
+        print(f"🎯 Full pass: {sum(f['fire_detected'] for f in frames)}/{len(frames)} frames with fire")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
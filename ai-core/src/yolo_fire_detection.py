@@ -5,6 +5,7 @@ Advanced fire detection with bounding box localization
 
 import os
 import sys
+import time
 from pathlib import Path
 import torch
 import cv2
@@ -15,6 +16,18 @@ import requests
 import zipfile
 import yaml
 from datetime import datetime
+from dataset_manifest import DatasetManifest
+from zip_dataset import ZipDataset, DEFAULT_ZIP_PATH
+from dataset_sync import sync_dataset
+from autotune import autotune_training, save_autotune_result
+from distillation import attach_distillation
+from adaptive_resolution import LatencyModel
+from image_decode import load_image
+from pipeline import detection_pipeline, resolve_backend
+
+# Project-wide settings live in ai-core/config.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import config
 
 # Install required packages if not present
 try:
@@ -26,11 +39,33 @@ except ImportError:
     from ultralytics import YOLO
     import roboflow
 
+# Augmentation and learning rate settings used by train_model
+# (also the baseline/center of the hyperparameter search)
+TRAINING_HYPERPARAMETERS = {
+    # Data augmentation for fire detection
+    'hsv_h': 0.015,     # Hue variation (important for fire colors)
+    'hsv_s': 0.7,       # Saturation variation
+    'hsv_v': 0.4,       # Value/brightness variation
+    'degrees': 10,      # Rotation augmentation
+    'translate': 0.1,   # Translation augmentation
+    'scale': 0.5,       # Scale augmentation
+    'fliplr': 0.5,      # Horizontal flip
+    
+    # Learning rate settings
+    'lr0': 0.01,        # Initial learning rate
+    'lrf': 0.1,         # Final learning rate factor
+    'momentum': 0.937,  # SGD momentum
+    'weight_decay': 0.0005,  # Weight decay
+}
+
 class FireDetectionYOLO:
     def __init__(self):
         self.model = None
         self.dataset_path = None
         self.trained_model_path = None
+        self.manifest = None
+        self.latency_model = LatencyModel(config.YOLO_ADAPTIVE_INPUT_SIZES, config.YOLO_INPUT_SIZE)
+        self.last_detection_info = None
         
     def setup_roboflow_dataset(self, api_key=None):
         """
@@ -59,11 +94,15 @@ class FireDetectionYOLO:
             rf = roboflow.Roboflow(api_key=api_key)
             
             # Access the wildfire project
-            project = rf.workspace("test0-sbyyu").project("wildfire-soeq8")
-            dataset = project.version(10).download("yolov8")
+            project = rf.workspace(config.ROBOFLOW_WORKSPACE).project(config.ROBOFLOW_PROJECT)
+            dataset = project.version(config.ROBOFLOW_VERSION).download("yolov8")
+            print(f"✅ Dataset downloaded to: {dataset.location}")
             
-            self.dataset_path = dataset.location
-            print(f"✅ Dataset downloaded to: {self.dataset_path}")
+            # Apply only added/changed/removed files to the working dataset,
+            # the diff in datasets/wildfire/.sync/ tells derived caches what to refresh
+            if os.path.abspath(dataset.location) != os.path.abspath(config.DATASET_PATH):
+                sync_dataset(dataset.location, config.DATASET_PATH)
+            self.dataset_path = config.DATASET_PATH
             
             return True
             
@@ -131,10 +170,27 @@ class FireDetectionYOLO:
         except Exception as e:
             print(f"⚠️  Could not read data.yaml: {e}")
         
+        # Label statistics come from the indexed manifest (only changed files are re-parsed)
+        self.get_manifest().print_report()
+        
         return True
     
-    def train_model(self, epochs=100, img_size=640, batch_size=16):
-        """Train YOLOv8 model with the wildfire dataset"""
+    def get_manifest(self):
+        """Load the label manifest for the current dataset, refreshing changed files"""
+        if self.manifest is None or self.manifest.dataset_path != str(self.dataset_path):
+            self.manifest = DatasetManifest(self.dataset_path)
+        stats = self.manifest.refresh()
+        print(f"🗂️  Label manifest: {stats['parsed']} parsed, {stats['reused']} reused, {stats['removed']} removed")
+        return self.manifest
+    
+    def train_model(self, epochs=100, img_size=640, batch_size=None, workers=None, auto_tune=None,
+                    hyperparameters=None, model_size='n', teacher_weights=None, kd_weight=1.0, temperature=2.0):
+        """
+        Train YOLOv8 model with the wildfire dataset
+        On CPU, batch size is auto-tuned unless passed explicitly (CPU training always loads batches with workers=0)
+        hyperparameters overrides TRAINING_HYPERPARAMETERS (e.g. a search result)
+        teacher_weights enables distillation from a trained larger model (see distillation.py)
+        """
         
         # Auto-detect local dataset if not setup via API
         if not self.dataset_path:
@@ -154,22 +210,54 @@ class FireDetectionYOLO:
         print("=" * 50)
         
         # Initialize YOLOv8 model
-        model = YOLO('yolov8n.pt')  # nano version - fastest
-        # Alternative options:
-        # model = YOLO('yolov8s.pt')  # small - balanced
-        # model = YOLO('yolov8m.pt')  # medium - more accurate
+        # n: nano - fastest | s: small - balanced | m: medium - more accurate
+        base_weights = f'yolov8{model_size}.pt'
+        model = YOLO(base_weights)
+        run_name = 'fire_detection_yolo' if model_size == 'n' else f'fire_detection_yolo_{model_size}'
+        
+        if teacher_weights:
+            attach_distillation(model, teacher_weights, kd_weight=kd_weight, temperature=temperature)
+            run_name += '_distilled'
         
         # Setup training parameters
         data_yaml = os.path.join(self.dataset_path, 'data.yaml')
         
+        if auto_tune is None:
+            auto_tune = not torch.cuda.is_available() and batch_size is None
+        
+        autotune_result = None
+        if auto_tune:
+            try:
+                autotune_result = autotune_training(data_yaml, weights=base_weights, img_size=img_size)
+                batch_size = autotune_result['chosen']['batch_size']
+                # Keep the measured choice next to the training results
+                model.add_callback("on_train_start",
+                                   lambda trainer: save_autotune_result(autotune_result, str(trainer.save_dir)))
+            except Exception as e:
+                print(f"⚠️  Auto-tune failed, using configured values: {e}")
+        
+        if batch_size is None:
+            batch_size = config.TRAINING_BATCH_SIZE
+        if not torch.cuda.is_available():
+            workers = 0  # Ultralytics ignores the worker count on CPU and loads batches in the main process
+        elif workers is None:
+            workers = 8
+        
         print(f"📊 Training Parameters:")
-        print(f"   Model: YOLOv8n (nano)")
+        print(f"   Model: YOLOv8{model_size}")
+        if teacher_weights:
+            print(f"   Teacher: {teacher_weights} (distillation)")
         print(f"   Dataset: {data_yaml}")
         print(f"   Epochs: {epochs}")
         print(f"   Image size: {img_size}")
-        print(f"   Batch size: {batch_size}")
+        print(f"   Batch size: {batch_size}{' (auto-tuned)' if autotune_result else ''}")
+        print(f"   Workers: {workers}")
         print(f"   Device: {'GPU' if torch.cuda.is_available() else 'CPU'}")
         
+        train_hyperparameters = dict(TRAINING_HYPERPARAMETERS, **(hyperparameters or {}))
+        if hyperparameters:
+            print(f"   Hyperparameters: {hyperparameters}")
+        
         try:
             # Start training
             results = model.train(
@@ -177,31 +265,19 @@ class FireDetectionYOLO:
                 epochs=epochs,
                 imgsz=img_size,
                 batch=batch_size,
-                name='fire_detection_yolo',
+                name=run_name,
                 project='runs/detect',
                 
                 # Optimization settings
                 patience=15,      # Early stopping patience
                 save_period=10,   # Save checkpoint every 10 epochs
                 
-                # Data augmentation for fire detection
-                hsv_h=0.015,     # Hue variation (important for fire colors)
-                hsv_s=0.7,       # Saturation variation
-                hsv_v=0.4,       # Value/brightness variation
-                degrees=10,      # Rotation augmentation
-                translate=0.1,   # Translation augmentation
-                scale=0.5,       # Scale augmentation
-                fliplr=0.5,      # Horizontal flip
-                
-                # Learning rate settings
-                lr0=0.01,        # Initial learning rate
-                lrf=0.1,         # Final learning rate factor
-                momentum=0.937,  # SGD momentum
-                weight_decay=0.0005,  # Weight decay
+                # Augmentation and learning rate settings
+                **train_hyperparameters,
                 
                 # Hardware settings
                 device=0 if torch.cuda.is_available() else 'cpu',
-                workers=8 if torch.cuda.is_available() else 4,
+                workers=workers,
                 
                 # Validation settings
                 val=True,        # Validate during training
@@ -210,7 +286,7 @@ class FireDetectionYOLO:
             )
             
             # Save trained model path
-            self.trained_model_path = f"runs/detect/fire_detection_yolo/weights/best.pt"
+            self.trained_model_path = str(model.trainer.best)
             
             print(f"\n✅ Training completed!")
             print(f"📊 Best model saved to: {self.trained_model_path}")
@@ -249,10 +325,22 @@ class FireDetectionYOLO:
             print(f"❌ Error loading model: {e}")
             return False
     
-    def detect_fire(self, image_path, conf_threshold=0.5):
+    def detect_fire(self, image_path, conf_threshold=0.5, latency_budget_ms=None, img_size=None, verbose=True,
+                    camera_roi=None, iou_threshold=None, decode_scale=None):
         """
         Detect fire in an image with bounding boxes
         Returns detection results with coordinates
+        
+        latency_budget_ms picks the largest input size expected to fit the budget
+        (learned online from recent calls); img_size forces a size instead.
+        The size used is stored in each detection and in last_detection_info.
+        camera_roi (CameraROI) crops to the camera's region of interest before
+        inference; boxes come back in full-frame coordinates, excluded zones removed.
+        Large JPEG files are decoded directly at a reduced scale still covering
+        the input size; boxes are mapped back to the original resolution.
+        iou_threshold overrides the NMS IoU (ultralytics default 0.7).
+        decode_scale is the (sx, sy) returned by load_image() for an image array the
+        caller already decoded at reduced scale: boxes are scaled before rounding.
         """
         
         if self.model is None:
@@ -260,8 +348,36 @@ class FireDetectionYOLO:
             return None
         
         try:
+            if img_size is None:
+                img_size = self.latency_model.choose(latency_budget_ms)
+            # The first call also builds the predictor, keep it out of the latency model
+            warmup = self.model.predictor is None
+            
+            frame_shape, offset = None, (0, 0)
+            scale_x, scale_y = decode_scale or (1.0, 1.0)
+            if isinstance(image_path, (str, Path)):
+                # The ROI is applied in full-frame pixels, so ROI frames are decoded in full
+                image_path, (scale_x, scale_y) = load_image(image_path, None if camera_roi is not None else img_size)
+                if image_path is None:
+                    raise ValueError("Cannot read image")
+            if camera_roi is not None:
+                frame_shape = image_path.shape
+                image_path, offset = camera_roi.crop(image_path)
+            
             # Run detection
-            results = self.model(image_path, conf=conf_threshold)
+            start = time.perf_counter()
+            nms = {} if iou_threshold is None else {'iou': iou_threshold}
+            results = self.model(image_path, conf=conf_threshold, imgsz=img_size, verbose=verbose, **nms)
+            latency_ms = (time.perf_counter() - start) * 1000
+            if not warmup:
+                self.latency_model.record(img_size, latency_ms)
+            
+            self.last_detection_info = {
+                'input_size': img_size,
+                'latency_ms': round(latency_ms, 2),
+                'latency_budget_ms': latency_budget_ms,
+                'decode_scale': round(max(scale_x, scale_y), 3),
+            }
             
             detections = []
             
@@ -272,6 +388,8 @@ class FireDetectionYOLO:
                     for box in boxes:
                         # Extract box information
                         x1, y1, x2, y2 = box.xyxy[0].tolist()
+                        x1, x2 = x1 * scale_x, x2 * scale_x
+                        y1, y2 = y1 * scale_y, y2 * scale_y
                         confidence = box.conf[0].item()
                         class_id = int(box.cls[0].item())
                         
@@ -284,11 +402,15 @@ class FireDetectionYOLO:
                             'confidence': confidence,
                             'bbox': [int(x1), int(y1), int(x2), int(y2)],
                             'center': [int((x1+x2)/2), int((y1+y2)/2)],
-                            'area': int((x2-x1) * (y2-y1))
+                            'area': int((x2-x1) * (y2-y1)),
+                            'input_size': img_size
                         }
                         
                         detections.append(detection)
             
+            if camera_roi is not None:
+                detections = camera_roi.filter(camera_roi.map_back(detections, offset), frame_shape)
+            
             return detections
             
         except Exception as e:
@@ -370,6 +492,9 @@ class FireDetectionYOLO:
                 test_images_dir = os.path.join(self.dataset_path, 'test/images')
         
         if not test_images_dir or not os.path.exists(test_images_dir):
+            if os.path.exists(DEFAULT_ZIP_PATH):
+                print(f"📦 Dataset not extracted, reading test split from {DEFAULT_ZIP_PATH}")
+                return self.test_model_performance_from_zip(DEFAULT_ZIP_PATH)
             print(f"❌ Test images directory not found: {test_images_dir}")
             return
         
@@ -385,12 +510,24 @@ class FireDetectionYOLO:
         total_detections = 0
         images_with_detections = 0
         
-        # Test first 10 images as sample
-        sample_images = test_images[:10]
-        
-        for img_name in sample_images:
-            img_path = os.path.join(test_images_dir, img_name)
-            detections = self.detect_fire(img_path, conf_threshold=0.5)
+        # Stratified sample of 10 images for the dataset test split, first 10 otherwise
+        dataset_test_dir = os.path.join(self.dataset_path, 'test/images') if self.dataset_path else None
+        if dataset_test_dir and os.path.abspath(test_images_dir) == os.path.abspath(dataset_test_dir):
+            sample_images = [os.path.basename(p) for p in self.get_manifest().stratified_sample(10, split='test')]
+        else:
+            sample_images = test_images[:10]
+        
+        # Decode, inference and output overlap in the pipeline instead of running in turn
+        # (pooled PyTorch batches for .pt weights, the ultralytics predictor for exported ones)
+        pipeline = detection_pipeline(self, conf_threshold=0.5,
+                                      backend=resolve_backend('auto', getattr(self.model, 'model_name', None)))
+        sample_paths = [os.path.join(test_images_dir, img_name) for img_name in sample_images]
+        for item in pipeline.run(sample_paths):
+            img_name = os.path.basename(item.source)
+            if item.error:
+                print(f"❌ {img_name}: {item.error}")
+                continue
+            detections = item.output['detections']
             
             if detections:
                 total_detections += len(detections)
@@ -407,6 +544,47 @@ class FireDetectionYOLO:
         print(f"   Images with detections: {images_with_detections}")
         print(f"   Total detections: {total_detections}")
         print(f"   Average detections per image: {total_detections/len(sample_images):.1f}")
+        report = pipeline.report()
+        print(f"   Pipeline: {report['wall_s']}s, bottleneck stage: {report['bottleneck']}")
+    
+    def test_model_performance_from_zip(self, zip_path=DEFAULT_ZIP_PATH, sample_size=10):
+        """
+        Test model performance on the test split read directly from the dataset zip
+        """
+        
+        if self.model is None:
+            print("❌ Model not loaded")
+            return
+        
+        with ZipDataset(zip_path) as dataset:
+            manifest = DatasetManifest(zip_dataset=dataset)
+            manifest.refresh()
+            sample_paths = manifest.stratified_sample(sample_size, split='test')
+            print(f"📊 Found {len(dataset.list_images('test'))} test images in {zip_path}")
+            
+            total_detections = 0
+            images_with_detections = 0
+            
+            for rel_path in sample_paths:
+                img_name = os.path.basename(rel_path)
+                detections = self.detect_fire(dataset.decode_image('test', img_name), conf_threshold=0.5)
+                
+                if detections:
+                    total_detections += len(detections)
+                    images_with_detections += 1
+                    
+                    print(f"📸 {img_name}: {len(detections)} detections")
+                    for det in detections:
+                        print(f"   - {det['class']}: {det['confidence']:.3f}")
+                else:
+                    print(f"📸 {img_name}: No detections")
+        
+        print(f"\n📊 Sample Test Results:")
+        print(f"   Images tested: {len(sample_paths)}")
+        print(f"   Images with detections: {images_with_detections}")
+        print(f"   Total detections: {total_detections}")
+        if sample_paths:
+            print(f"   Average detections per image: {total_detections/len(sample_paths):.1f}")
     
     def create_web_api_demo(self):
         """
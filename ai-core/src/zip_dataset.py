@@ -0,0 +1,262 @@
+"""
+📦 Zip-backed Dataset Reader
+Serves images and labels straight from the Roboflow archive without extracting it
+"""
+
+import os
+import sys
+import mmap
+import struct
+import zlib
+import threading
+from collections import namedtuple
+import numpy as np
+import cv2
+import yaml
+
+DEFAULT_ZIP_PATH = "datasets/wildfire.v10-origin.yolov8.zip"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Zip record signatures and layouts (APPNOTE.TXT)
+EOCD_SIGNATURE = b'PK\x05\x06'
+EOCD64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+EOCD64_SIGNATURE = b'PK\x06\x06'
+CENTRAL_SIGNATURE = b'PK\x01\x02'
+LOCAL_SIGNATURE = b'PK\x03\x04'
+EOCD_STRUCT = struct.Struct('<4s4H2LH')
+EOCD64_LOCATOR_STRUCT = struct.Struct('<4sLQL')
+EOCD64_STRUCT = struct.Struct('<4sQ2H2L4Q')
+CENTRAL_STRUCT = struct.Struct('<4s6H3L5H2L')
+LOCAL_STRUCT = struct.Struct('<4s5H3L2H')
+
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+
+ZipEntry = namedtuple('ZipEntry', 'name header_offset compressed_size size method crc')
+
+
+class ZipDataset:
+    """
+    Random-access view of a YOLO dataset zip
+
+    The central directory is indexed once when the archive is opened.
+    Stored entries are returned as zero-copy memoryview slices of the
+    memory-mapped archive, deflated entries are inflated on demand.
+    """
+
+    def __init__(self, zip_path=DEFAULT_ZIP_PATH):
+        self.zip_path = str(zip_path)
+        self._file = open(self.zip_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._data_offsets = {}
+        self._lock = threading.Lock()
+        self.entries = self._read_central_directory()
+        self.root = self._find_root()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map and file handle"""
+        if self._mmap is None:
+            return
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Slices handed out by read() are still alive; the map is freed with them
+            pass
+        self._file.close()
+        self._mmap = None
+
+    # ------------------------------------------------------------------
+    # Central directory index
+    # ------------------------------------------------------------------
+
+    def _read_central_directory(self):
+        size = len(self._mmap)
+        search_start = max(0, size - (EOCD_STRUCT.size + 0xFFFF))
+        eocd_pos = self._mmap.rfind(EOCD_SIGNATURE, search_start)
+        if eocd_pos < 0:
+            raise ValueError(f"Not a zip archive: {self.zip_path}")
+
+        _, _, _, _, total_entries, cd_size, cd_offset, _ = EOCD_STRUCT.unpack_from(self._mmap, eocd_pos)
+
+        # Zip64 archives keep the real values in the zip64 end record
+        locator_pos = eocd_pos - EOCD64_LOCATOR_STRUCT.size
+        if locator_pos >= 0 and self._mmap[locator_pos:locator_pos + 4] == EOCD64_LOCATOR_SIGNATURE:
+            _, _, eocd64_pos, _ = EOCD64_LOCATOR_STRUCT.unpack_from(self._mmap, locator_pos)
+            fields = EOCD64_STRUCT.unpack_from(self._mmap, eocd64_pos)
+            total_entries, cd_size, cd_offset = fields[7], fields[8], fields[9]
+
+        entries = {}
+        pos = cd_offset
+        for _ in range(total_entries):
+            (signature, _, _, flags, method, _, _, crc, compressed_size, file_size,
+             name_len, extra_len, comment_len, _, _, _, header_offset) = CENTRAL_STRUCT.unpack_from(self._mmap, pos)
+            if signature != CENTRAL_SIGNATURE:
+                raise ValueError(f"Corrupt central directory in {self.zip_path}")
+
+            name_start = pos + CENTRAL_STRUCT.size
+            raw_name = self._mmap[name_start:name_start + name_len]
+            name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437')
+
+            if 0xFFFFFFFF in (compressed_size, file_size, header_offset):
+                file_size, compressed_size, header_offset = self._zip64_extra(
+                    name_start + name_len, extra_len, file_size, compressed_size, header_offset)
+
+            if not name.endswith('/'):
+                entries[name] = ZipEntry(name, header_offset, compressed_size, file_size, method, crc)
+            pos = name_start + name_len + extra_len + comment_len
+
+        return entries
+
+    def _zip64_extra(self, pos, length, file_size, compressed_size, header_offset):
+        end = pos + length
+        while pos + 4 <= end:
+            tag, size = struct.unpack_from('<2H', self._mmap, pos)
+            if tag == 0x0001:
+                values = iter(struct.unpack_from(f'<{size // 8}Q', self._mmap, pos + 4))
+                if file_size == 0xFFFFFFFF:
+                    file_size = next(values)
+                if compressed_size == 0xFFFFFFFF:
+                    compressed_size = next(values)
+                if header_offset == 0xFFFFFFFF:
+                    header_offset = next(values)
+                break
+            pos += 4 + size
+        return file_size, compressed_size, header_offset
+
+    def _find_root(self):
+        """Directory inside the archive that holds data.yaml ('' for a flat export)"""
+        candidates = [n for n in self.entries if n.rsplit('/', 1)[-1] == 'data.yaml']
+        if not candidates:
+            return ''
+        best = min(candidates, key=lambda n: n.count('/'))
+        return best[:-len('data.yaml')]
+
+    def _data_offset(self, entry):
+        offset = self._data_offsets.get(entry.name)
+        if offset is None:
+            fields = LOCAL_STRUCT.unpack_from(self._mmap, entry.header_offset)
+            if fields[0] != LOCAL_SIGNATURE:
+                raise ValueError(f"Corrupt local header for {entry.name}")
+            name_len, extra_len = fields[9], fields[10]
+            offset = entry.header_offset + LOCAL_STRUCT.size + name_len + extra_len
+            with self._lock:
+                self._data_offsets[entry.name] = offset
+        return offset
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+
+    def entry(self, relative_name):
+        """Central directory entry for a dataset-relative path (e.g. 'test/images/a.jpg')"""
+        return self.entries.get(self.root + relative_name)
+
+    def read(self, relative_name):
+        """
+        Bytes of a dataset-relative entry
+        Stored entries come back as a memoryview into the mapped archive (no copy)
+        """
+        entry = self.entry(relative_name)
+        if entry is None:
+            raise KeyError(relative_name)
+
+        start = self._data_offset(entry)
+        raw = self._view[start:start + entry.compressed_size]
+        if entry.method == METHOD_STORED:
+            return raw
+        if entry.method == METHOD_DEFLATED:
+            return zlib.decompress(raw, -15, entry.size or 1)
+        raise NotImplementedError(f"Unsupported compression method {entry.method} for {relative_name}")
+
+    def exists(self, relative_name):
+        return self.entry(relative_name) is not None
+
+    def list_dir(self, relative_dir, extensions=None):
+        """Sorted file names directly inside a dataset-relative directory"""
+        prefix = self.root + relative_dir.rstrip('/') + '/'
+        names = []
+        for name in self.entries:
+            if name.startswith(prefix) and '/' not in name[len(prefix):]:
+                base = name[len(prefix):]
+                if extensions is None or base.lower().endswith(extensions):
+                    names.append(base)
+        return sorted(names)
+
+    def list_images(self, split):
+        return self.list_dir(f"{split}/images", IMAGE_EXTENSIONS)
+
+    def list_labels(self, split):
+        return self.list_dir(f"{split}/labels", ('.txt',))
+
+    def read_image_bytes(self, split, filename):
+        return self.read(f"{split}/images/{filename}")
+
+    def read_label(self, split, stem):
+        """Label text for an image stem, empty string if the image has no label file"""
+        name = f"{split}/labels/{stem}.txt"
+        if not self.exists(name):
+            return ''
+        return bytes(self.read(name)).decode('utf-8')
+
+    def decode_image(self, split, filename, flags=cv2.IMREAD_COLOR):
+        """Decode an image (BGR, like cv2.imread) straight from the archive"""
+        buffer = np.frombuffer(self.read_image_bytes(split, filename), dtype=np.uint8)
+        return cv2.imdecode(buffer, flags)
+
+    def iter_images(self, split, decode=True):
+        """Yield (filename, image) pairs for bulk inference/evaluation"""
+        for filename in self.list_images(split):
+            if decode:
+                yield filename, self.decode_image(split, filename)
+            else:
+                yield filename, self.read_image_bytes(split, filename)
+
+    def data_config(self):
+        """Parsed data.yaml of the archive"""
+        if not self.exists('data.yaml'):
+            return {}
+        return yaml.safe_load(bytes(self.read('data.yaml')).decode('utf-8')) or {}
+
+    def summary(self):
+        """Image/label counts per split"""
+        return {split: {'images': len(self.list_images(split)), 'labels': len(self.list_labels(split))}
+                for split in ('train', 'valid', 'test')}
+
+
+def open_dataset_zip(zip_path=DEFAULT_ZIP_PATH):
+    """Open the dataset archive if present, None otherwise"""
+    if not os.path.exists(zip_path):
+        return None
+    try:
+        return ZipDataset(zip_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not index {zip_path}: {e}")
+        return None
+
+
+def main():
+    """Index the dataset archive and print its contents"""
+    zip_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ZIP_PATH
+    dataset = open_dataset_zip(zip_path)
+    if dataset is None:
+        print(f"❌ Dataset archive not found: {zip_path}")
+        sys.exit(1)
+
+    with dataset:
+        print(f"📦 {zip_path}: {len(dataset.entries)} entries (root: '{dataset.root or '/'}')")
+        config = dataset.data_config()
+        print(f"   Classes: {config.get('nc', 'unknown')} {config.get('names', '')}")
+        for split, counts in dataset.summary().items():
+            print(f"   {split}: {counts['images']} images, {counts['labels']} labels")
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,11 @@ export const errorHandler = (
     action: 'error.handled'
   });
 
+  // Overload responses (429/503) tell the client when to retry
+  if ('retryAfterMs' in err && typeof err.retryAfterMs === 'number') {
+    res.set('Retry-After', String(Math.ceil(err.retryAfterMs / 1000)));
+  }
+
   res.status(statusCode).json({
     success: false,
     error: message,
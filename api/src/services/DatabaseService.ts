@@ -120,7 +120,8 @@ export class DatabaseService {
         result.fire_detected,
         'confidence' in result ? result.confidence : (result as VideoDetectionResult).overall_confidence,
         JSON.stringify('bounding_boxes' in result ? result.bounding_boxes : []),
-        JSON.stringify(result.metadata),
+        // Videos keep their compact fire intervals next to the metadata, never per-frame results
+        JSON.stringify('fire_intervals' in result ? { ...result.metadata, fire_intervals: result.fire_intervals } : result.metadata),
         processingTimeMs,
         result.metadata.model_version
       ];
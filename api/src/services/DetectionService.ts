@@ -1,20 +1,28 @@
 import { spawn } from 'child_process';
 import path from 'path';
 import fs from 'fs';
-import { DetectionResult, VideoDetectionResult, BoundingBox, DetectionMetadata } from '../types/detection';
-import { ProcessingError } from '../types/errors';
+import { DetectionResult, VideoDetectionResult, BoundingBox, DetectionMetadata, FireInterval } from '../types/detection';
+import { AppError, ProcessingError } from '../types/errors';
 import { DatabaseService } from './DatabaseService';
+import { DetectionWorkerClient } from './DetectionWorkerClient';
 
 export class DetectionService {
   private pythonScriptPath: string;
+  private workerScriptPath: string;
   private modelPath: string;
   private dbService: DatabaseService;
+  private worker: DetectionWorkerClient;
 
   constructor() {
     // Path to Python script that will handle AI detection
     this.pythonScriptPath = path.join(__dirname, '../../../ai-core/detect.py');
     this.modelPath = path.join(__dirname, '../../../models/fire_detection_model.pth');
     this.dbService = new DatabaseService();
+
+    // Images go to one long-lived, deadline-aware worker (EDF queue with load shedding)
+    this.workerScriptPath = path.join(__dirname, '../../../ai-core/src/detection_worker.py');
+    const deadlineMs = process.env.DETECTION_DEADLINE_MS ? parseInt(process.env.DETECTION_DEADLINE_MS) : undefined;
+    this.worker = new DetectionWorkerClient(this.workerScriptPath, process.env.DETECTION_MODEL_PATH, deadlineMs);
   }
 
   async detectInImage(imagePath: string, originalFilename?: string): Promise<DetectionResult> {
@@ -22,8 +30,8 @@ export class DetectionService {
     
     try {
       // For now, let's create a mock response until we have the Python script ready
-      if (!fs.existsSync(this.pythonScriptPath)) {
-        console.log('⚠️  Python detection script not found, using mock response');
+      if (!fs.existsSync(this.workerScriptPath)) {
+        console.log('⚠️  Python detection worker not found, using mock response');
         const result = this.createMockDetectionResult(imagePath, startTime);
         
         // Save to database if available
@@ -32,8 +40,8 @@ export class DetectionService {
         return result;
       }
 
-      // Execute Python detection script
-      const result = await this.executePythonDetection('image', imagePath);
+      // Queue the image on the detection worker (overload rejects with 429/503)
+      const result = await this.worker.detect(imagePath);
       
       // Save to database
       await this.saveDetectionToDb(imagePath, 'image', originalFilename || 'unknown', result, Date.now() - startTime);
@@ -42,6 +50,7 @@ export class DetectionService {
 
     } catch (error) {
       console.error('❌ Error in image detection:', error);
+      if (error instanceof AppError) throw error;
       throw new ProcessingError(`Failed to process image: ${error instanceof Error ? error.message : 'Unknown error'}`);
     }
   }
@@ -71,6 +80,7 @@ export class DetectionService {
 
     } catch (error) {
       console.error('❌ Error in video detection:', error);
+      if (error instanceof AppError) throw error;
       throw new ProcessingError(`Failed to process video: ${error instanceof Error ? error.message : 'Unknown error'}`);
     }
   }
@@ -81,6 +91,7 @@ export class DetectionService {
       status: 'ready',
       model_loaded: fs.existsSync(this.modelPath),
       python_script_available: fs.existsSync(this.pythonScriptPath),
+      detection_worker_running: this.worker.isRunning(),
       supported_formats: {
         images: ['jpg', 'jpeg', 'png', 'bmp'],
         videos: ['mp4', 'avi', 'mov', 'mkv']
@@ -168,20 +179,27 @@ export class DetectionService {
     const totalFrames = 30 + Math.floor(Math.random() * 120); // 30-150 frames
     const framesWithFire = Math.floor(totalFrames * Math.random() * 0.3); // Up to 30% of frames
     
-    const frameResults = Array.from({ length: Math.min(10, totalFrames) }, (_, i) => ({
-      frame_number: i + 1,
-      timestamp: i * 0.033, // ~30fps
-      fire_detected: Math.random() > 0.7,
-      confidence: 0.6 + Math.random() * 0.3,
-      bounding_boxes: []
-    }));
+    const overallConfidence = framesWithFire > 0 ? 0.7 + Math.random() * 0.25 : 0;
+    const fireIntervals: FireInterval[] = framesWithFire > 0 ? [
+      {
+        start_frame: 0,
+        end_frame: framesWithFire - 1,
+        start_time: 0,
+        end_time: Number(((framesWithFire - 1) * 0.033).toFixed(3)), // ~30fps
+        frames: framesWithFire,
+        confidence_sum: Number((overallConfidence * framesWithFire).toFixed(4)),
+        peak_confidence: Number(Math.min(1, overallConfidence + 0.05).toFixed(4)),
+        peak_frame: 0,
+        bounding_boxes: []
+      }
+    ] : [];
 
     return {
       total_frames: totalFrames,
       frames_with_fire: framesWithFire,
       fire_detected: framesWithFire > 0,
-      overall_confidence: framesWithFire > 0 ? 0.7 + Math.random() * 0.25 : Math.random() * 0.4,
-      frame_results: frameResults,
+      overall_confidence: Number(overallConfidence.toFixed(4)),
+      fire_intervals: fireIntervals,
       metadata: {
         processing_time: `${processingTime}s`,
         model_version: 'mock-v1.0.0',
@@ -0,0 +1,103 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import readline from 'readline';
+import path from 'path';
+import { DetectionResult } from '../types/detection';
+import { ProcessingError, ServiceUnavailableError, TooManyRequestsError } from '../types/errors';
+
+interface PendingRequest {
+  resolve: (result: DetectionResult) => void;
+  reject: (error: Error) => void;
+}
+
+// Client of the long-lived `ai-core/src/detection_worker.py serve` process: the model stays loaded,
+// requests are scheduled earliest-deadline-first and overload comes back as 429/503 right away
+export class DetectionWorkerClient {
+  private worker: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<string, PendingRequest>();
+  private nextId = 0;
+
+  constructor(private scriptPath: string, private modelPath?: string, private deadlineMs?: number) {}
+
+  detect(imagePath: string): Promise<DetectionResult> {
+    const worker = this.start();
+    const id = String(this.nextId++);
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      const request = { id, image: path.resolve(imagePath), deadline_ms: this.deadlineMs };
+      worker.stdin.write(JSON.stringify(request) + '\n');
+    });
+  }
+
+  isRunning(): boolean {
+    return this.worker !== null;
+  }
+
+  stop(): void {
+    // End of input: the worker finishes the queued requests, then exits
+    this.worker?.stdin.end();
+  }
+
+  private start(): ChildProcessWithoutNullStreams {
+    if (this.worker) {
+      return this.worker;
+    }
+
+    const args = [this.scriptPath, 'serve', ...(this.modelPath ? [this.modelPath] : [])];
+    // Run from ai-core/ so the default model path (runs/detect/...) resolves as with the CLI tools
+    const worker = spawn('python', args, { cwd: path.join(path.dirname(this.scriptPath), '..') });
+    this.worker = worker;
+
+    readline.createInterface({ input: worker.stdout }).on('line', (line) => this.handleResponse(line));
+    worker.stderr.on('data', (data) => {
+      console.log(`🐍 ${data.toString().trimEnd()}`);
+    });
+    worker.stdin.on('error', () => {
+      // Broken pipe: the worker died, 'close' fails the pending requests
+    });
+    worker.on('error', (error) => {
+      this.worker = null;
+      this.failPending(new Error(`Failed to start detection worker: ${error.message}`));
+    });
+    worker.on('close', (code) => {
+      this.worker = null;
+      this.failPending(new ServiceUnavailableError(`Detection worker exited with code ${code}`));
+    });
+
+    console.log('🚦 Detection worker started');
+    return worker;
+  }
+
+  private handleResponse(line: string): void {
+    let response: any;
+    try {
+      response = JSON.parse(line);
+    } catch (error) {
+      console.warn(`⚠️  Unexpected detection worker output: ${line}`);
+      return;
+    }
+
+    const request = this.pending.get(response.id);
+    if (!request) {
+      return;
+    }
+    this.pending.delete(response.id);
+
+    const { success, id, status_code, retry_after_ms, error, ...result } = response;
+    if (success) {
+      request.resolve(result as DetectionResult);
+    } else if (status_code === 429) {
+      request.reject(new TooManyRequestsError(error, retry_after_ms));
+    } else if (status_code === 503) {
+      request.reject(new ServiceUnavailableError(error, retry_after_ms));
+    } else {
+      request.reject(new ProcessingError(error || 'Detection failed'));
+    }
+  }
+
+  private failPending(error: Error): void {
+    for (const request of this.pending.values()) {
+      request.reject(error);
+    }
+    this.pending.clear();
+  }
+}
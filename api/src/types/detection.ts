@@ -33,10 +33,26 @@ export interface VideoDetectionResult {
   frames_with_fire: number;
   fire_detected: boolean;
   overall_confidence: number;
-  frame_results: FrameDetection[];
+  // frames_with_fire = sum of frames, overall_confidence = sum of confidence_sum / frames_with_fire
+  fire_intervals: FireInterval[];
+  // Per-frame detail, only when requested
+  frame_results?: FrameDetection[];
   metadata: DetectionMetadata;
 }
 
+// Run of consecutive analyzed frames with fire (end_frame/end_time inclusive)
+export interface FireInterval {
+  start_frame: number;
+  end_frame: number;
+  start_time: number;
+  end_time: number;
+  frames: number;
+  confidence_sum: number;
+  peak_confidence: number;
+  peak_frame: number;
+  bounding_boxes: BoundingBox[];
+}
+
 export interface FrameDetection {
   frame_number: number;
   timestamp: number;
@@ -44,3 +60,22 @@ export interface FrameDetection {
   confidence: number;
   bounding_boxes: BoundingBox[];
 }
+
+// NDJSON records streamed by ai-core video detection, one JSON object per line
+export interface VideoFrameRecord extends FrameDetection {
+  type: 'frame';
+}
+
+export interface VideoSegmentRecord {
+  type: 'segment';
+  segment_index: number;
+  start_frame: number;
+  end_frame: number;
+  frame_results: FrameDetection[];
+}
+
+export interface VideoSummaryRecord extends Omit<VideoDetectionResult, 'frame_results'> {
+  type: 'summary';
+}
+
+export type VideoStreamRecord = VideoFrameRecord | VideoSegmentRecord | VideoSummaryRecord;
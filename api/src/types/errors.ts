@@ -32,3 +32,21 @@ export class ProcessingError extends AppError {
     super(message, 422);
   }
 }
+
+export class TooManyRequestsError extends AppError {
+  public readonly retryAfterMs?: number;
+
+  constructor(message: string = 'Detection queue is full', retryAfterMs?: number) {
+    super(message, 429);
+    this.retryAfterMs = retryAfterMs;
+  }
+}
+
+export class ServiceUnavailableError extends AppError {
+  public readonly retryAfterMs?: number;
+
+  constructor(message: string = 'Detection service overloaded', retryAfterMs?: number) {
+    super(message, 503);
+    this.retryAfterMs = retryAfterMs;
+  }
+}
@@ -40,6 +40,8 @@ psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-E
         longitude DECIMAL(11, 8),
         status VARCHAR(20) DEFAULT 'active' CHECK (status IN ('active', 'inactive', 'maintenance')),
         api_key VARCHAR(255) UNIQUE,
+        -- Region of interest: {"roi": [[x, y], ...], "exclusions": [[[x, y], ...]], "normalized": true}
+        roi_config JSONB,
         created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
         updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
     );